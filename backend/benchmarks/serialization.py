@@ -0,0 +1,118 @@
+"""
+Coût CPU de la sérialisation d'une liste de 1000 éléments
+
+Usage: python -m backend.benchmarks.serialization [--items 1000] [--repeat 50]
+
+Compare, pour get_all_courses et get_my_schedule:
+    fastapi     chemin par défaut (response_model → dict JSON → json.dumps)
+    orjson      même validation, encodage ORJSONResponse
+    model_json  model_response: validation + dump_json en une passe
+Les objets ORM sont chargés depuis une base SQLite en mémoire (comme dans un
+handler), puis seule la sérialisation est mesurée.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session, joinedload
+
+from backend.database import Base
+from backend.models import Course, Instrument, ScheduleItem, User
+from backend.schemas import CourseResponse, Page, ScheduleItemResponse
+from backend.serialization import model_response
+
+def load_rows(count: int) -> tuple:
+    """Insère `count` cours et séances puis les relit dans une nouvelle session"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    now = datetime(2024, 9, 1, 10, 0)
+    with Session(engine) as session:
+        instruments = [
+            Instrument(name=f"Instrument {i}", description="Description", created_at=now)
+            for i in range(10)
+        ]
+        user = User(email="bench@example.com", username="bench", hashed_password="x")
+        session.add_all(instruments + [user])
+        session.flush()
+        session.add_all(
+            Course(
+                title=f"Cours {i}",
+                description="Apprendre les bases, la technique et le répertoire " * 3,
+                instrument_id=instruments[i % 10].id,
+                level="Débutant",
+                image_url=f"https://example.com/courses/{i}.jpg",
+                created_at=now + timedelta(minutes=i),
+            )
+            for i in range(count)
+        )
+        session.add_all(
+            ScheduleItem(
+                user_id=user.id,
+                title=f"Séance {i}",
+                description="Travailler les gammes et le morceau de la semaine",
+                start_time=now + timedelta(hours=i),
+                end_time=now + timedelta(hours=i, minutes=45),
+                is_teacher_view=False,
+            )
+            for i in range(count)
+        )
+        session.commit()
+
+    session = Session(engine)
+    courses = session.scalars(select(Course).options(joinedload(Course.instrument))).all()
+    schedule = session.scalars(select(ScheduleItem)).all()
+    return (
+        {"items": courses, "next_cursor": "eyJkdCI6IjIwMjQtMDktMDEifQ"},
+        {"items": schedule, "next_cursor": None},
+    )
+
+async def fastapi_body(field, response_class, data) -> bytes:
+    content = await serialize_response(field=field, response_content=data)
+    return response_class(content).body
+
+def cpu_ms_per_request(render, repeat: int) -> float:
+    render()  # préchauffage (schémas, caches de TypeAdapter)
+    start = time.process_time()
+    for _ in range(repeat):
+        render()
+    return (time.process_time() - start) * 1000 / repeat
+
+def run(items: int, repeat: int) -> List[tuple]:
+    loop = asyncio.new_event_loop()
+    courses, schedule = load_rows(items)
+    results = []
+    for name, schema, data in (
+        ("get_all_courses", Page[CourseResponse], courses),
+        ("get_my_schedule", Page[ScheduleItemResponse], schedule),
+    ):
+        field = create_response_field(name=f"Response_{name}", type_=schema)
+        bodies = {
+            "fastapi": lambda: loop.run_until_complete(fastapi_body(field, JSONResponse, data)),
+            "orjson": lambda: loop.run_until_complete(fastapi_body(field, ORJSONResponse, data)),
+            "model_json": lambda: model_response(schema, data).body,
+        }
+        for variant, render in bodies.items():
+            results.append((name, variant, cpu_ms_per_request(render, repeat)))
+    loop.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de sérialisation des réponses")
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    results = run(args.items, args.repeat)
+    baselines = {name: ms for name, variant, ms in results if variant == "fastapi"}
+    print(f"{'endpoint':<18}{'variante':<12}{'CPU ms/requête':>16}{'gain':>8}")
+    for name, variant, ms in results:
+        print(f"{name:<18}{variant:<12}{ms:>16.2f}{baselines[name] / ms:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
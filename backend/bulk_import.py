@@ -0,0 +1,299 @@
+"""
+Import en masse de cours, leçons et plannings (JSON, NDJSON, CSV)
+
+Les lignes sont lues au fil de l'eau, validées une par une avec le schéma
+de création, puis insérées par lots (un INSERT multi-lignes et un commit par
+lot). Les lignes invalides sont écartées et rapportées avec leur numéro;
+les références (instrument_id, course_id) sont vérifiées en une requête par
+lot, restreintes pour un non-administrateur à celles qu'il possède (leçons:
+ses cours). Un ImportSpec peut aussi refuser des lignes avant l'INSERT
+(conflits du planning, backend.schedule_conflicts). Les endpoints /bulk et la ligne
+de commande partagent ce code.
+
+Usage:
+    python -m backend.bulk_import courses cours.csv
+    python -m backend.bulk_import lessons lecons.ndjson
+    python -m backend.bulk_import schedule planning.json --user prof.piano@gde-musique.fr
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models import Course, Instrument, Lesson, ScheduleItem, User, RoleEnum, teacher_courses
+from backend.schedule_conflicts import import_conflicts
+from backend.schemas import CourseCreate, LessonCreate, ScheduleItemCreate
+
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "500"))
+# Au-delà, les erreurs sont seulement comptées
+BULK_MAX_REPORTED_ERRORS = int(os.getenv("BULK_MAX_REPORTED_ERRORS", "1000"))
+
+FORMATS = {
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json-seq": "ndjson",
+    "text/csv": "csv",
+}
+
+@dataclass(frozen=True)
+class ImportSpec:
+    schema: type[BaseModel]
+    model: type
+    # Champ -> modèle dont l'id doit exister
+    references: dict = field(default_factory=dict)
+    # Ligne validée -> colonnes insérées
+    values: Callable[[BaseModel], dict] = BaseModel.model_dump
+    # (session, [(numéro, colonnes)]) -> {numéro: messages} des lignes refusées, appelé juste avant l'INSERT
+    conflicts: Optional[Callable[[AsyncSession, list], Awaitable[dict]]] = None
+    # Champ de référence -> (id de l'importateur -> sous-requête des ids qu'il peut référencer)
+    owned: dict = field(default_factory=dict)
+
+def taught_course_ids(user_id: int):
+    return select(teacher_courses.c.course_id).where(teacher_courses.c.teacher_id == user_id)
+
+COURSE_IMPORT = ImportSpec(CourseCreate, Course, {"instrument_id": Instrument})
+LESSON_IMPORT = ImportSpec(LessonCreate, Lesson, {"course_id": Course}, owned={"course_id": taught_course_ids})
+SCHEDULE_IMPORT = ImportSpec(
+    ScheduleItemCreate, ScheduleItem, {"course_id": Course}, ScheduleItemCreate.columns, import_conflicts
+)
+
+class ImportReport:
+    def __init__(self):
+        self.received = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+
+    def add_error(self, row: int, messages: list[str]):
+        self.failed += 1
+        if len(self.errors) < BULK_MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "errors": messages})
+
+    def as_dict(self) -> dict:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+def format_for(content_type: Optional[str]) -> str:
+    media_type = (content_type or "application/json").split(";")[0].strip().lower()
+    if media_type not in FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported content type: {media_type}. Use JSON, NDJSON or CSV"
+        )
+    return FORMATS[media_type]
+
+def format_for_path(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    return {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}.get(extension, "json")
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8-sig").rstrip("\r")
+
+async def parse_rows(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[tuple]:
+    """Produit (numéro de ligne, dict | message d'erreur) pour chaque ligne de données"""
+    if fmt == "json":
+        body = b"".join([chunk async for chunk in chunks])
+        try:
+            rows = json.loads(body or b"[]")
+        except ValueError as exc:
+            yield 1, f"Invalid JSON: {exc}"
+            return
+        if not isinstance(rows, list):
+            yield 1, "Expected a JSON array"
+            return
+        for number, row in enumerate(rows, start=1):
+            yield number, row if isinstance(row, dict) else "Expected a JSON object"
+
+    elif fmt == "ndjson":
+        number = 0
+        async for line in iter_lines(chunks):
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield number, f"Invalid JSON: {exc}"
+                continue
+            yield number, row if isinstance(row, dict) else "Expected a JSON object"
+
+    else:
+        header = None
+        number = 0
+        pending = ""
+        async for line in iter_lines(chunks):
+            # Un champ entre guillemets peut contenir des retours à la ligne:
+            # l'enregistrement est complet quand les guillemets sont appariés
+            pending = f"{pending}\n{line}" if pending else line
+            if pending.count('"') % 2:
+                continue
+            if not pending:
+                continue
+            record, pending = next(csv.reader([pending])), ""
+            if header is None:
+                header = [name.strip() for name in record]
+                continue
+            number += 1
+            if len(record) != len(header):
+                yield number, f"Expected {len(header)} columns, got {len(record)}"
+                continue
+            # Cellule vide = valeur par défaut du schéma
+            yield number, {name: value for name, value in zip(header, record) if value != ""}
+        if pending:
+            yield number + 1, "Unterminated quoted field"
+
+async def missing_references(db: AsyncSession, spec: ImportSpec, batch: list, owner_id: Optional[int]) -> dict:
+    """Pour chaque champ de référence, les ids absents de la base (ou que `owner_id` ne possède pas)"""
+    missing = {}
+    for name, model in spec.references.items():
+        ids = {values[name] for _, values in batch if values.get(name) is not None}
+        if ids:
+            query = select(model.id).where(model.id.in_(ids))
+            if owner_id is not None and name in spec.owned:
+                query = query.where(model.id.in_(spec.owned[name](owner_id)))
+            result = await db.execute(query)
+            missing[name] = ids - set(result.scalars().all())
+    return missing
+
+async def insert_batch(db: AsyncSession, spec: ImportSpec, batch: list, report: ImportReport,
+                       owner_id: Optional[int] = None):
+    missing = await missing_references(db, spec, batch, owner_id)
+    rows = []
+    for number, values in batch:
+        unknown = [
+            f"{name}: unknown id {values[name]}"
+            for name, ids in missing.items()
+            if values.get(name) in ids
+        ]
+        if unknown:
+            report.add_error(number, unknown)
+        else:
+            rows.append((number, values))
+    if rows and spec.conflicts is not None:
+        rejected = await spec.conflicts(db, rows)
+        for number, messages in rejected.items():
+            report.add_error(number, messages)
+        rows = [(number, values) for number, values in rows if number not in rejected]
+    if not rows:
+        await db.rollback()
+        return
+
+    try:
+        await db.execute(insert(spec.model), [values for _, values in rows])
+        await db.commit()
+        report.inserted += len(rows)
+    except IntegrityError:
+        # Lot refusé par une contrainte: ligne par ligne pour isoler les fautives
+        await db.rollback()
+        for number, values in rows:
+            try:
+                await db.execute(insert(spec.model), [values])
+                await db.commit()
+                report.inserted += 1
+            except IntegrityError as exc:
+                await db.rollback()
+                report.add_error(number, [str(exc.orig)])
+
+async def import_rows(
+    db: AsyncSession,
+    spec: ImportSpec,
+    rows: AsyncIterator[tuple],
+    extra: Optional[dict] = None,
+    batch_size: int = BULK_BATCH_SIZE,
+    owner_id: Optional[int] = None,
+) -> dict:
+    """
+    Valide et insère les lignes de `rows` par lots; `extra` complète chaque ligne (ex: user_id).
+    Avec `owner_id`, les références de `spec.owned` sont limitées à ce que cet utilisateur possède.
+    """
+    report = ImportReport()
+    batch = []
+    async for number, row in rows:
+        report.received += 1
+        if isinstance(row, str):
+            report.add_error(number, [row])
+            continue
+        try:
+            values = spec.values(spec.schema.model_validate(row))
+        except ValidationError as exc:
+            report.add_error(number, [
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                for error in exc.errors()
+            ])
+            continue
+        batch.append((number, {**values, **(extra or {})}))
+        if len(batch) >= batch_size:
+            await insert_batch(db, spec, batch, report, owner_id)
+            batch = []
+    if batch:
+        await insert_batch(db, spec, batch, report, owner_id)
+    return report.as_dict()
+
+async def read_file(path: str, chunk_size: int = 1 << 16) -> AsyncIterator[bytes]:
+    with open(path, "rb") as file:
+        while chunk := file.read(chunk_size):
+            yield chunk
+
+async def run_cli(kind: str, path: str, fmt: str, user_email: Optional[str], batch_size: int) -> dict:
+    from backend.database import AsyncSessionLocal, dispose_engines
+    from backend.response_cache import COURSES, response_cache
+
+    specs = {"courses": COURSE_IMPORT, "lessons": LESSON_IMPORT, "schedule": SCHEDULE_IMPORT}
+    try:
+        async with AsyncSessionLocal() as db:
+            extra = None
+            if kind == "schedule":
+                user = (await db.execute(select(User).where(User.email == user_email))).scalars().first()
+                if user is None:
+                    raise SystemExit(f"Utilisateur introuvable: {user_email}")
+                extra = {"user_id": user.id, "is_teacher_view": user.role == RoleEnum.TEACHER}
+            report = await import_rows(db, specs[kind], parse_rows(read_file(path), fmt), extra, batch_size)
+        # Effectif avec un cache partagé (Redis); en mémoire, chaque worker expire au TTL
+        if kind == "courses" and report["inserted"]:
+            await response_cache.invalidate(COURSES)
+        return report
+    finally:
+        await dispose_engines()
+
+def main():
+    parser = argparse.ArgumentParser(description="Import en masse (JSON, NDJSON, CSV)")
+    parser.add_argument("kind", choices=["courses", "lessons", "schedule"])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["json", "ndjson", "csv"], help="déduit de l'extension par défaut")
+    parser.add_argument("--user", help="email du propriétaire des événements (schedule)")
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE)
+    args = parser.parse_args()
+    if args.kind == "schedule" and not args.user:
+        parser.error("--user est requis pour importer un planning")
+
+    report = asyncio.run(run_cli(
+        args.kind, args.path, args.format or format_for_path(args.path), args.user, args.batch_size
+    ))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 1 if report["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Vérifie le temps d'import de backend.main (démarrage d'un worker)
+
+Usage: python -m backend.check_import_time [--budget-ms 3500] [--runs 5]
+
+Importe backend.main dans un processus neuf avec `python -X importtime`
+(meilleur de --runs essais, pour lisser le bruit) et échoue (code de sortie 1)
+si un module qui doit rester paresseux est importé au démarrage, ou si le
+temps cumulé dépasse le budget. Affiche les imports les plus coûteux.
+
+Le contrôle des modules paresseux est déterministe. Le budget de temps dépend
+de la machine: il est fixé à environ 2,5 fois la mesure de référence
+(~1,4 s) pour ne signaler qu'une régression nette, pas le bruit des runners CI.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "3500"))
+
+# Modules importés seulement à l'usage (migrations, premier hachage, profilage)
+LAZY_MODULES = ("alembic", "passlib", "redis", "pyinstrument", "cProfile")
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| *(\S+)")
+
+def measure() -> list[tuple[str, int, int]]:
+    """(module, µs propres, µs cumulées) pour chaque import de backend.main"""
+    env = dict(os.environ)
+    # Aucune connexion n'est ouverte à l'import: la base n'a pas besoin d'exister
+    env["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='gde-import-')}/import.db"
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.main"],
+        capture_output=True, text=True, env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if result.returncode != 0:
+        sys.exit(result.stderr)
+    return [
+        (match.group(3), int(match.group(1)), int(match.group(2)))
+        for match in map(IMPORT_LINE.match, result.stderr.splitlines())
+        if match
+    ]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Budget de temps d'import de backend.main")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_TIME_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    measure()  # premier import: compilation des .pyc, non comptée
+    runs = [measure() for _ in range(args.runs)]
+    imports = min(runs, key=lambda modules: dict((m, c) for m, _, c in modules)["backend.main"])
+    total_ms = dict((module, cumulative) for module, _, cumulative in imports)["backend.main"] / 1000
+
+    print(f"{'module':<48}{'propre ms':>12}{'cumulé ms':>12}")
+    for module, own, cumulative in sorted(imports, key=lambda item: -item[2])[:args.top]:
+        print(f"{module:<48}{own / 1000:>12.1f}{cumulative / 1000:>12.1f}")
+
+    failures = []
+    eager = sorted({
+        module for module, _, _ in imports
+        if module.split(".")[0] in LAZY_MODULES
+    })
+    if eager:
+        failures.append(f"modules importés au démarrage: {', '.join(eager)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"backend.main: {total_ms:.0f} ms > budget {args.budget_ms:.0f} ms")
+
+    if failures:
+        print("\n❌ " + "\n❌ ".join(failures))
+        return 1
+    print(f"\n✅ Import de backend.main en {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,481 @@
+"""
+Vérifie le nombre de requêtes SQL de chaque endpoint de lecture et leur plan,
+puis le comportement des chemins d'écriture et de cache
+
+Usage: python -m backend.check_queries
+
+Crée une base SQLite temporaire peuplée par seed_data, appelle chaque endpoint
+et échoue (code de sortie 1) si un endpoint dépasse son budget de requêtes
+ou si une de ses requêtes parcourt une table entière (EXPLAIN QUERY PLAN).
+Les budgets ne dépendent pas du volume de données: un dépassement signale
+un chargement implicite (N+1) réintroduit.
+
+Vérifie ensuite (BEHAVIOUR_CHECKS): rapport d'erreurs des imports en masse
+et limitation des leçons importées aux cours du professeur,
+expansion des séries récurrentes et de leurs exceptions, conflits d'agenda
+(409), réponses conditionnelles (ETag / 304), invalidation du cache de
+réponses, refus du pool bcrypt saturé (503), connexion des comptes
+synthétiques (seed_data --synthetic), accès restreint aux métriques et
+liste des élèves avec une progression NULL.
+"""
+import os
+import re
+import sys
+import tempfile
+
+# Comptes du seed utilisés pour appeler les endpoints authentifiés
+ACCOUNTS = {
+    "student": ("alice@example.com", "eleve123"),
+    "teacher": ("prof.piano@gde-musique.fr", "prof123"),
+    "admin": ("admin@gde-musique.fr", "admin123"),
+}
+
+# Budget maximal de requêtes par endpoint (token déjà en cache après le login)
+QUERY_BUDGETS = {
+    ("student", "GET", "/api/courses/instruments"): 1,
+    ("student", "GET", "/api/courses/"): 1,
+    ("student", "GET", "/api/courses/1"): 1,
+    ("student", "GET", "/api/courses/my-courses"): 1,
+    ("student", "GET", "/api/courses/my-enrollments"): 1,
+    ("student", "GET", "/api/courses/1/lessons"): 2,
+    ("student", "GET", "/api/courses/lessons/1"): 1,
+    ("student", "GET", "/api/auth/me"): 2,
+    ("student", "GET", "/api/marketplace/"): 1,
+    ("student", "GET", "/api/marketplace/?min_price=10&max_price=500&sort=price_asc"): 1,
+    ("student", "GET", "/api/marketplace/?seller_id=1&created_after=2020-01-01T00:00:00Z"): 1,
+    ("student", "GET", "/api/marketplace/?include_sold=true&sort=price_desc"): 1,
+    ("student", "GET", "/api/marketplace/?q=guitare"): 2,
+    ("student", "GET", "/api/marketplace/1"): 1,
+    ("student", "GET", "/api/schedule/"): 1,
+    # Avec une fenêtre: événements simples + séries récurrentes (avec leurs exceptions)
+    ("student", "GET", "/api/schedule/week"): 2,
+    ("student", "GET", "/api/schedule/upcoming"): 2,
+    ("student", "GET", "/api/schedule/?from=2026-01-01&to=2026-02-01"): 2,
+    ("student", "GET", "/api/schedule/free-busy?from=2026-01-01&to=2026-02-01"): 2,
+    # Élève 4 (alice) inscrite à un cours du professeur: vérification d'accès + plages occupées
+    ("teacher", "GET", "/api/schedule/free-busy?from=2026-01-01&to=2026-02-01&user_id=4"): 3,
+    ("teacher", "GET", "/api/schedule/students"): 1,
+    ("student", "GET", "/api/search/?q=guit"): 1,
+}
+
+LOGIN_BUDGET = 2
+
+# Catalogues listés sans filtre: le parcours complet (borné par LIMIT) est attendu
+FULL_SCAN_ALLOWED = {
+    "/api/courses/instruments": {"instruments"},
+    "/api/courses/": {"courses"},
+}
+
+# "SCAN table" sans index; "SCAN table USING INDEX ..." reste accepté
+TABLE_SCAN = re.compile(r"^SCAN (\w+)$")
+
+def unindexed_scans(engine, queries) -> set:
+    """Tables parcourues sans index par les requêtes capturées"""
+    scanned = set()
+    with engine.connect() as connection:
+        for statement, parameters in queries:
+            plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            for row in plan:
+                match = TABLE_SCAN.match(row[-1])
+                if match:
+                    scanned.add(match.group(1))
+    return scanned
+
+class Checker:
+    """Accumule les écarts d'un contrôle de comportement"""
+
+    def __init__(self, client, headers: dict):
+        self.client = client
+        self.headers = headers
+        self.failures: list[str] = []
+
+    def expect(self, condition: bool, message: str, response=None):
+        if not condition:
+            if response is not None:
+                message = f"{message} (HTTP {response.status_code}: {response.text[:300]})"
+            self.failures.append(message)
+
+def check_bulk_import(check: Checker):
+    """Chaque ligne rejetée est rapportée avec son numéro, les autres sont insérées"""
+    response = check.client.post(
+        "/api/courses/bulk",
+        headers=check.headers["admin"],
+        json=[{"title": "Import 1", "instrument_id": 1}, {"title": "Import 2", "instrument_id": 999},
+              {"instrument_id": 1}, 5],
+    )
+    report = response.json()
+    check.expect(response.status_code == 200, "POST /api/courses/bulk n'a pas répondu 200", response)
+    check.expect(
+        (report.get("received"), report.get("inserted"), report.get("failed")) == (4, 1, 3),
+        f"import JSON: reçu/inséré/rejeté attendu 4/1/3, obtenu {report}",
+    )
+    check.expect(
+        [error["row"] for error in report.get("errors", [])] == [2, 3, 4],
+        f"import JSON: lignes en erreur attendues [2, 3, 4], obtenu {report.get('errors')}",
+    )
+
+    body = (
+        "title,start_time,end_time\n"
+        "Import CSV,2030-01-07T10:00:00Z,2030-01-07T11:00:00Z\n"
+        "Import CSV,pas-une-date,2030-01-07T11:00:00Z\n"
+    )
+    response = check.client.post(
+        "/api/schedule/bulk",
+        headers={**check.headers["student"], "Content-Type": "text/csv"},
+        content=body.encode(),
+    )
+    report = response.json()
+    check.expect(
+        response.status_code == 200 and report.get("inserted") == 1
+        and [error["row"] for error in report.get("errors", [])] == [2],
+        f"import CSV: ligne 2 rejetée attendue, obtenu {report}",
+    )
+
+def check_bulk_lessons_ownership(check: Checker):
+    """Un professeur n'importe des leçons que dans ses cours; un administrateur dans tous"""
+    from backend.database import engine
+
+    teacher_id = check.client.get("/api/auth/me", headers=check.headers["teacher"]).json()["id"]
+    with engine.connect() as connection:
+        taught = set(connection.exec_driver_sql(
+            "SELECT course_id FROM teacher_courses WHERE teacher_id = ?", (teacher_id,)
+        ).scalars())
+        other = connection.exec_driver_sql(
+            "SELECT id FROM courses WHERE id NOT IN (SELECT course_id FROM teacher_courses WHERE teacher_id = ?)",
+            (teacher_id,),
+        ).scalar()
+    check.expect(bool(taught) and other is not None, "seed: un cours enseigné et un autre attendus")
+    if not taught or other is None:
+        return
+    rows = [{"course_id": min(taught), "title": "Import enseigné", "order": 1},
+            {"course_id": other, "title": "Import d'un autre cours", "order": 1}]
+
+    response = check.client.post("/api/courses/lessons/bulk", headers=check.headers["teacher"], json=rows)
+    report = response.json()
+    check.expect(
+        response.status_code == 200 and report.get("inserted") == 1
+        and [error["row"] for error in report.get("errors", [])] == [2],
+        f"import de leçons (professeur): ligne 2 (cours non enseigné) rejetée attendue, obtenu {report}",
+    )
+    response = check.client.post("/api/courses/lessons/bulk", headers=check.headers["admin"], json=rows)
+    report = response.json()
+    check.expect(
+        response.status_code == 200 and report.get("inserted") == 2,
+        f"import de leçons (administrateur): deux lignes insérées attendues, obtenu {report}",
+    )
+
+def occurrence_starts(check: Checker, account: str, window: str) -> list:
+    response = check.client.get(f"/api/schedule/?{window}", headers=check.headers[account])
+    check.expect(response.status_code == 200, f"GET /api/schedule/?{window} n'a pas répondu 200", response)
+    return [(item["title"], item["start_time"][:16]) for item in response.json().get("items", [])]
+
+def check_recurrence(check: Checker):
+    """Occurrences d'une série hebdomadaire (passage à l'heure d'été), déplacée puis annulée"""
+    response = check.client.post("/api/schedule/", headers=check.headers["student"], json={
+        "title": "Série", "start_time": "2030-03-21T18:00:00+01:00", "end_time": "2030-03-21T19:00:00+01:00",
+        "recurrence": {"freq": "weekly", "by_day": ["MO", "TH"], "until": "2030-04-30T00:00:00Z",
+                       "timezone": "Europe/Paris"},
+    })
+    check.expect(response.status_code == 201, "création de la série refusée", response)
+    series_id = response.json().get("id")
+
+    window = "from=2030-03-27&to=2030-04-06"
+    # 18h à Paris: 17h UTC avant le 31 mars, 16h UTC après
+    expected = [("Série", "2030-03-28T17:00"), ("Série", "2030-04-01T16:00"), ("Série", "2030-04-04T16:00")]
+    starts = occurrence_starts(check, "student", window)
+    check.expect(starts == expected, f"expansion de la série: attendu {expected}, obtenu {starts}")
+
+    response = check.client.put(
+        f"/api/schedule/{series_id}/occurrences/2030-04-01T16:00:00Z", headers=check.headers["student"],
+        json={"title": "Série déplacée", "start_time": "2030-04-02T17:00:00+02:00",
+              "end_time": "2030-04-02T18:00:00+02:00"},
+    )
+    check.expect(response.status_code == 200, "déplacement d'une occurrence refusé", response)
+    response = check.client.delete(
+        f"/api/schedule/{series_id}/occurrences/2030-04-04T16:00:00Z", headers=check.headers["student"]
+    )
+    check.expect(response.status_code == 204, "annulation d'une occurrence refusée", response)
+
+    expected = [("Série", "2030-03-28T17:00"), ("Série déplacée", "2030-04-02T15:00")]
+    starts = occurrence_starts(check, "student", window)
+    check.expect(starts == expected, f"exceptions de la série: attendu {expected}, obtenu {starts}")
+
+    # Dernière occurrence déplacée après la fin de la série: toujours listée
+    response = check.client.post("/api/schedule/", headers=check.headers["student"], json={
+        "title": "Série courte", "start_time": "2031-01-06T10:00:00Z", "end_time": "2031-01-06T11:00:00Z",
+        "recurrence": {"freq": "weekly", "until": "2031-01-21T00:00:00Z", "timezone": "UTC"},
+    })
+    check.expect(response.status_code == 201, "création de la série courte refusée", response)
+    response = check.client.put(
+        f"/api/schedule/{response.json().get('id')}/occurrences/2031-01-20T10:00:00Z",
+        headers=check.headers["student"],
+        json={"start_time": "2031-02-10T10:00:00Z", "end_time": "2031-02-10T11:00:00Z"},
+    )
+    check.expect(response.status_code == 200, "report de la dernière occurrence refusé", response)
+    expected = [("Série courte", "2031-02-10T10:00")]
+    starts = occurrence_starts(check, "student", "from=2031-02-01&to=2031-03-01")
+    check.expect(starts == expected, f"occurrence reportée après la série: attendu {expected}, obtenu {starts}")
+
+def conflict_count(response) -> int:
+    detail = response.json().get("detail")
+    return len(detail.get("conflicts", [])) if isinstance(detail, dict) else 0
+
+def check_conflicts(check: Checker):
+    """Les créations qui chevauchent l'agenda (série comprise) sont refusées en 409"""
+    teacher = check.headers["teacher"]
+    response = check.client.post("/api/schedule/", headers=teacher, json={
+        "title": "Réunion", "start_time": "2030-06-05T10:00:00Z", "end_time": "2030-06-05T11:00:00Z",
+    })
+    check.expect(response.status_code == 201, "création de la réunion refusée", response)
+
+    response = check.client.post("/api/schedule/", headers=teacher, json={
+        "title": "Chevauchement", "start_time": "2030-06-05T10:30:00Z", "end_time": "2030-06-05T11:30:00Z",
+    })
+    check.expect(
+        response.status_code == 409 and conflict_count(response) == 1,
+        "un événement chevauchant la réunion doit être refusé (409, un conflit)", response,
+    )
+
+    # Occurrences des séries de check_recurrence: prévue (28 mars) et reportée après la série (10 février)
+    for start, end in (("2030-03-28T17:30:00Z", "2030-03-28T18:30:00Z"),
+                       ("2031-02-10T10:30:00Z", "2031-02-10T11:30:00Z")):
+        response = check.client.post("/api/schedule/", headers=check.headers["student"], json={
+            "title": "Chevauchement", "start_time": start, "end_time": end,
+        })
+        check.expect(
+            response.status_code == 409 and conflict_count(response) == 1,
+            f"un événement chevauchant une occurrence de série ({start}) doit être refusé (409, un conflit)",
+            response,
+        )
+
+    response = check.client.post("/api/schedule/bulk", headers=teacher, json=[
+        {"title": "Import 1", "start_time": "2030-06-05T10:15:00Z", "end_time": "2030-06-05T10:45:00Z"},
+        {"title": "Import 2", "start_time": "2030-06-06T10:00:00Z", "end_time": "2030-06-06T11:00:00Z"},
+        {"title": "Import 3", "start_time": "2030-06-06T10:30:00Z", "end_time": "2030-06-06T11:30:00Z"},
+    ])
+    report = response.json()
+    check.expect(
+        response.status_code == 200 and report.get("inserted") == 1
+        and [error["row"] for error in report.get("errors", [])] == [1, 3],
+        f"import en conflit: lignes 1 (agenda) et 3 (ligne 2 du lot) rejetées attendues, obtenu {report}",
+    )
+
+def check_conditional(check: Checker):
+    """ETag et Last-Modified renvoient 304 quand la ressource n'a pas changé"""
+    for path in ("/api/courses/1", "/api/courses/", "/api/marketplace/1"):
+        response = check.client.get(path)
+        etag = response.headers.get("etag")
+        check.expect(response.status_code == 200 and etag is not None, f"GET {path}: ETag absent", response)
+        if etag is None:
+            continue
+        revalidated = check.client.get(path, headers={"If-None-Match": etag})
+        check.expect(revalidated.status_code == 304, f"GET {path} avec If-None-Match: 304 attendu", revalidated)
+        stale = check.client.get(path, headers={"If-None-Match": '"perime"'})
+        check.expect(stale.status_code == 200, f"GET {path} avec un ETag périmé: 200 attendu", stale)
+
+    response = check.client.get("/api/courses/1")
+    last_modified = response.headers.get("last-modified")
+    check.expect(last_modified is not None, "GET /api/courses/1: Last-Modified absent", response)
+    if last_modified:
+        revalidated = check.client.get("/api/courses/1", headers={"If-Modified-Since": last_modified})
+        check.expect(revalidated.status_code == 304, "GET /api/courses/1 avec If-Modified-Since: 304 attendu",
+                     revalidated)
+
+def check_cache_invalidation(check: Checker):
+    """Une écriture invalide le catalogue: la lecture suivante est recalculée"""
+    from backend.response_cache import MemoryBackend, response_cache
+
+    path = "/api/courses/?limit=200"
+    disabled, response_cache.backend = response_cache.backend, MemoryBackend(256)
+    try:
+        statuses = [check.client.get(path).headers.get("x-cache") for _ in range(2)]
+        check.expect(statuses == ["MISS", "HIT"], f"GET {path}: MISS puis HIT attendus, obtenu {statuses}")
+
+        response = check.client.post("/api/courses/", headers=check.headers["admin"],
+                                     json={"title": "Cours ajouté", "instrument_id": 1})
+        check.expect(response.status_code == 201, "création du cours refusée", response)
+
+        response = check.client.get(path)
+        titles = [course["title"] for course in response.json().get("items", [])]
+        check.expect(
+            response.headers.get("x-cache") == "MISS" and "Cours ajouté" in titles,
+            f"GET {path} après écriture: MISS avec le nouveau cours attendu, obtenu {response.headers.get('x-cache')}",
+        )
+    finally:
+        response_cache.backend = disabled
+
+def check_hashing_back_pressure(check: Checker):
+    """Pool bcrypt saturé: le login répond 503 avec Retry-After au lieu d'attendre"""
+    from backend.hashing import PasswordHasher
+    from backend.routers import auth
+
+    # Pool sans capacité: toute demande de hachage est refusée
+    saturated = PasswordHasher(pool_size=0, max_queue=0, retry_after=7)
+    available, auth.password_hasher = auth.password_hasher, saturated
+    try:
+        email, password = ACCOUNTS["student"]
+        response = check.client.post("/api/auth/login", data={"username": email, "password": password})
+    finally:
+        auth.password_hasher = available
+    check.expect(
+        response.status_code == 503 and response.headers.get("retry-after") == "7",
+        "login avec le pool bcrypt saturé: 503 avec Retry-After: 7 attendu", response,
+    )
+    check.expect(saturated.stats()["rejected"] == 1, "le refus du pool bcrypt n'est pas compté")
+
+def check_synthetic_accounts(check: Checker):
+    """Les comptes du mode test de charge (seed_data --synthetic) peuvent se connecter"""
+    from backend.seed_data import SYNTHETIC_PASSWORD, SYNTHETIC_TEACHER_EVERY, synthetic_email
+
+    for number, paths in ((1, ("/api/auth/me",)),
+                          (SYNTHETIC_TEACHER_EVERY, ("/api/auth/me", "/api/schedule/students"))):
+        email = synthetic_email(number)
+        response = check.client.post("/api/auth/login", data={"username": email, "password": SYNTHETIC_PASSWORD})
+        check.expect(response.status_code == 200, f"login du compte synthétique {email} refusé", response)
+        if response.status_code != 200:
+            continue
+        account_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        for path in paths:
+            response = check.client.get(path, headers=account_headers)
+            check.expect(response.status_code == 200, f"GET {path} ({email}) n'a pas répondu 200", response)
+
+def check_metrics_access(check: Checker):
+    """Métriques absentes du schéma OpenAPI et refusées sans METRICS_TOKEN"""
+    from backend import metrics
+
+    paths = check.client.get("/openapi.json").json().get("paths", {})
+    check.expect(not any(path.startswith("/metrics") for path in paths), "/metrics présent dans le schéma OpenAPI")
+
+    configured, metrics.METRICS_TOKEN = metrics.METRICS_TOKEN, "jeton-de-controle"
+    try:
+        for path in ("/metrics", "/metrics/summary"):
+            # Sans jeton configuré, le client de test n'est pas un client local
+            metrics.METRICS_TOKEN = ""
+            response = check.client.get(path)
+            check.expect(response.status_code == 403, f"GET {path} distant sans METRICS_TOKEN: 403 attendu", response)
+            metrics.METRICS_TOKEN = "jeton-de-controle"
+            response = check.client.get(path, headers={"Authorization": "Bearer mauvais"})
+            check.expect(response.status_code == 401, f"GET {path} avec un mauvais jeton: 401 attendu", response)
+            response = check.client.get(path, headers={"Authorization": "Bearer jeton-de-controle"})
+            check.expect(response.status_code == 200, f"GET {path} avec le jeton: 200 attendu", response)
+    finally:
+        metrics.METRICS_TOKEN = configured
+
+def check_teacher_roster(check: Checker):
+    """Une progression NULL compte comme 0: la liste des élèves et son curseur restent valides"""
+    from backend.database import engine
+
+    path = "/api/schedule/students"
+    response = check.client.get(f"{path}?limit=200", headers=check.headers["teacher"])
+    enrollment_ids = sorted(student["enrollment_id"] for student in response.json().get("items", []))
+    check.expect(response.status_code == 200 and len(enrollment_ids) > 2, f"GET {path}: élèves attendus", response)
+    if not enrollment_ids:
+        return
+    with engine.begin() as connection:
+        connection.exec_driver_sql("UPDATE enrollments SET progress = NULL WHERE id = ?", (enrollment_ids[0],))
+
+    for sort in ("progress_asc", "progress_desc"):
+        seen, cursor = [], None
+        while True:
+            query = f"?sort={sort}&limit=2" + (f"&cursor={cursor}" if cursor else "")
+            response = check.client.get(path + query, headers=check.headers["teacher"])
+            check.expect(response.status_code == 200, f"GET {path}{query} avec une progression NULL", response)
+            if response.status_code != 200:
+                break
+            page = response.json()
+            seen += [(student["enrollment_id"], student["progress"]) for student in page["items"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        check.expect(
+            sorted(enrollment_id for enrollment_id, _ in seen) == enrollment_ids
+            and (enrollment_ids[0], 0) in seen,
+            f"GET {path}?sort={sort}: toutes les inscriptions paginées, progression NULL renvoyée à 0 attendu",
+        )
+
+# Dans l'ordre: check_conflicts utilise la série créée par check_recurrence
+BEHAVIOUR_CHECKS = (
+    ("import en masse", check_bulk_import),
+    ("import de leçons par propriétaire", check_bulk_lessons_ownership),
+    ("séries récurrentes", check_recurrence),
+    ("conflits d'agenda", check_conflicts),
+    ("réponses conditionnelles", check_conditional),
+    ("invalidation du cache", check_cache_invalidation),
+    ("back-pressure bcrypt", check_hashing_back_pressure),
+    ("comptes synthétiques", check_synthetic_accounts),
+    ("accès aux métriques", check_metrics_access),
+    ("élèves du professeur", check_teacher_roster),
+)
+
+def main() -> int:
+    tmp_dir = tempfile.mkdtemp(prefix="gde-queries-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_dir}/queries.db"
+    # Sans cache de réponses: le préchauffage le remplirait et les endpoints
+    # servis depuis le cache n'exécuteraient aucune requête
+    os.environ["RESPONSE_CACHE_URL"] = "none://"
+
+    # Imports après la configuration de DATABASE_URL
+    from fastapi.testclient import TestClient
+    from backend.database import engine
+    from backend.instrumentation import QueryCounter
+    from backend.main import app
+    from backend.seed_data import SYNTHETIC_TEACHER_EVERY, seed_synthetic
+
+    # Données de démonstration et quelques comptes synthétiques (dont un professeur)
+    seed_synthetic(users=SYNTHETIC_TEACHER_EVERY, schedule_items=SYNTHETIC_TEACHER_EVERY, marketplace_items=0,
+                   batch_size=SYNTHETIC_TEACHER_EVERY, seed=42)
+    failures = []
+    scan_failures = []
+
+    with TestClient(app) as client:
+        headers = {}
+        for account, (email, password) in ACCOUNTS.items():
+            with QueryCounter() as counter:
+                response = client.post(
+                    "/api/auth/login",
+                    data={"username": email, "password": password},
+                )
+            response.raise_for_status()
+            print(f"POST /api/auth/login ({account}): {counter.count}/{LOGIN_BUDGET}")
+            if counter.count > LOGIN_BUDGET:
+                failures.append(("POST", "/api/auth/login", counter))
+            headers[account] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        for (account, method, path), budget in QUERY_BUDGETS.items():
+            with QueryCounter() as counter:
+                response = client.request(method, path, headers=headers[account])
+            response.raise_for_status()
+            print(f"{method} {path} ({account}): {counter.count}/{budget}")
+            if counter.count > budget:
+                failures.append((method, path, counter))
+
+            scanned = unindexed_scans(engine, counter.queries) - FULL_SCAN_ALLOWED.get(path, set())
+            if scanned:
+                scan_failures.append((method, path, scanned))
+
+        behaviour_failures = []
+        for name, check_behaviour in BEHAVIOUR_CHECKS:
+            check = Checker(client, headers)
+            check_behaviour(check)
+            print(f"{name}: {'ok' if not check.failures else 'ÉCHEC'}")
+            behaviour_failures.extend((name, failure) for failure in check.failures)
+
+    for method, path, counter in failures:
+        print(f"\n❌ {method} {path} a exécuté {counter.count} requêtes:")
+        for statement in counter.statements:
+            print("   ", " ".join(statement.split()))
+
+    for method, path, scanned in scan_failures:
+        print(f"\n❌ {method} {path} parcourt sans index: {', '.join(sorted(scanned))}")
+
+    for name, failure in behaviour_failures:
+        print(f"\n❌ {name}: {failure}")
+
+    if failures or scan_failures or behaviour_failures:
+        return 1
+    print("\n✅ Tous les endpoints respectent leur budget de requêtes et utilisent un index, "
+          "les comportements vérifiés sont conformes")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Requêtes GET conditionnelles (ETag / Last-Modified → 304 Not Modified)
+
+Les routeurs créés avec `APIRouter(route_class=ConditionalGetRoute)` ajoutent
+à leurs réponses GET 200:
+    ETag           empreinte forte du corps JSON sérialisé
+    Last-Modified  max(created_at, updated_at) pour une ressource unique;
+                   absent des listes, où une suppression ne ferait pas
+                   reculer la date et rendrait If-Modified-Since faux
+    Cache-Control  politique de la route (CACHE_CONTROL_POLICIES)
+
+If-None-Match est prioritaire sur If-Modified-Since (RFC 9110, 13.2.2).
+Seules les routes dont le `response_model` est une ressource datée sont
+relues pour Last-Modified: les listes (pages, réponses du cache) ne sont
+jamais désérialisées.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Optional
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+# Politique par route (chemin complet tel que déclaré); les réponses liées
+# à l'utilisateur restent privées et sont revalidées à chaque affichage
+CACHE_CONTROL_POLICIES = {
+    "/api/courses/instruments": "public, max-age=300",
+    "/api/courses/": "public, max-age=60",
+    "/api/courses/{course_id}": "public, max-age=60",
+    "/api/courses/my-courses": "private, no-cache",
+    "/api/courses/my-enrollments": "private, no-cache",
+    "/api/courses/{course_id}/lessons": "private, no-cache",
+    "/api/courses/lessons/{lesson_id}": "private, no-cache",
+    "/api/marketplace/": "public, max-age=30",
+    "/api/marketplace/{item_id}": "public, max-age=30",
+    # Les leçons ne sont cherchées que pour un utilisateur authentifié
+    "/api/search/": "private, no-cache",
+}
+# Surcharges au déploiement, ex: {"/api/courses/": "public, max-age=600"}
+CACHE_CONTROL_POLICIES.update(json.loads(os.getenv("CACHE_CONTROL_POLICIES", "{}")))
+DEFAULT_CACHE_CONTROL = os.getenv("DEFAULT_CACHE_CONTROL", "no-cache")
+
+TIMESTAMP_FIELDS = ("created_at", "updated_at")
+
+def compute_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparaison faible (W/ ignoré), comme l'impose If-None-Match"""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def is_dated_resource(response_model) -> bool:
+    """Ressource unique portant created_at/updated_at (pas une liste ni une page)"""
+    return (
+        isinstance(response_model, type)
+        and issubclass(response_model, BaseModel)
+        and "items" not in response_model.model_fields
+        and any(field in response_model.model_fields for field in TIMESTAMP_FIELDS)
+    )
+
+def last_modified_of(body: bytes) -> Optional[datetime]:
+    """Date de dernière modification d'une ressource unique (corps JSON d'un objet daté)"""
+    if not body.startswith(b"{"):
+        return None
+    payload = json.loads(body)
+    timestamps = [
+        datetime.fromisoformat(payload[field])
+        for field in TIMESTAMP_FIELDS
+        if payload.get(field)
+    ]
+    if not timestamps:
+        return None
+    # SQLite renvoie des dates naïves (CURRENT_TIMESTAMP est en UTC)
+    latest = max(value if value.tzinfo else value.replace(tzinfo=timezone.utc) for value in timestamps)
+    return latest.replace(microsecond=0)
+
+def not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+class ConditionalGetRoute(APIRoute):
+    """Route FastAPI ajoutant les validateurs et répondant 304 si le client est à jour"""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        cache_control = CACHE_CONTROL_POLICIES.get(self.path, DEFAULT_CACHE_CONTROL)
+        dated = is_dated_resource(self.response_model)
+
+        async def conditional_handler(request: Request) -> Response:
+            response = await handler(request)
+            if request.method not in ("GET", "HEAD") or response.status_code != 200:
+                return response
+
+            etag = compute_etag(response.body)
+            last_modified = last_modified_of(response.body) if dated else None
+            headers = {"ETag": etag, "Cache-Control": cache_control}
+            if last_modified is not None:
+                headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+            if not_modified(request, etag, last_modified):
+                return Response(status_code=304, headers=headers)
+            response.headers.update(headers)
+            return response
+
+        return conditional_handler
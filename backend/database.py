@@ -1,27 +1,172 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+import itertools
 import os
 
 # URL de la base de données
 # Railway et Heroku utilisent postgres:// mais SQLAlchemy 1.4+ nécessite postgresql://
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./gde_music.db")
+def normalize_url(url: str) -> str:
+    # Fix pour Railway/Heroku: remplacer postgres:// par postgresql://
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql://", 1)
+    return url
 
-# Fix pour Railway/Heroku: remplacer postgres:// par postgresql://
-if DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+DATABASE_URL = normalize_url(os.getenv("DATABASE_URL", "sqlite:///./gde_music.db"))
+
+# Réplicas en lecture (optionnel): une ou plusieurs URL séparées par des virgules
+DATABASE_READ_URLS = [
+    normalize_url(url.strip())
+    for url in os.getenv("DATABASE_READ_URL", "").split(",")
+    if url.strip()
+]
 
 SQLALCHEMY_DATABASE_URL = DATABASE_URL
 
+def to_async_url(url: str) -> str:
+    """Convertit une URL synchrone en URL utilisant un driver asynchrone (aiosqlite / asyncpg)"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql+psycopg2:"):
+        return url.replace("postgresql+psycopg2:", "postgresql+asyncpg:", 1)
+    if url.startswith("postgresql:"):
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    return url
+
+ASYNC_DATABASE_URL = to_async_url(SQLALCHEMY_DATABASE_URL)
+
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+IS_SQLITE_MEMORY = IS_SQLITE and (":memory:" in SQLALCHEMY_DATABASE_URL or SQLALCHEMY_DATABASE_URL.rstrip("/") == "sqlite:")
+
+def env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+# Configuration du pool de connexions (par worker)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # secondes, -1 pour désactiver
+DB_POOL_PRE_PING = env_bool("DB_POOL_PRE_PING", True)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))  # 0 pour désactiver
+
+# Pragmas SQLite (mode local): WAL permet des lectures concurrentes à une écriture
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+    "temp_store": "MEMORY",
+}
+
+def async_engine_options() -> dict:
+    options = {}
+    if IS_SQLITE_MEMORY:
+        return options
+    if IS_SQLITE:
+        # aiosqlite utilise NullPool par défaut: on garde les connexions ouvertes
+        options["poolclass"] = AsyncAdaptedQueuePool
+    else:
+        options["connect_args"] = (
+            {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+            if DB_STATEMENT_TIMEOUT_MS else {}
+        )
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    return options
+
+def sync_engine_options() -> dict:
+    if IS_SQLITE:
+        return {"connect_args": {"check_same_thread": False}}
+    # Le moteur synchrone ne sert qu'aux migrations et au seed: pas de connexions gardées
+    options = {"poolclass": NullPool}
+    if DB_STATEMENT_TIMEOUT_MS:
+        options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
 # Créer le moteur de base de données
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_URL else {}
-)
+# Le moteur synchrone reste utilisé pour la création des tables et le seed
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **sync_engine_options())
+
+# Moteur asynchrone utilisé par les routeurs (ne bloque pas la boucle d'événements)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **async_engine_options())
+
+# Moteurs des réplicas (même configuration de pool que le primaire)
+replica_engines = [
+    create_async_engine(to_async_url(url), **async_engine_options())
+    for url in DATABASE_READ_URLS
+]
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+if IS_SQLITE and not IS_SQLITE_MEMORY:
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    for async_db_engine in (async_engine, *replica_engines):
+        event.listen(async_db_engine.sync_engine, "connect", set_sqlite_pragmas)
+
+def engine_pool_stats(db_engine) -> dict:
+    pool = db_engine.sync_engine.pool
+    stats = {"pool_class": type(pool).__name__}
+    if hasattr(pool, "checkedout"):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=DB_MAX_OVERFLOW,
+        )
+    return stats
+
+def pool_stats() -> dict:
+    """Connexions du pool asynchrone: utilisées, disponibles et en débordement"""
+    stats = engine_pool_stats(async_engine)
+    if replica_engines:
+        stats["replicas"] = [engine_pool_stats(replica) for replica in replica_engines]
+    return stats
+
+async def dispose_engines():
+    """Ferme les connexions gardées par les pools (arrêt du worker)"""
+    for async_db_engine in (async_engine, *replica_engines):
+        await async_db_engine.dispose()
 
 # Créer une session locale
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Sessions asynchrones: expire_on_commit=False pour pouvoir sérialiser
+# les objets après commit sans déclencher de chargement implicite
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+ReplicaSessionLocals = [
+    async_sessionmaker(
+        bind=replica,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+    for replica in replica_engines
+]
+
+# Répartition des lectures entre réplicas (round-robin)
+_replica_sessions = itertools.cycle(ReplicaSessionLocals) if ReplicaSessionLocals else None
+
+def next_replica_session():
+    """Fabrique de session du prochain réplica, ou None si aucun n'est configuré"""
+    return next(_replica_sessions) if _replica_sessions is not None else None
+
 # Base pour les modèles
 Base = declarative_base()
 
@@ -32,3 +177,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dépendance pour obtenir une session asynchrone
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,130 @@
+"""
+Hachage des mots de passe (bcrypt) dans un pool de threads borné
+
+bcrypt coûte ~250 ms de CPU par appel: exécuté directement dans un handler
+`async def`, il bloque toute la boucle d'événements. Le pool limite le nombre
+de hachages simultanés et refuse les demandes au-delà d'une file d'attente
+maximale (back-pressure) au lieu d'accumuler de la latence.
+"""
+import asyncio
+import os
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    """Contexte passlib, importé au premier hachage (passlib + bcrypt ~25 ms à l'import)"""
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+BCRYPT_POOL_SIZE = int(os.getenv("BCRYPT_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+BCRYPT_MAX_QUEUE = int(os.getenv("BCRYPT_MAX_QUEUE", "32"))
+BCRYPT_RETRY_AFTER = int(os.getenv("BCRYPT_RETRY_AFTER", "1"))
+
+# Bornes (en secondes) de l'histogramme de latence
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class PoolSaturatedError(Exception):
+    """Levée quand la file d'attente du pool de hachage est pleine"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Password hashing pool saturated")
+        self.retry_after = retry_after
+
+class PasswordHasher:
+    def __init__(self, pool_size: int, max_queue: int, retry_after: int):
+        self.pool_size = pool_size
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._latency_sum = 0.0
+        self._latency_max = 0.0
+        self._wait_sum = 0.0
+        self._buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.pool_size, thread_name_prefix="bcrypt"
+            )
+        return self._executor
+
+    def _acquire(self):
+        with self._lock:
+            if self._pending >= self.pool_size + self.max_queue:
+                self._rejected += 1
+                raise PoolSaturatedError(self.retry_after)
+            self._pending += 1
+
+    def _timed(self, func, submitted_at: float, *args):
+        started = time.perf_counter()
+        with self._lock:
+            self._running += 1
+            self._wait_sum += started - submitted_at
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._running -= 1
+                self._pending -= 1
+                self._completed += 1
+                self._latency_sum += elapsed
+                self._latency_max = max(self._latency_max, elapsed)
+                self._buckets[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+
+    async def _run(self, func, *args):
+        self._acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(
+                self._get_executor(), self._timed, func, time.perf_counter(), *args
+            )
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        return await future
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_pwd_context().hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(get_pwd_context().verify, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        """Occupation du pool et latence des hachages"""
+        with self._lock:
+            cumulative = {}
+            total = 0
+            for bound, count in zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], self._buckets):
+                total += count
+                cumulative[bound] = total
+            return {
+                "pool_size": self.pool_size,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "latency_seconds_sum": self._latency_sum,
+                "latency_seconds_max": self._latency_max,
+                "wait_seconds_sum": self._wait_sum,
+                "latency_buckets": cumulative,
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+password_hasher = PasswordHasher(BCRYPT_POOL_SIZE, BCRYPT_MAX_QUEUE, BCRYPT_RETRY_AFTER)
@@ -1,33 +1,89 @@
 """
-Healthcheck endpoint pour Docker
+Sondes de vivacité (/health) et de disponibilité (/readiness)
+
+/health ne touche à aucune dépendance: il répond tant que la boucle
+d'événements tourne. /readiness vérifie la base avec un `SELECT 1` sur une
+connexion du pool, borné par READINESS_TIMEOUT; le résultat est gardé
+READINESS_CACHE_SECONDS et les sondes simultanées partagent la même
+vérification, si bien qu'un orchestrateur qui sonde très souvent n'ajoute
+ni connexion ni charge. Quand le pool est épuisé, ou que le worker se
+vide avant de s'arrêter (SIGTERM), la sonde échoue sans attendre de
+connexion.
 """
-from fastapi import status
+import asyncio
+import os
+import time
+from typing import Optional
+
+from fastapi import APIRouter, status
+from fastapi.responses import ORJSONResponse
+
+from backend.database import async_engine, engine_pool_stats
+from backend.worker import worker_state
+
+READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT", "2"))
+READINESS_CACHE_SECONDS = float(os.getenv("READINESS_CACHE_SECONDS", "1"))
+
+API_VERSION = "2.0.0"
+
+router = APIRouter()
+
+class DatabaseProbe:
+    def __init__(self, db_engine, timeout: float, cache_seconds: float):
+        self.engine = db_engine
+        self.timeout = timeout
+        self.cache_seconds = cache_seconds
+        self._result: Optional[dict] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
 
-@app.get("/health", status_code=status.HTTP_200_OK, tags=["health"])
+    def _pool_exhausted(self) -> bool:
+        stats = engine_pool_stats(self.engine)
+        if "size" not in stats:
+            return False  # NullPool / StaticPool (SQLite)
+        return stats["checked_out"] >= stats["size"] + stats["max_overflow"]
+
+    async def _select_one(self):
+        async with self.engine.connect() as connection:
+            await connection.exec_driver_sql("SELECT 1")
+
+    async def _run(self) -> dict:
+        if self._pool_exhausted():
+            return {"status": "unavailable", "error": "Connection pool exhausted"}
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._select_one(), self.timeout)
+        except asyncio.TimeoutError:
+            return {"status": "unavailable", "error": f"No response within {self.timeout}s"}
+        except Exception as exc:
+            return {"status": "unavailable", "error": str(exc)}
+        return {"status": "connected", "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+    async def check(self) -> dict:
+        if time.monotonic() - self._checked_at < self.cache_seconds:
+            return self._result
+        async with self._lock:
+            # Une autre sonde a pu rafraîchir le résultat pendant l'attente
+            if time.monotonic() - self._checked_at >= self.cache_seconds:
+                self._result = await self._run()
+                self._checked_at = time.monotonic()
+        return self._result
+
+database_probe = DatabaseProbe(async_engine, READINESS_TIMEOUT, READINESS_CACHE_SECONDS)
+
+@router.get("/health")
 async def health_check():
-    """Vérifier l'état de santé de l'application"""
-    return {
-        "status": "healthy",
-        "service": "GDE Music Platform API",
-        "version": "1.0.0"
-    }
-
-@app.get("/readiness", status_code=status.HTTP_200_OK, tags=["health"])
+    """Vivacité: le processus répond"""
+    return {"status": "healthy", "version": API_VERSION}
+
+@router.get("/readiness")
 async def readiness_check():
-    """Vérifier si l'application est prête à recevoir du trafic"""
-    try:
-        # Vérifier la connexion à la base de données
-        from backend.database import SessionLocal
-        db = SessionLocal()
-        db.execute("SELECT 1")
-        db.close()
-        return {
-            "status": "ready",
-            "database": "connected"
-        }
-    except Exception as e:
-        return {
-            "status": "not_ready",
-            "database": "disconnected",
-            "error": str(e)
-        }
+    """Disponibilité: la base répond et le pool a des connexions libres"""
+    if worker_state.draining:
+        return ORJSONResponse({"status": "draining"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    database = await database_probe.check()
+    ready = database["status"] == "connected"
+    return ORJSONResponse(
+        {"status": "ready" if ready else "not_ready", "database": database},
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
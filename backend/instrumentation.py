@@ -0,0 +1,105 @@
+"""
+Instrumentation des requêtes SQL générées par les routeurs
+
+- QueryCounter: compte les requêtes exécutées dans un bloc (check_queries,
+  benchmarks)
+- par requête HTTP: nombre de requêtes, temps en base et temps de
+  sérialisation, accumulés dans `current_request` par les événements
+  before/after_cursor_execute (lus par les métriques et Server-Timing)
+- journal des requêtes lentes (au-delà de SLOW_QUERY_MS) avec la route
+  d'origine
+"""
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from backend.database import async_engine, env_bool, replica_engines
+
+# 0 pour désactiver le journal des requêtes lentes
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_MAX_LENGTH = 2000
+# En-tête Server-Timing (temps base / sérialisation) en mode debug
+SERVER_TIMING = env_bool("SERVER_TIMING", env_bool("DEBUG", False))
+
+slow_query_logger = logging.getLogger("backend.slow_query")
+
+class QueryCounter:
+    """Compte (et garde) les requêtes SQL exécutées sur le moteur asynchrone"""
+
+    def __init__(self, engine=None):
+        self.engine = engine or async_engine.sync_engine
+        self.queries: list[tuple[str, tuple]] = []
+
+    @property
+    def statements(self) -> list[str]:
+        return [statement for statement, _ in self.queries]
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.queries.append((statement, parameters))
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+        return False
+
+class RequestStats:
+    __slots__ = ("method", "route", "queries", "db_seconds", "serialize_seconds")
+
+    def __init__(self, method: str, route: str):
+        self.method = method
+        self.route = route
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+
+    def server_timing(self, total_seconds: float) -> str:
+        return (
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries", '
+            f"serialize;dur={self.serialize_seconds * 1000:.1f}, "
+            f"total;dur={total_seconds * 1000:.1f}"
+        )
+
+# Requête HTTP en cours dans la tâche courante (None hors requête: CLI, seed...)
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._instrumentation_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._instrumentation_started
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        # Paramètres non journalisés (données personnelles)
+        slow_query_logger.warning(
+            "Slow query (%.1f ms) on %s: %s",
+            elapsed * 1000,
+            f"{stats.method} {stats.route}" if stats is not None else "no request",
+            " ".join(statement.split())[:SLOW_QUERY_MAX_LENGTH],
+        )
+
+def instrument_engines():
+    """Branche les événements de mesure sur le moteur primaire et les réplicas"""
+    for async_db_engine in (async_engine, *replica_engines):
+        sync_engine = async_db_engine.sync_engine
+        if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+def add_serialize_time(seconds: float):
+    stats = current_request.get()
+    if stats is not None:
+        stats.serialize_seconds += seconds
@@ -0,0 +1,89 @@
+"""
+Intervalles du planning: chevauchement indexé et disponibilités
+
+Un événement [start, end) chevauche la fenêtre [from, to) si
+start < to et end > from. Avec l'index (user_id, start_time, end_time),
+seule la borne start < to est un intervalle d'index; la borne basse
+start > from - SCHEDULE_MAX_DURATION (durée maximale d'un événement,
+vérifiée à l'écriture, et pour les lignes antérieures par la migration
+0007 qui les convertit aussi en UTC) limite le parcours aux événements qui peuvent
+encore être en cours, et end > from est vérifié dans l'index sans lire
+la table.
+
+Les conflits d'un lot d'intervalles sont trouvés par balayage (tri par
+début, tas des intervalles en cours ordonnés par fin): chaque paire qui se
+chevauche est produite une fois, en O((n + m) log(n + m) + paires).
+"""
+import heapq
+import os
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_
+
+SCHEDULE_MAX_DURATION = timedelta(hours=int(os.getenv("SCHEDULE_MAX_DURATION_HOURS", "24")))
+
+Interval = Tuple[datetime, datetime]
+
+def overlap_condition(start_column, end_column, start: Optional[datetime], end: Optional[datetime]):
+    """Condition SQL « l'événement chevauche [start, end) » (bornes UTC, chacune optionnelle)"""
+    conditions = []
+    if end is not None:
+        conditions.append(start_column < end)
+    if start is not None:
+        conditions.append(start_column > start - SCHEDULE_MAX_DURATION)
+        conditions.append(end_column > start)
+    return and_(*conditions)
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Fusionne des intervalles triés par début (chevauchants ou contigus)"""
+    merged: List[Interval] = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def clip(intervals: Iterable[Interval], start: datetime, end: datetime) -> List[Interval]:
+    return [(max(s, start), min(e, end)) for s, e in intervals if s < end and e > start]
+
+def free_intervals(busy: List[Interval], start: datetime, end: datetime) -> List[Interval]:
+    """Complément de `busy` (fusionnés, triés) dans [start, end)"""
+    free: List[Interval] = []
+    cursor = start
+    for busy_start, busy_end in busy:
+        if busy_start > cursor:
+            free.append((cursor, busy_start))
+        cursor = max(cursor, busy_end)
+    if cursor < end:
+        free.append((cursor, end))
+    return free
+
+# Intervalle étiqueté: (début, fin, valeur associée)
+Tagged = Tuple[datetime, datetime, Any]
+
+def _sweep(sides: Sequence[Sequence[Tagged]], cross: bool) -> Iterator[Tuple[Any, Any]]:
+    events = sorted(
+        (start, side, index, end, value)
+        for side, intervals in enumerate(sides)
+        for index, (start, end, value) in enumerate(intervals)
+    )
+    active = [[] for _ in sides]
+    for start, side, index, end, value in events:
+        other = active[1 - side] if cross else active[side]
+        # Les intervalles terminés avant ce début ne chevauchent plus rien
+        while other and other[0][0] <= start:
+            heapq.heappop(other)
+        for _, _, other_value in other:
+            yield (value, other_value) if cross and not side else (other_value, value)
+        heapq.heappush(active[side], (end, index, value))
+
+def overlaps_between(left: Sequence[Tagged], right: Sequence[Tagged]) -> Iterator[Tuple[Any, Any]]:
+    """Paires (valeur de gauche, valeur de droite) dont les intervalles se chevauchent"""
+    return _sweep((left, right), cross=True)
+
+def overlaps_within(intervals: Sequence[Tagged]) -> Iterator[Tuple[Any, Any]]:
+    """Paires de valeurs de `intervals` dont les intervalles se chevauchent (la plus tardive en second)"""
+    return _sweep((intervals,), cross=False)
@@ -1,46 +1,107 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from backend.database import engine
-from backend import models
+"""
+Application FastAPI (fabrique `create_app`)
 
-# Créer les tables de la base de données
-models.Base.metadata.create_all(bind=engine)
+`backend.main:app` reste le point d'entrée d'uvicorn. Le démarrage ne touche
+pas à la base: les migrations tournent à la demande (python -m backend.migrate
+upgrade, python -m backend.serve --migrate) ou au démarrage avec
+MIGRATE_ON_STARTUP=true (run.py, développement).
+"""
+import os
+from contextlib import asynccontextmanager
 
-app = FastAPI(
-    title="GDE - Grande École de Musique",
-    description="API pour le site vitrine de GDE",
-    version="2.0.0"
-)
+from fastapi import Depends, FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from backend.database import DATABASE_READ_URLS, dispose_engines, env_bool, pool_stats
+from backend.hashing import password_hasher
+from backend.instrumentation import instrument_engines
+from backend.metrics import MetricsMiddleware, mark_worker_stopped, metrics_response, require_metrics_access
+from backend.read_routing import read_your_writes_middleware
+from backend.response_cache import response_cache
+from backend.worker import WARM_UP_ON_STARTUP, warm_up, worker_state
 
-# Configuration CORS
-import os
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",  # Local Docker
-        "http://localhost",       # Local Dev
-        FRONTEND_URL,             # Railway Frontend
-        "https://gdemusique-frontend-production.up.railway.app",  # Railway Frontend URL
-    ],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Import des routers (après la création de app)
-from backend.routers import auth, courses, marketplace, schedule
-
-# Inclure les routeurs
-app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
-app.include_router(courses.router, prefix="/api/courses", tags=["Courses"])
-app.include_router(marketplace.router, prefix="/api/marketplace", tags=["Marketplace"])
-app.include_router(schedule.router, prefix="/api/schedule", tags=["Schedule"])
-
-@app.get("/")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if env_bool("MIGRATE_ON_STARTUP", False):
+        # Alembic n'est importé que dans ce cas (~200 ms)
+        from backend.migrate import upgrade_database
+        upgrade_database()
+    if WARM_UP_ON_STARTUP:
+        await warm_up(app)
+    yield
+    mark_worker_stopped()
+    password_hasher.shutdown()
+    await response_cache.close()
+    await dispose_engines()
+
 async def root():
     return {"message": "Bienvenue sur le site de GDE - Grande École de Musique"}
 
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy", "version": "2.0.0"}
+async def metrics():
+    """Format d'exposition Prometheus"""
+    return metrics_response()
+
+async def metrics_summary():
+    return {
+        "worker": worker_state.stats(),
+        "password_hashing": password_hasher.stats(),
+        "database_pool": pool_stats(),
+        "response_cache": response_cache.stats(),
+    }
+
+def create_app() -> FastAPI:
+    app = FastAPI(
+        title="GDE - Grande École de Musique",
+        description="API pour le site vitrine de GDE",
+        version="2.0.0",
+        # Encodage orjson pour les réponses qui ne passent pas par model_response
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan,
+    )
+
+    # Configuration CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[
+            "http://localhost:3000",  # Local Docker
+            "http://localhost",       # Local Dev
+            FRONTEND_URL,             # Railway Frontend
+            "https://gdemusique-frontend-production.up.railway.app",  # Railway Frontend URL
+        ],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Métriques Prometheus, requêtes lentes et Server-Timing: latence par route
+    # et requêtes SQL par requête HTTP
+    instrument_engines()
+    app.add_middleware(MetricsMiddleware)
+
+    # Lectures sur les réplicas: l'auteur d'une écriture relit le primaire un court instant
+    if DATABASE_READ_URLS:
+        app.middleware("http")(read_your_writes_middleware)
+
+    from backend import health
+    from backend.routers import auth, courses, marketplace, schedule, search
+
+    # Inclure les routeurs
+    app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
+    app.include_router(courses.router, prefix="/api/courses", tags=["Courses"])
+    app.include_router(marketplace.router, prefix="/api/marketplace", tags=["Marketplace"])
+    app.include_router(schedule.router, prefix="/api/schedule", tags=["Schedule"])
+    app.include_router(search.router, prefix="/api/search", tags=["Search"])
+    app.include_router(health.router, tags=["Health"])
+
+    app.add_api_route("/", root, methods=["GET"])
+    # Métriques hors du schéma OpenAPI, réservées au jeton METRICS_TOKEN (ou aux clients locaux)
+    metrics_access = [Depends(require_metrics_access)]
+    app.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False, dependencies=metrics_access)
+    app.add_api_route(
+        "/metrics/summary", metrics_summary, methods=["GET"], include_in_schema=False, dependencies=metrics_access
+    )
+    return app
+
+app = create_app()
@@ -0,0 +1,202 @@
+"""
+Métriques Prometheus de l'API (exposées sur /metrics)
+
+- latence des requêtes HTTP par gabarit de route (/api/courses/{course_id}),
+  méthode et statut, et requêtes en cours par route
+- nombre de requêtes SQL et temps passé en base par requête HTTP, mesurés
+  par les événements SQLAlchemy de backend.instrumentation
+- état des pools de connexions, du pool bcrypt et du cache de réponses,
+  lus au moment du scrape
+
+Avec plusieurs workers (python -m backend.serve), PROMETHEUS_MULTIPROC_DIR
+est défini et les compteurs/histogrammes de tous les workers sont agrégés;
+l'état des pools reste celui du worker qui répond au scrape.
+
+/metrics et /metrics/summary ne sont pas publics: avec METRICS_TOKEN, ils
+exigent `Authorization: Bearer <METRICS_TOKEN>`; sans, ils ne répondent
+qu'aux clients locaux (127.0.0.1, ::1).
+
+Le middleware est un middleware ASGI pur: il n'ajoute pas de tâche par
+requête comme `app.middleware("http")`, ce qui compte pour un code exécuté
+sur chaque appel. Il ajoute aussi l'en-tête Server-Timing (mode debug) et
+lance le profilage échantillonné (backend.profiling).
+"""
+import hmac
+import os
+import time
+
+from fastapi import HTTPException, Request, Response, status
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Gauge, Histogram, generate_latest, multiprocess
+from prometheus_client.core import REGISTRY, CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+from starlette.routing import Match
+
+from backend.database import async_engine, engine_pool_stats, replica_engines
+from backend.hashing import password_hasher
+from backend.instrumentation import SERVER_TIMING, RequestStats, current_request
+from backend.profiling import request_profiler
+from backend.response_cache import response_cache
+from backend.worker import worker_state
+
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+LOCAL_CLIENTS = {"127.0.0.1", "::1"}
+
+# Requêtes hors de toute route (404): un seul libellé pour borner la cardinalité
+UNMATCHED_ROUTE = "unmatched"
+
+HTTP_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Durée des requêtes HTTP",
+    ["method", "route", "status"],
+    buckets=HTTP_LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requêtes HTTP en cours de traitement",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "Requêtes SQL exécutées par requête HTTP",
+    ["route"],
+    buckets=DB_QUERY_BUCKETS,
+)
+DB_DURATION_PER_REQUEST = Histogram(
+    "db_query_duration_per_request_seconds",
+    "Temps passé en base par requête HTTP",
+    ["route"],
+    buckets=HTTP_LATENCY_BUCKETS,
+)
+
+def route_template(app, scope) -> str:
+    """Gabarit de la route qui traitera la requête (résolu comme le routeur)"""
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return UNMATCHED_ROUTE
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = route_template(scope["app"], scope)
+        method = scope["method"]
+        status_code = 500
+        stats = RequestStats(method, route)
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING:
+                    timing = stats.server_timing(time.perf_counter() - started)
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            await send(message)
+
+        token = current_request.set(stats)
+        in_progress = REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        worker_state.in_flight += 1
+        profile = request_profiler.start() if request_profiler.enabled else None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            if profile is not None:
+                request_profiler.finish(profile, method, route, elapsed)
+            REQUEST_DURATION.labels(method, route, str(status_code)).observe(elapsed)
+            in_progress.dec()
+            worker_state.in_flight -= 1
+            worker_state.requests += 1
+            current_request.reset(token)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.queries)
+            DB_DURATION_PER_REQUEST.labels(route).observe(stats.db_seconds)
+
+class StateCollector:
+    """Pools de connexions, pool bcrypt et cache de réponses, lus au scrape"""
+
+    def collect(self):
+        pool_size = GaugeMetricFamily("db_pool_size", "Taille du pool de connexions", labels=["engine"])
+        pool_connections = GaugeMetricFamily(
+            "db_pool_connections", "Connexions du pool par état", labels=["engine", "state"]
+        )
+        engines = [("primary", async_engine)] + [
+            (f"replica-{index}", replica) for index, replica in enumerate(replica_engines)
+        ]
+        for name, db_engine in engines:
+            stats = engine_pool_stats(db_engine)
+            if "size" not in stats:
+                continue  # NullPool / StaticPool (SQLite)
+            pool_size.add_metric([name], stats["size"])
+            for state in ("checked_out", "idle", "overflow"):
+                pool_connections.add_metric([name, state], stats[state])
+        yield pool_size
+        yield pool_connections
+
+        hashing = password_hasher.stats()
+        yield GaugeMetricFamily("password_hashing_pool_size", "Threads du pool bcrypt", value=hashing["pool_size"])
+        yield GaugeMetricFamily("password_hashing_running", "Hachages en cours", value=hashing["running"])
+        yield GaugeMetricFamily("password_hashing_queued", "Hachages en attente", value=hashing["queued"])
+        yield CounterMetricFamily("password_hashing_rejected", "Hachages refusés (pool saturé)", value=hashing["rejected"])
+        yield CounterMetricFamily(
+            "password_hashing_wait_seconds", "Attente cumulée avant hachage", value=hashing["wait_seconds_sum"]
+        )
+        latency = HistogramMetricFamily("password_hashing_seconds", "Durée des hachages bcrypt")
+        latency.add_metric(
+            [],
+            buckets=list(hashing["latency_buckets"].items()),
+            sum_value=hashing["latency_seconds_sum"],
+        )
+        yield latency
+
+        cache = response_cache.stats()
+        requests = CounterMetricFamily(
+            "response_cache_requests", "Consultations du cache de réponses", labels=["result"]
+        )
+        for result in ("hits", "misses", "errors"):
+            requests.add_metric([result], cache[result])
+        yield requests
+
+state_collector = StateCollector()
+REGISTRY.register(state_collector)
+
+def require_metrics_access(request: Request):
+    """Dépendance des routes de métriques: jeton METRICS_TOKEN, ou client local sans jeton configuré"""
+    if METRICS_TOKEN:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid metrics token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+    elif request.client is None or request.client.host not in LOCAL_CLIENTS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Metrics are only served locally unless METRICS_TOKEN is set",
+        )
+
+def metrics_response() -> Response:
+    registry = REGISTRY
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(state_collector)
+    return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+def mark_worker_stopped():
+    """Retire les jauges du worker qui s'arrête (mode multiprocess)"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,67 @@
+"""
+Migrations du schéma (Alembic) sans fichier alembic.ini
+
+Usage:
+    python -m backend.migrate upgrade [revision]   # head par défaut
+    python -m backend.migrate downgrade <revision>
+    python -m backend.migrate revision -m "message" [--autogenerate]
+    python -m backend.migrate current
+"""
+import argparse
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from backend.database import engine
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+
+# Révision correspondant au schéma créé auparavant par Base.metadata.create_all
+BASELINE_REVISION = "0001_initial_schema"
+
+def get_config() -> Config:
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    return config
+
+def upgrade_database(revision: str = "head"):
+    """Applique les migrations; une base créée par create_all est d'abord marquée au schéma initial"""
+    config = get_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        tables = set(inspect(connection).get_table_names())
+        if "users" in tables and "alembic_version" not in tables:
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, revision)
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrations de la base GDE")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    upgrade = subparsers.add_parser("upgrade")
+    upgrade.add_argument("revision", nargs="?", default="head")
+
+    downgrade = subparsers.add_parser("downgrade")
+    downgrade.add_argument("revision")
+
+    revision = subparsers.add_parser("revision")
+    revision.add_argument("-m", "--message", required=True)
+    revision.add_argument("--autogenerate", action="store_true")
+
+    subparsers.add_parser("current")
+
+    args = parser.parse_args()
+    config = get_config()
+    if args.command == "upgrade":
+        upgrade_database(args.revision)
+    elif args.command == "downgrade":
+        command.downgrade(config, args.revision)
+    elif args.command == "revision":
+        command.revision(config, message=args.message, autogenerate=args.autogenerate)
+    elif args.command == "current":
+        command.current(config, verbose=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Migrations Alembic du schéma de la base de données
@@ -0,0 +1,50 @@
+"""
+Environnement Alembic: utilise le moteur et les modèles de l'application
+"""
+from alembic import context
+
+from backend.database import engine
+from backend.models import Base
+
+config = context.config
+target_metadata = Base.metadata
+
+def include_name(name, type_, parent_names):
+    # Index plein texte (migration 0003): tables et tables internes FTS5 hors des modèles
+    return not (type_ == "table" and name.startswith(("search_documents", "search_index")))
+
+def run_migrations_offline():
+    context.configure(
+        url=str(engine.url),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        include_name=include_name,
+        render_as_batch=engine.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    # Connexion fournie par backend.migrate, sinon ouverte sur le moteur de l'application
+    connection = config.attributes.get("connection")
+    if connection is None:
+        with engine.connect() as connection:
+            _run(connection)
+    else:
+        _run(connection)
+
+def _run(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+        # SQLite ne supporte pas ALTER TABLE: les migrations recréent les tables
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
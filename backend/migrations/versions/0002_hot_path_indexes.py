@@ -0,0 +1,51 @@
+"""hot path indexes
+
+Index composites pour les filtres des routeurs et unicité des inscriptions
+
+Revision ID: 0002_hot_path_indexes
+Revises: 0001_initial_schema
+Create Date: 2026-10-18 12:33:23.295372
+"""
+from alembic import op
+from sqlalchemy import text
+
+revision = '0002_hot_path_indexes'
+down_revision = '0001_initial_schema'
+branch_labels = None
+depends_on = None
+
+# Inscription en double: une autre ligne du même (élève, cours) a plus de
+# progression, ou autant et un id plus petit (la plus avancée est conservée)
+DELETE_DUPLICATE_ENROLLMENTS = """
+    DELETE FROM enrollments WHERE EXISTS (
+        SELECT 1 FROM enrollments AS kept
+        WHERE kept.student_id = enrollments.student_id
+          AND kept.course_id = enrollments.course_id
+          AND (
+            coalesce(kept.progress, 0) > coalesce(enrollments.progress, 0)
+            OR (coalesce(kept.progress, 0) = coalesce(enrollments.progress, 0) AND kept.id < enrollments.id)
+          )
+    )
+"""
+
+def upgrade():
+    # Supprimer les inscriptions en double avant de créer l'index unique
+    removed = op.get_bind().execute(text(DELETE_DUPLICATE_ENROLLMENTS)).rowcount
+    if removed:
+        # Perte de données visible à l'exécution (la journalisation d'Alembic n'est pas configurée)
+        print(f"0002_hot_path_indexes: removed {removed} duplicate enrollment(s), keeping the most advanced of each")
+
+    op.create_index('ix_courses_instrument_id', 'courses', ['instrument_id'], unique=False)
+    op.create_index('ix_enrollments_course_id', 'enrollments', ['course_id'], unique=False)
+    op.create_index('uq_enrollments_student_id_course_id', 'enrollments', ['student_id', 'course_id'], unique=True)
+    op.create_index('ix_lessons_course_id_order', 'lessons', ['course_id', 'order'], unique=False)
+    op.create_index('ix_marketplace_items_is_sold_created_at', 'marketplace_items', ['is_sold', 'created_at', 'id'], unique=False)
+    op.create_index('ix_schedule_items_user_id_start_time', 'schedule_items', ['user_id', 'start_time'], unique=False)
+
+def downgrade():
+    op.drop_index('ix_schedule_items_user_id_start_time', table_name='schedule_items')
+    op.drop_index('ix_marketplace_items_is_sold_created_at', table_name='marketplace_items')
+    op.drop_index('ix_lessons_course_id_order', table_name='lessons')
+    op.drop_index('uq_enrollments_student_id_course_id', table_name='enrollments')
+    op.drop_index('ix_enrollments_course_id', table_name='enrollments')
+    op.drop_index('ix_courses_instrument_id', table_name='courses')
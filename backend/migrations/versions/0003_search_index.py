@@ -0,0 +1,136 @@
+"""search index
+
+Index plein texte des cours, leçons et objets en vente (non vendus)
+
+PostgreSQL: table search_documents, tsvector généré (configuration
+gde_french = french + unaccent) et index GIN. SQLite: table virtuelle FTS5
+search_index (unicode61 sans diacritiques, index de préfixes). Dans les deux
+cas, des triggers tiennent l'index à jour à chaque écriture, y compris les
+insertions en masse qui ne passent pas par l'ORM.
+
+Attention (SQLite): une migration en mode batch qui recrée courses, lessons
+ou marketplace_items supprime leurs triggers; les recréer avec SOURCES.
+
+Revision ID: 0003_search_index
+Revises: 0002_hot_path_indexes
+Create Date: 2026-10-18 14:05:12.418730
+"""
+from alembic import op
+
+revision = '0003_search_index'
+down_revision = '0002_hot_path_indexes'
+branch_labels = None
+depends_on = None
+
+# (type, code rowid FTS5, table, colonnes titre / mots-clés / texte, condition d'indexation, colonnes surveillées)
+SOURCES = [
+    ("course", 1, "courses", "title", "NULL", "description", None, "title, description"),
+    ("lesson", 2, "lessons", "title", "song_name", "song_history", None, "title, song_name, song_history"),
+    ("marketplace_item", 3, "marketplace_items", "title", "NULL", "description",
+     "NOT coalesce({row}.is_sold, FALSE)", "title, description, is_sold"),
+]
+
+def columns(row, title, keywords, body):
+    keywords = keywords if keywords == "NULL" else f"{row}.{keywords}"
+    return f"{row}.{title}, {keywords}, {row}.{body}"
+
+def upgrade_postgresql():
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute("CREATE TEXT SEARCH CONFIGURATION gde_french (COPY = french)")
+    op.execute(
+        "ALTER TEXT SEARCH CONFIGURATION gde_french "
+        "ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem"
+    )
+    op.execute("""
+        CREATE TABLE search_documents (
+            kind VARCHAR(20) NOT NULL,
+            ref_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            keywords TEXT,
+            body TEXT,
+            document TSVECTOR GENERATED ALWAYS AS (
+                setweight(to_tsvector('gde_french', coalesce(title, '') || ' ' || coalesce(keywords, '')), 'A')
+                || setweight(to_tsvector('gde_french', coalesce(body, '')), 'B')
+            ) STORED,
+            PRIMARY KEY (kind, ref_id)
+        )
+    """)
+    op.execute("CREATE INDEX ix_search_documents_document ON search_documents USING GIN (document)")
+
+    for kind, _, table, title, keywords, body, condition, watched in SOURCES:
+        condition_new = condition.format(row="NEW") if condition else "TRUE"
+        op.execute(f"""
+            CREATE FUNCTION search_index_{table}() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP <> 'INSERT' THEN
+                    DELETE FROM search_documents WHERE kind = '{kind}' AND ref_id = OLD.id;
+                END IF;
+                IF TG_OP <> 'DELETE' THEN
+                    IF {condition_new} THEN
+                        INSERT INTO search_documents (kind, ref_id, title, keywords, body)
+                        VALUES ('{kind}', NEW.id, {columns("NEW", title, keywords, body)});
+                    END IF;
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute(f"""
+            CREATE TRIGGER search_index_{table}
+            AFTER INSERT OR DELETE OR UPDATE OF {watched} ON {table}
+            FOR EACH ROW EXECUTE FUNCTION search_index_{table}()
+        """)
+        op.execute(f"""
+            INSERT INTO search_documents (kind, ref_id, title, keywords, body)
+            SELECT '{kind}', src.id, {columns("src", title, keywords, body)}
+            FROM {table} AS src
+            WHERE {condition.format(row="src") if condition else "TRUE"}
+        """)
+
+def upgrade_sqlite():
+    op.execute("""
+        CREATE VIRTUAL TABLE search_index USING fts5(
+            kind UNINDEXED, ref_id UNINDEXED, title, keywords, body,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+    # Classement par défaut (colonne rank): bm25 pondéré, titre > mots-clés > texte
+    op.execute("INSERT INTO search_index (search_index, rank) VALUES ('rank', 'bm25(0.0, 0.0, 10.0, 5.0, 1.0)')")
+    for kind, code, table, title, keywords, body, condition, watched in SOURCES:
+        # rowid = id * 4 + code: mise à jour et suppression par rowid, sans parcours
+        def insert(row, source=""):
+            return (
+                f"INSERT INTO search_index (rowid, kind, ref_id, title, keywords, body) "
+                f"SELECT {row}.id * 4 + {code}, '{kind}', {row}.id, {columns(row, title, keywords, body)}"
+                f"{source}"
+                + (f" WHERE {condition.format(row=row)}" if condition else "")
+                + ";"
+            )
+        delete = f"DELETE FROM search_index WHERE rowid = old.id * 4 + {code};"
+        op.execute(f"CREATE TRIGGER search_index_{table}_insert AFTER INSERT ON {table} BEGIN {insert('new')} END")
+        op.execute(
+            f"CREATE TRIGGER search_index_{table}_update AFTER UPDATE OF {watched} ON {table} "
+            f"BEGIN {delete} {insert('new')} END"
+        )
+        op.execute(f"CREATE TRIGGER search_index_{table}_delete AFTER DELETE ON {table} BEGIN {delete} END")
+        op.execute(insert("src", f" FROM {table} AS src"))
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        upgrade_postgresql()
+    else:
+        upgrade_sqlite()
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        for _, _, table, *_ in SOURCES:
+            op.execute(f"DROP TRIGGER search_index_{table} ON {table}")
+            op.execute(f"DROP FUNCTION search_index_{table}()")
+        op.execute("DROP TABLE search_documents")
+        op.execute("DROP TEXT SEARCH CONFIGURATION gde_french")
+    else:
+        for _, _, table, *_ in SOURCES:
+            for event in ("insert", "update", "delete"):
+                op.execute(f"DROP TRIGGER search_index_{table}_{event}")
+        op.execute("DROP TABLE search_index")
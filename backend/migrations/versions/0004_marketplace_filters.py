@@ -0,0 +1,54 @@
+"""marketplace filters
+
+Index des filtres et tris du listing marketplace (prix, vendeur, date)
+
+Chaque tri (date ou prix, date puis id pour départager) a son index, précédé
+des filtres d'égalité (is_sold, seller_id); les index sans is_sold servent
+au listing avec les objets vendus. Les index de prix contiennent la date:
+une fourchette de prix triée par date se trie sans lire la table.
+
+Sous SQLite, la date triée est strftime('%Y-%m-%d %H:%M:%f', created_at)
+(backend.pagination.sort_key): les index portent sur cette expression,
+sinon chaque page trie tous les objets. PostgreSQL indexe la colonne.
+
+Revision ID: 0004_marketplace_filters
+Revises: 0003_search_index
+Create Date: 2026-10-18 16:42:07.512903
+"""
+from alembic import op
+
+revision = '0004_marketplace_filters'
+down_revision = '0003_search_index'
+branch_labels = None
+depends_on = None
+
+SQLITE_CREATED_AT = "strftime('%Y-%m-%d %H:%M:%f', created_at)"
+
+INDEXES = {
+    'ix_marketplace_items_is_sold_price': ['is_sold', 'price', 'created_at', 'id'],
+    'ix_marketplace_items_price': ['price', 'created_at', 'id'],
+    'ix_marketplace_items_created_at': ['created_at', 'id'],
+    'ix_marketplace_items_seller_id_is_sold_created_at': ['seller_id', 'is_sold', 'created_at', 'id'],
+    'ix_marketplace_items_seller_id_is_sold_price': ['seller_id', 'is_sold', 'price', 'created_at', 'id'],
+}
+
+def create_index(name, columns):
+    if op.get_bind().dialect.name == "sqlite":
+        columns = ", ".join(SQLITE_CREATED_AT if column == "created_at" else column for column in columns)
+        op.execute(f"CREATE INDEX {name} ON marketplace_items ({columns})")
+    else:
+        op.create_index(name, 'marketplace_items', columns, unique=False)
+
+def upgrade():
+    for name, columns in INDEXES.items():
+        create_index(name, columns)
+    if op.get_bind().dialect.name == "sqlite":
+        op.drop_index('ix_marketplace_items_is_sold_created_at', table_name='marketplace_items')
+        create_index('ix_marketplace_items_is_sold_created_at', ['is_sold', 'created_at', 'id'])
+
+def downgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        op.drop_index('ix_marketplace_items_is_sold_created_at', table_name='marketplace_items')
+        op.create_index('ix_marketplace_items_is_sold_created_at', 'marketplace_items', ['is_sold', 'created_at', 'id'], unique=False)
+    for name in reversed(list(INDEXES)):
+        op.drop_index(name, table_name='marketplace_items')
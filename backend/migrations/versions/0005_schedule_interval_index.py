@@ -0,0 +1,23 @@
+"""schedule interval index
+
+Index (user_id, start_time, end_time) des requêtes de chevauchement du
+planning; remplace (user_id, start_time), dont il est un prolongement.
+
+Revision ID: 0005_schedule_interval_index
+Revises: 0004_marketplace_filters
+Create Date: 2026-10-18 18:20:44.903117
+"""
+from alembic import op
+
+revision = '0005_schedule_interval_index'
+down_revision = '0004_marketplace_filters'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('ix_schedule_items_user_id_start_time_end_time', 'schedule_items', ['user_id', 'start_time', 'end_time'], unique=False)
+    op.drop_index('ix_schedule_items_user_id_start_time', table_name='schedule_items')
+
+def downgrade():
+    op.create_index('ix_schedule_items_user_id_start_time', 'schedule_items', ['user_id', 'start_time'], unique=False)
+    op.drop_index('ix_schedule_items_user_id_start_time_end_time', table_name='schedule_items')
@@ -0,0 +1,48 @@
+"""recurring schedule
+
+Séries récurrentes du planning: règle, fuseau et fin de la dernière
+occurrence sur schedule_items (NULL pour un événement simple), index des
+séries d'une fenêtre, et table des occurrences modifiées ou annulées.
+
+Revision ID: 0006_recurring_schedule
+Revises: 0005_schedule_interval_index
+Create Date: 2026-10-18 19:37:51.226408
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006_recurring_schedule'
+down_revision = '0005_schedule_interval_index'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # ADD COLUMN (y compris sous SQLite): la table n'est pas recréée
+    op.add_column('schedule_items', sa.Column('recurrence_rule', sa.String(length=200), nullable=True))
+    op.add_column('schedule_items', sa.Column('recurrence_timezone', sa.String(length=64), nullable=True))
+    op.add_column('schedule_items', sa.Column('recurrence_end', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_schedule_items_user_id_recurrence_end', 'schedule_items', ['user_id', 'recurrence_end'], unique=False)
+
+    op.create_table('schedule_item_overrides',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('schedule_item_id', sa.Integer(), nullable=False),
+    sa.Column('occurrence_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('cancelled', sa.Boolean(), nullable=False),
+    sa.Column('start_time', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('end_time', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('title', sa.String(length=200), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('reminder_text', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['schedule_item_id'], ['schedule_items.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_schedule_item_overrides_item_occurrence', 'schedule_item_overrides', ['schedule_item_id', 'occurrence_start'], unique=True)
+
+def downgrade():
+    op.drop_index('uq_schedule_item_overrides_item_occurrence', table_name='schedule_item_overrides')
+    op.drop_table('schedule_item_overrides')
+    op.drop_index('ix_schedule_items_user_id_recurrence_end', table_name='schedule_items')
+    with op.batch_alter_table('schedule_items') as batch_op:
+        batch_op.drop_column('recurrence_end')
+        batch_op.drop_column('recurrence_timezone')
+        batch_op.drop_column('recurrence_rule')
@@ -0,0 +1,80 @@
+"""schedule utc data
+
+Les requêtes de chevauchement (backend.intervals) supposent que chaque
+événement est en UTC et ne dure pas plus de SCHEDULE_MAX_DURATION, ce que
+l'API vérifie seulement depuis 0005 pour les nouvelles écritures.
+
+- SQLite stocke les dates sans décalage: les lignes écrites avant 0005 sont
+  l'heure locale envoyée par le client. SCHEDULE_LEGACY_TIMEZONE (ex:
+  Europe/Paris) les convertit en UTC; à ne définir que pour une base dont
+  les événements sont tous antérieurs à 0005. PostgreSQL (timestamptz)
+  conserve déjà l'instant exact: rien à convertir.
+- Un événement qui se termine avant de commencer ou dure plus que
+  SCHEDULE_MAX_DURATION fait échouer la migration avec la liste des ids:
+  corriger ces lignes ou augmenter SCHEDULE_MAX_DURATION_HOURS.
+
+Revision ID: 0007_schedule_utc_data
+Revises: 0006_recurring_schedule
+Create Date: 2026-10-18 21:04:37.512093
+"""
+import os
+from datetime import timezone
+from zoneinfo import ZoneInfo
+
+from alembic import op
+import sqlalchemy as sa
+
+from backend.intervals import SCHEDULE_MAX_DURATION
+
+revision = '0007_schedule_utc_data'
+down_revision = '0006_recurring_schedule'
+branch_labels = None
+depends_on = None
+
+LEGACY_TIMEZONE = os.getenv("SCHEDULE_LEGACY_TIMEZONE", "UTC")
+REPORTED_IDS = 20
+
+schedule_items = sa.table(
+    "schedule_items",
+    sa.column("id", sa.Integer),
+    sa.column("start_time", sa.DateTime(timezone=True)),
+    sa.column("end_time", sa.DateTime(timezone=True)),
+)
+
+def convert(source, target):
+    """Réécrit les dates de `source` vers `target` (SQLite: dates sans décalage)"""
+    connection = op.get_bind()
+    rows = connection.execute(sa.select(schedule_items)).all()
+    for id_, start, end in rows:
+        connection.execute(
+            schedule_items.update().where(schedule_items.c.id == id_).values(
+                start_time=start.replace(tzinfo=source).astimezone(target).replace(tzinfo=None),
+                end_time=end.replace(tzinfo=source).astimezone(target).replace(tzinfo=None),
+            )
+        )
+    print(f"0007_schedule_utc_data: converted {len(rows)} schedule item(s) from {source} to {target}")
+
+def valid_duration(start, end) -> bool:
+    return start < end <= start + SCHEDULE_MAX_DURATION
+
+def upgrade():
+    connection = op.get_bind()
+    if connection.dialect.name == "sqlite" and LEGACY_TIMEZONE != "UTC":
+        convert(ZoneInfo(LEGACY_TIMEZONE), timezone.utc)
+
+    invalid = [
+        id_
+        for id_, start, end in connection.execute(sa.select(schedule_items).order_by(schedule_items.c.id))
+        if not valid_duration(start, end)
+    ]
+    if invalid:
+        shown = ", ".join(str(id_) for id_ in invalid[:REPORTED_IDS])
+        raise RuntimeError(
+            f"{len(invalid)} schedule item(s) end before they start or last more than "
+            f"{SCHEDULE_MAX_DURATION.total_seconds() / 3600:g} hours (ids: {shown}{', ...' if len(invalid) > REPORTED_IDS else ''}). "
+            "Fix these rows or raise SCHEDULE_MAX_DURATION_HOURS, then run the migration again."
+        )
+
+def downgrade():
+    if op.get_bind().dialect.name == "sqlite" and LEGACY_TIMEZONE != "UTC":
+        convert(timezone.utc, ZoneInfo(LEGACY_TIMEZONE))
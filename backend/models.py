@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Table, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Table, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from backend.database import Base
+from backend.recurrence import Rule
 import enum
 
 # Table d'association pour les instruments d'un utilisateur
@@ -71,6 +72,10 @@ class Course(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        Index("ix_courses_instrument_id", "instrument_id"),
+    )
+
     # Relations
     instrument = relationship("Instrument", back_populates="courses")
     lessons = relationship("Lesson", back_populates="course")
@@ -93,6 +98,10 @@ class Lesson(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        Index("ix_lessons_course_id_order", "course_id", "order"),
+    )
+
     # Relations
     course = relationship("Course", back_populates="lessons")
 
@@ -105,6 +114,12 @@ class Enrollment(Base):
     enrolled_at = Column(DateTime(timezone=True), server_default=func.now())
     progress = Column(Integer, default=0)  # Pourcentage de progression
 
+    __table_args__ = (
+        # Un élève ne peut être inscrit qu'une fois à un cours
+        Index("uq_enrollments_student_id_course_id", "student_id", "course_id", unique=True),
+        Index("ix_enrollments_course_id", "course_id"),
+    )
+
     # Relations
     student = relationship("User", back_populates="enrollments")
     course = relationship("Course", back_populates="enrollments")
@@ -122,6 +137,19 @@ class MarketplaceItem(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Filtres et tris du listing (migration 0004); sous SQLite, les index
+    # portent sur strftime(format, created_at), l'expression de tri de backend.pagination
+    __table_args__ = (
+        # Listing non vendus triés par date (id en dernier pour la pagination par curseur)
+        Index("ix_marketplace_items_is_sold_created_at", "is_sold", "created_at", "id"),
+        Index("ix_marketplace_items_is_sold_price", "is_sold", "price", "created_at", "id"),
+        Index("ix_marketplace_items_seller_id_is_sold_created_at", "seller_id", "is_sold", "created_at", "id"),
+        Index("ix_marketplace_items_seller_id_is_sold_price", "seller_id", "is_sold", "price", "created_at", "id"),
+        # Listing avec les objets vendus
+        Index("ix_marketplace_items_created_at", "created_at", "id"),
+        Index("ix_marketplace_items_price", "price", "created_at", "id"),
+    )
+
     # Relations
     seller = relationship("User")
 
@@ -137,9 +165,45 @@ class ScheduleItem(Base):
     course_id = Column(Integer, ForeignKey("courses.id"))
     reminder_text = Column(Text)  # Sujets à bosser pour la semaine
     is_teacher_view = Column(Boolean, default=False)  # Pour différencier vue prof/élève
+    # Série récurrente (backend.recurrence): règle, fuseau de l'heure locale, fin de la dernière occurrence
+    recurrence_rule = Column(String(200))
+    recurrence_timezone = Column(String(64))
+    recurrence_end = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Fenêtres et disponibilités: chevauchement lu dans l'index (backend.intervals)
+        Index("ix_schedule_items_user_id_start_time_end_time", "user_id", "start_time", "end_time"),
+        # Séries d'une fenêtre (NULL pour les événements simples)
+        Index("ix_schedule_items_user_id_recurrence_end", "user_id", "recurrence_end"),
+    )
+
     # Relations
     user = relationship("User", back_populates="schedule_items")
     course = relationship("Course")
+
+    @property
+    def recurrence(self):
+        if self.recurrence_rule is None:
+            return None
+        return Rule.parse(self.recurrence_rule).to_schema(self.recurrence_timezone)
+
+class ScheduleItemOverride(Base):
+    """Occurrence modifiée ou annulée d'une série, identifiée par son début prévu"""
+    __tablename__ = "schedule_item_overrides"
+
+    id = Column(Integer, primary_key=True)
+    schedule_item_id = Column(Integer, ForeignKey("schedule_items.id", ondelete="CASCADE"), nullable=False)
+    occurrence_start = Column(DateTime(timezone=True), nullable=False)
+    cancelled = Column(Boolean, nullable=False, default=False)
+    # Valeurs remplacées (NULL: celle de la série)
+    start_time = Column(DateTime(timezone=True))
+    end_time = Column(DateTime(timezone=True))
+    title = Column(String(200))
+    description = Column(Text)
+    reminder_text = Column(Text)
+
+    __table_args__ = (
+        Index("uq_schedule_item_overrides_item_occurrence", "schedule_item_id", "occurrence_start", unique=True),
+    )
@@ -0,0 +1,120 @@
+"""
+Pagination par curseur (keyset) pour les endpoints de liste
+
+Le curseur encode les valeurs de tri de la dernière ligne renvoyée; la page
+suivante filtre sur `(clé1, clé2) > (v1, v2)` au lieu d'un OFFSET, donc la
+page N coûte autant que la première (parcours d'index borné par `limit`).
+"""
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, Select, func, literal_column, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import async_engine
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+IS_SQLITE = async_engine.dialect.name == "sqlite"
+# Format écrit en toutes lettres dans la requête (et non en paramètre) pour que
+# les index d'expression SQLite sur strftime(format, colonne) soient utilisés
+SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%f"
+
+def sort_key(column):
+    """
+    Expression de tri comparable de façon fiable.
+
+    Sous SQLite, les dates sont stockées en texte avec ou sans microsecondes
+    (CURRENT_TIMESTAMP vs valeurs Python): on les normalise pour que tri et
+    comparaison du curseur soient cohérents; l'expression correspond aux index
+    d'expression de la migration 0004. Sous PostgreSQL la colonne est utilisée
+    telle quelle afin de profiter des index.
+    """
+    if IS_SQLITE and isinstance(column.type, DateTime):
+        return func.strftime(literal_column(f"'{SQLITE_DATETIME_FORMAT}'"), column)
+    return column
+
+def sort_value(column, value):
+    """Valeur comparable à `sort_key(column)` (bornes de filtre sur une date)"""
+    if isinstance(value, datetime) and isinstance(column.type, DateTime):
+        # Dates naïves: UTC, comme CURRENT_TIMESTAMP
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        if IS_SQLITE:
+            value = value.astimezone(timezone.utc)
+            return f"{value:%Y-%m-%d %H:%M:%S}.{value.microsecond // 1000:03d}"
+    return value
+
+def encode_cursor(values: Sequence) -> str:
+    payload = [
+        {"dt": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list):
+            raise ValueError("cursor must encode a list")
+        return [
+            datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value
+            for value in payload
+        ]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    order_by: Sequence,
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+) -> dict:
+    """
+    Exécute `stmt` page par page.
+
+    Si `stmt` sélectionne une seule entité, les items sont les objets ORM;
+    sinon ce sont des dictionnaires indexés par le nom des colonnes.
+    `order_by` doit se terminer par une colonne unique (l'id) pour que
+    l'ordre soit total et stable.
+    """
+    names = [description["name"] for description in stmt.column_descriptions]
+    keys = [sort_key(column) for column in order_by]
+    stmt = stmt.add_columns(*keys)
+
+    if cursor is not None:
+        values = decode_cursor(cursor)
+        if len(values) != len(keys):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        if descending:
+            stmt = stmt.where(tuple_(*keys) < tuple_(*values))
+        else:
+            stmt = stmt.where(tuple_(*keys) > tuple_(*values))
+
+    stmt = stmt.order_by(*(key.desc() if descending else key.asc() for key in keys))
+    rows = (await db.execute(stmt.limit(limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][len(names):])
+
+    if len(names) == 1:
+        items = [row[0] for row in rows]
+    else:
+        items = [dict(zip(names, row[:len(names)])) for row in rows]
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,104 @@
+"""
+Profilage échantillonné des requêtes lentes (opt-in)
+
+Avec PROFILE_SAMPLE_RATE > 0, une fraction des requêtes est exécutée sous
+profileur; si la requête dépasse PROFILE_SLOW_MS, la trace est écrite dans
+PROFILE_DIR:
+    cprofile     <date>-<méthode>-<route>.prof  (snakeviz, pstats)
+    pyinstrument <date>-<méthode>-<route>.html  (pip install pyinstrument)
+
+Un seul profil à la fois par worker: cProfile observe tout le thread, donc
+aussi les autres requêtes servies par la boucle pendant ce temps;
+pyinstrument (mode async) n'attribue que le temps de la requête profilée.
+"""
+import logging
+import os
+import random
+import re
+import time
+from datetime import datetime
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "500"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+PROFILER = os.getenv("PROFILER", "cprofile")
+
+logger = logging.getLogger(__name__)
+
+class CProfileSession:
+    extension = "prof"
+
+    def __init__(self):
+        import cProfile
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+
+    def save(self, path: str):
+        self.profiler.dump_stats(path)
+
+class PyinstrumentSession:
+    extension = "html"
+
+    def __init__(self):
+        # Dépendance optionnelle, importée seulement si elle est choisie
+        from pyinstrument import Profiler
+        self.profiler = Profiler(async_mode="enabled")
+
+    def start(self):
+        self.profiler.start()
+
+    def stop(self):
+        self.profiler.stop()
+
+    def save(self, path: str):
+        with open(path, "w") as file:
+            file.write(self.profiler.output_html())
+
+PROFILERS = {"cprofile": CProfileSession, "pyinstrument": PyinstrumentSession}
+
+class RequestProfiler:
+    def __init__(self, sample_rate: float, slow_ms: float, directory: str, profiler: str):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.directory = directory
+        self.session_class = PROFILERS[profiler]
+        self.active = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def start(self):
+        """Session de profilage si la requête est tirée au sort, sinon None"""
+        if self.active or random.random() >= self.sample_rate:
+            return None
+        try:
+            session = self.session_class()
+        except ImportError as exc:
+            logger.error("Profiler unavailable, profiling disabled: %s", exc)
+            self.sample_rate = 0
+            return None
+        self.active = True
+        session.start()
+        return session
+
+    def finish(self, session, method: str, route: str, elapsed: float):
+        session.stop()
+        self.active = False
+        if elapsed * 1000 < self.slow_ms:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        path = os.path.join(
+            self.directory,
+            f"{datetime.now():%Y%m%d-%H%M%S-%f}-{method}-{slug}.{session.extension}",
+        )
+        session.save(path)
+        logger.warning("Slow request (%.0f ms) on %s %s profiled: %s", elapsed * 1000, method, route, path)
+
+request_profiler = RequestProfiler(PROFILE_SAMPLE_RATE, PROFILE_SLOW_MS, PROFILE_DIR, PROFILER)
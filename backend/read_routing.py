@@ -0,0 +1,56 @@
+"""
+Routage des sessions: lectures sur les réplicas, écritures sur le primaire
+
+Les handlers GET dépendent de `get_read_db`, les autres de `get_async_db`.
+Après une écriture réussie, l'appelant est servi par le primaire pendant
+READ_YOUR_WRITES_SECONDS pour relire ses propres écritures malgré le retard
+de réplication. Le frontend de production est sur une autre origine (pas de
+cookie fiable): l'appelant est identifié par son token. Les appels anonymes
+(derrière un proxy, l'IP est partagée) restent sur les réplicas. Cette
+mémoire est propre à chaque worker.
+"""
+import hashlib
+import os
+from typing import Optional
+
+from fastapi import Request
+
+from backend.cache import TTLCache
+from backend.database import AsyncSessionLocal, next_replica_session
+
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+READ_YOUR_WRITES_SIZE = int(os.getenv("READ_YOUR_WRITES_SIZE", "10000"))
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+recent_writers = TTLCache(maxsize=READ_YOUR_WRITES_SIZE, ttl=READ_YOUR_WRITES_SECONDS)
+
+def caller_key(request: Request) -> Optional[str]:
+    """Empreinte du token de l'appelant (le token n'est pas conservé en clair)"""
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode()).hexdigest()
+
+def mark_recent_write(request: Request):
+    key = caller_key(request)
+    if key is not None:
+        recent_writers.set(key, True)
+
+def read_session_factory(request: Request):
+    """Primaire si l'appelant vient d'écrire ou sans réplica, sinon réplica suivant"""
+    key = caller_key(request)
+    if key is not None and recent_writers.get(key):
+        return AsyncSessionLocal
+    return next_replica_session() or AsyncSessionLocal
+
+# Dépendance des handlers en lecture seule
+async def get_read_db(request: Request):
+    async with read_session_factory(request)() as db:
+        yield db
+
+async def read_your_writes_middleware(request: Request, call_next):
+    response = await call_next(request)
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        mark_recent_write(request)
+    return response
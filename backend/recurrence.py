@@ -0,0 +1,219 @@
+"""
+Événements récurrents du planning (règles de type RRULE)
+
+Une série est une seule ligne schedule_items: start_time/end_time décrivent
+la première occurrence, recurrence_rule la règle
+(ex: FREQ=WEEKLY;INTERVAL=1;BYDAY=MO,TH;UNTIL=20270630T220000Z) et
+recurrence_timezone le fuseau dans lequel l'heure est conservée (un cours à
+18h reste à 18h après le passage à l'heure d'été).
+
+Les occurrences sont calculées à la lecture, pour la fenêtre demandée
+seulement: le calcul saute directement à la première période utile au lieu
+de parcourir la série depuis son début. Une occurrence modifiée ou annulée
+(exception) est une ligne schedule_item_overrides identifiée par son début
+prévu; les autres occurrences ne sont jamais stockées.
+
+recurrence_end (fin de la dernière occurrence, ou d'une occurrence déplacée
+plus tard, OPEN_END pour une série sans date de fin, NULL pour un événement
+simple) permet de retrouver les séries d'une fenêtre par l'index
+(user_id, recurrence_end).
+"""
+import heapq
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Iterator, Optional
+from zoneinfo import ZoneInfo
+
+from backend.timezones import as_utc
+
+FREQUENCY_DAYS = {"DAILY": 1, "WEEKLY": 7}
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+UNTIL_FORMAT = "%Y%m%dT%H%M%SZ"
+
+# Fin des séries sans date de fin (comparable aux dates sous SQLite comme sous PostgreSQL)
+OPEN_END = datetime(9999, 12, 31, tzinfo=timezone.utc)
+
+@dataclass(frozen=True)
+class Rule:
+    freq: str
+    interval: int = 1
+    # Jours de la semaine (0 = lundi); vide: le jour de la première occurrence
+    by_day: tuple = ()
+    until: Optional[datetime] = None
+
+    @classmethod
+    def parse(cls, text: str) -> "Rule":
+        parts = dict(part.split("=", 1) for part in text.split(";") if part)
+        if parts.get("FREQ") not in FREQUENCY_DAYS:
+            raise ValueError(f"Unsupported recurrence frequency: {parts.get('FREQ')}")
+        by_day = tuple(sorted(WEEKDAYS.index(day) for day in parts["BYDAY"].split(","))) if "BYDAY" in parts else ()
+        until = datetime.strptime(parts["UNTIL"], UNTIL_FORMAT).replace(tzinfo=timezone.utc) if "UNTIL" in parts else None
+        return cls(parts["FREQ"], int(parts.get("INTERVAL", "1")), by_day, until)
+
+    def to_text(self) -> str:
+        parts = [f"FREQ={self.freq}", f"INTERVAL={self.interval}"]
+        if self.by_day:
+            parts.append("BYDAY=" + ",".join(WEEKDAYS[day] for day in self.by_day))
+        if self.until is not None:
+            parts.append("UNTIL=" + self.until.strftime(UNTIL_FORMAT))
+        return ";".join(parts)
+
+    @classmethod
+    def from_schema(cls, recurrence: dict) -> "Rule":
+        return cls(
+            recurrence["freq"].upper(),
+            recurrence["interval"],
+            tuple(sorted({WEEKDAYS.index(day) for day in recurrence["by_day"]})),
+            as_utc(recurrence["until"]) if recurrence.get("until") else None,
+        )
+
+    def to_schema(self, zone_name: str) -> dict:
+        return {
+            "freq": self.freq.lower(),
+            "interval": self.interval,
+            "by_day": [WEEKDAYS[day] for day in self.by_day],
+            "until": self.until,
+            "timezone": zone_name,
+        }
+
+class Series:
+    """Règle d'une série ancrée sur sa première occurrence"""
+
+    def __init__(self, rule: Rule, first_start: datetime, first_end: datetime, zone_name: str):
+        self.rule = rule
+        self.zone = ZoneInfo(zone_name)
+        self.first_start = as_utc(first_start)
+        self.duration = as_utc(first_end) - self.first_start
+        local = self.first_start.astimezone(self.zone)
+        self.first_date = local.date()
+        self.wall_time = local.time()
+        self.period_days = FREQUENCY_DAYS[rule.freq] * rule.interval
+        if rule.freq == "WEEKLY":
+            # Périodes comptées à partir du lundi de la première semaine
+            self.anchor = self.first_date - timedelta(days=self.first_date.weekday())
+            self.offsets = rule.by_day or (self.first_date.weekday(),)
+        else:
+            self.anchor = self.first_date
+            self.offsets = (0,)
+
+    def _start_on(self, day: date) -> datetime:
+        return datetime.combine(day, self.wall_time, self.zone).astimezone(timezone.utc)
+
+    def starts(self, after: Optional[datetime] = None) -> Iterator[datetime]:
+        """Débuts (UTC) des occurrences >= `after`, dans l'ordre; sans fin si la règle n'en a pas"""
+        period = 0
+        if after is not None:
+            # Saut direct à la période de `after` (un jour de marge pour le décalage horaire)
+            day = after.astimezone(self.zone).date() - timedelta(days=1)
+            period = max(0, (day - self.anchor).days // self.period_days)
+        while True:
+            base = self.anchor + timedelta(days=period * self.period_days)
+            for offset in self.offsets:
+                day = base + timedelta(days=offset)
+                if day < self.first_date:
+                    continue
+                start = self._start_on(day)
+                if self.rule.until is not None and start > self.rule.until:
+                    return
+                if after is None or start >= after:
+                    yield start
+            period += 1
+
+    def between(self, start: Optional[datetime], end: Optional[datetime]) -> Iterator[datetime]:
+        """Débuts des occurrences qui chevauchent [start, end)"""
+        after = start - self.duration + timedelta(microseconds=1) if start is not None else None
+        for occurrence in self.starts(after):
+            if end is not None and occurrence >= end:
+                return
+            yield occurrence
+
+    def is_occurrence(self, value: datetime) -> bool:
+        value = as_utc(value)
+        return next(self.starts(value), None) == value
+
+    def end(self) -> datetime:
+        """Fin de la dernière occurrence, OPEN_END sans date de fin"""
+        if self.rule.until is None:
+            return OPEN_END
+        last = self.first_start
+        for last in self.starts(self.rule.until - timedelta(days=self.period_days + 1)):
+            pass
+        return last + self.duration
+
+def series_columns(recurrence: Optional[dict], start: datetime, end: datetime) -> dict:
+    """Colonnes de récurrence d'un événement à partir du schéma `recurrence` (None: événement simple)"""
+    if recurrence is None:
+        return {"recurrence_rule": None, "recurrence_timezone": None, "recurrence_end": None}
+    rule = Rule.from_schema(recurrence)
+    return {
+        "recurrence_rule": rule.to_text(),
+        "recurrence_timezone": recurrence["timezone"],
+        "recurrence_end": Series(rule, start, end, recurrence["timezone"]).end(),
+    }
+
+def series_of(item) -> Series:
+    return Series(Rule.parse(item.recurrence_rule), item.start_time, item.end_time, item.recurrence_timezone)
+
+OCCURRENCE_FIELDS = ("id", "user_id", "title", "description", "course_id", "reminder_text", "is_teacher_view", "created_at")
+OVERRIDE_FIELDS = ("title", "description", "reminder_text")
+
+def occurrence(item, start: datetime, end: datetime, occurrence_start: Optional[datetime] = None,
+               recurrence: Optional[dict] = None, override=None) -> dict:
+    """Occurrence d'un événement (simple ou série), éventuellement modifiée par `override`"""
+    values = {name: getattr(item, name) for name in OCCURRENCE_FIELDS}
+    values.update(
+        start_time=start,
+        end_time=end,
+        occurrence_start=occurrence_start,
+        recurrence=recurrence,
+    )
+    if override is not None:
+        for name in OVERRIDE_FIELDS:
+            if getattr(override, name) is not None:
+                values[name] = getattr(override, name)
+    return values
+
+def moved_interval(series: Series, occurrence_start: datetime, override) -> tuple:
+    """Horaire (UTC) d'une occurrence modifiée; champs absents: ceux de la série"""
+    start = as_utc(override.start_time) if override.start_time is not None else occurrence_start
+    end = as_utc(override.end_time) if override.end_time is not None else start + series.duration
+    return start, end
+
+def series_end(item, overrides: Iterable) -> datetime:
+    """
+    recurrence_end de la série `item`: fin de sa dernière occurrence, ou plus
+    tard si une occurrence a été déplacée au-delà
+    """
+    series = series_of(item)
+    end = series.end()
+    for override in overrides:
+        occurrence_start = as_utc(override.occurrence_start)
+        if not override.cancelled and series.is_occurrence(occurrence_start):
+            end = max(end, moved_interval(series, occurrence_start, override)[1])
+    return end
+
+def expand(item, overrides: Iterable, start: Optional[datetime], end: Optional[datetime]) -> Iterator[dict]:
+    """
+    Occurrences de la série `item` qui chevauchent [start, end), triées par
+    début; `overrides` sont ses modifications (toutes, elles sont rares)
+    """
+    series = series_of(item)
+    recurrence = item.recurrence
+    by_start = {as_utc(override.occurrence_start): override for override in overrides}
+
+    def regular():
+        for occurrence_start in series.between(start, end):
+            if occurrence_start not in by_start:
+                yield occurrence(item, occurrence_start, occurrence_start + series.duration, occurrence_start, recurrence)
+
+    # Occurrences modifiées: leur nouvel horaire peut entrer dans la fenêtre ou en sortir
+    modified = []
+    for occurrence_start, override in by_start.items():
+        if override.cancelled or not series.is_occurrence(occurrence_start):
+            continue
+        new_start, new_end = moved_interval(series, occurrence_start, override)
+        if (end is None or new_start < end) and (start is None or new_end > start):
+            modified.append(occurrence(item, new_start, new_end, occurrence_start, recurrence, override))
+    modified.sort(key=lambda value: value["start_time"])
+
+    return heapq.merge(regular(), modified, key=lambda value: value["start_time"])
@@ -0,0 +1,227 @@
+"""
+Cache des réponses JSON du catalogue public (instruments, cours, marketplace)
+
+Les réponses sont sérialisées une seule fois et servies telles quelles
+(octets JSON). Chaque entrée appartient à un tag ("courses", "marketplace"...)
+et mémorise la génération du tag au moment de la lecture en base. Les
+endpoints d'écriture incrémentent la génération de leur tag: toutes les
+entrées antérieures deviennent invalides, y compris celles calculées pendant
+l'écriture, sans devoir lister les clés.
+
+Avec des réplicas (DATABASE_READ_URL), une lecture juste après une écriture
+peut encore voir l'ancien état: pendant RESPONSE_CACHE_SETTLE_SECONDS après
+une invalidation, les réponses sont calculées mais pas mises en cache, pour
+ne pas figer une donnée périmée sous la nouvelle génération.
+
+Backends (RESPONSE_CACHE_URL):
+    memory://          LRU avec expiration, propre à chaque worker (défaut);
+                       générations et fenêtre d'invalidation aussi: une
+                       écriture n'invalide que le worker qui l'a reçue, les
+                       autres servent au plus RESPONSE_CACHE_TTL secondes de
+                       données périmées. Avec plusieurs workers
+                       (backend.serve), préférer Redis
+    redis://host:6379  partagé entre workers (Redis ou compatible: Valkey,
+                       KeyDB...); nécessite le paquet `redis`
+    none://            désactivé
+"""
+import logging
+import os
+from typing import Any, Optional, Sequence
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+
+from backend.cache import TTLCache
+from backend.database import DATABASE_READ_URLS
+from backend.serialization import JSON_MEDIA_TYPE, dump_json
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL", "memory://")
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+RESPONSE_CACHE_PREFIX = os.getenv("RESPONSE_CACHE_PREFIX", "gde:response:")
+# Délai de réplication couvert après une invalidation (0 sans réplica)
+RESPONSE_CACHE_SETTLE_SECONDS = int(os.getenv("RESPONSE_CACHE_SETTLE_SECONDS", "5" if DATABASE_READ_URLS else "0"))
+
+# Tags invalidés par les endpoints d'écriture
+INSTRUMENTS = "instruments"
+COURSES = "courses"
+MARKETPLACE = "marketplace"
+
+class MemoryBackend:
+    """Backend en mémoire: mêmes opérations que le sous-ensemble Redis utilisé"""
+
+    def __init__(self, maxsize: int):
+        self.entries = TTLCache(maxsize=maxsize, ttl=RESPONSE_CACHE_TTL)
+        self.counters: dict[str, int] = {}
+
+    async def mget(self, keys: Sequence[str]) -> list:
+        return [
+            self.counters.get(key) if key in self.counters else self.entries.get(key)
+            for key in keys
+        ]
+
+    async def set(self, key: str, value: bytes, ex: int):
+        self.entries.set(key, value, ttl=ex)
+
+    async def incr(self, key: str) -> int:
+        self.counters[key] = self.counters.get(key, 0) + 1
+        return self.counters[key]
+
+    async def close(self):
+        self.entries.clear()
+
+class DisabledBackend:
+    async def mget(self, keys: Sequence[str]) -> list:
+        return [None] * len(keys)
+
+    async def set(self, key: str, value: bytes, ex: int):
+        pass
+
+    async def incr(self, key: str) -> int:
+        return 0
+
+    async def close(self):
+        pass
+
+class RedisBackend:
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_URL uses Redis but the 'redis' package is not installed")
+        self.client = redis.from_url(url)
+
+    async def mget(self, keys: Sequence[str]) -> list:
+        return await self.client.mget(keys)
+
+    async def set(self, key: str, value: bytes, ex: int):
+        await self.client.set(key, value, ex=ex)
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+    async def close(self):
+        await self.client.aclose()
+
+def create_backend(url: str):
+    scheme = url.split("://", 1)[0]
+    if scheme == "memory":
+        return MemoryBackend(RESPONSE_CACHE_SIZE)
+    if scheme == "none":
+        return DisabledBackend()
+    if scheme in ("redis", "rediss", "unix"):
+        return RedisBackend(url)
+    raise RuntimeError(f"Unsupported RESPONSE_CACHE_URL scheme: {scheme}")
+
+def json_response(body: bytes, cache_status: str) -> Response:
+    return Response(content=body, media_type=JSON_MEDIA_TYPE, headers={"X-Cache": cache_status})
+
+class CacheEntry:
+    """Résultat d'une recherche: réponse en cache, ou de quoi stocker la nouvelle"""
+
+    def __init__(self, cache: "ResponseCache", key: str, generation: int, body: Optional[bytes],
+                 cacheable: bool = True):
+        self.cache = cache
+        self.key = key
+        self.generation = generation
+        self.body = body
+        # Faux juste après une invalidation: la lecture a pu viser un réplica en retard
+        self.cacheable = cacheable
+
+    @property
+    def response(self) -> Optional[Response]:
+        if self.body is None:
+            return None
+        return json_response(self.body, "HIT")
+
+    async def store(self, schema: Any, data: Any) -> Response:
+        """Sérialise `data` selon `schema` (le response_model de la route) et le met en cache"""
+        body = dump_json(schema, data)
+        if self.cacheable:
+            await self.cache.save(self.key, self.generation, body)
+        return json_response(body, "MISS")
+
+class ResponseCache:
+    def __init__(self, backend, ttl: int = RESPONSE_CACHE_TTL, prefix: str = RESPONSE_CACHE_PREFIX,
+                 settle_seconds: int = RESPONSE_CACHE_SETTLE_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+        self.settle_seconds = settle_seconds
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def generation_key(self, tag: str) -> str:
+        return f"{self.prefix}generation:{tag}"
+
+    def settling_key(self, tag: str) -> str:
+        return f"{self.prefix}settling:{tag}"
+
+    def request_key(self, tag: str, request: Request) -> str:
+        # Paramètres triés: ?a=1&b=2 et ?b=2&a=1 partagent la même entrée
+        query = urlencode(sorted(request.query_params.multi_items()))
+        return f"{self.prefix}{tag}:{request.url.path}?{query}"
+
+    async def lookup(self, tag: str, request: Request) -> CacheEntry:
+        """Génération courante du tag, fenêtre d'invalidation et entrée en cache, en un seul aller-retour"""
+        key = self.request_key(tag, request)
+        try:
+            generation, entry, settling = await self.backend.mget(
+                [self.generation_key(tag), key, self.settling_key(tag)]
+            )
+        except Exception:
+            # Un backend indisponible ne doit pas rendre le catalogue indisponible
+            logger.warning("Response cache lookup failed", exc_info=True)
+            self.errors += 1
+            return CacheEntry(self, key, -1, None)
+
+        generation = int(generation or 0)
+        body = None
+        if entry is not None:
+            stored_generation, _, stored_body = entry.partition(b"\n")
+            if int(stored_generation) == generation:
+                body = stored_body
+        if body is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return CacheEntry(self, key, generation, body, cacheable=settling is None)
+
+    async def save(self, key: str, generation: int, body: bytes):
+        if generation < 0:
+            return
+        try:
+            await self.backend.set(key, str(generation).encode() + b"\n" + body, ex=self.ttl)
+        except Exception:
+            logger.warning("Response cache store failed", exc_info=True)
+            self.errors += 1
+
+    async def invalidate(self, *tags: str):
+        """À appeler après le commit d'une écriture touchant ces tags"""
+        for tag in tags:
+            try:
+                await self.backend.incr(self.generation_key(tag))
+                if self.settle_seconds > 0:
+                    await self.backend.set(self.settling_key(tag), b"1", ex=self.settle_seconds)
+            except Exception:
+                logger.warning("Response cache invalidation failed for %s", tag, exc_info=True)
+                self.errors += 1
+
+    def stats(self) -> dict:
+        stats = {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
+        if isinstance(self.backend, MemoryBackend):
+            stats["size"] = len(self.backend.entries)
+        return stats
+
+    async def close(self):
+        await self.backend.close()
+
+response_cache = ResponseCache(create_backend(RESPONSE_CACHE_URL))
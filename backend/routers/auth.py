@@ -1,12 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session, raiseload, selectinload
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 import jwt
-from passlib.context import CryptContext
+import os
 
-from backend.database import get_db
+from backend.cache import TTLCache
+from backend.database import get_async_db
+from backend.hashing import password_hasher, get_pwd_context, PoolSaturatedError
 from backend.models import User, RoleEnum
 from backend.schemas import UserCreate, UserLogin, UserResponse, Token
 from backend import models
@@ -18,15 +23,91 @@ SECRET_KEY = "votre-clé-secrète-super-sécurisée-à-changer-en-production"  #
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 heures
 
-# Configuration du hachage de mot de passe
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
+
+# Cache des utilisateurs authentifiés, indexé par le sujet du token (email)
+# Chaque worker a son propre cache: le TTL borne la durée d'une donnée périmée
+# quand la modification a été faite par un autre worker
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+principal_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Informations minimales sur l'utilisateur authentifié, sans session ORM"""
+    id: int
+    email: str
+    role: RoleEnum
+    is_active: bool
+    instrument_ids: tuple[int, ...]
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            role=user.role,
+            is_active=user.is_active,
+            instrument_ids=tuple(inst.id for inst in user.instruments),
+        )
+
+def invalidate_user_cache(email: str):
+    principal_cache.delete(email)
+
+# Emails à retirer du cache au commit de la session (collectés au flush)
+PENDING_INVALIDATIONS = "invalidated_user_emails"
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _collect_cached_user(mapper, connection, target):
+    # Déclenché aussi quand seule la liste des instruments change; l'ancien
+    # email d'un utilisateur renommé est aussi retiré
+    emails = {target.email, *inspect(target).attrs.email.history.deleted}
+    session = object_session(target)
+    if session is None:
+        for email in emails:
+            invalidate_user_cache(email)
+    else:
+        session.info.setdefault(PENDING_INVALIDATIONS, set()).update(emails)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_cached_users(session):
+    # Après le commit seulement: invalidé au flush, le cache pourrait être
+    # rempli à nouveau par une requête concurrente avant le commit
+    for email in session.info.pop(PENDING_INVALIDATIONS, ()):
+        invalidate_user_cache(email)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_cached_user_invalidations(session):
+    session.info.pop(PENDING_INVALIDATIONS, None)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+def hashing_unavailable(exc: PoolSaturatedError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service busy, please retry",
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Vérifie le mot de passe dans le pool bcrypt sans bloquer la boucle d'événements"""
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except PoolSaturatedError as exc:
+        raise hashing_unavailable(exc)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hache le mot de passe dans le pool bcrypt sans bloquer la boucle d'événements"""
+    try:
+        return await password_hasher.hash(password)
+    except PoolSaturatedError as exc:
+        raise hashing_unavailable(exc)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -38,12 +119,16 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+# Instruments chargés en une requête supplémentaire pour UserResponse
+USER_LOAD_OPTIONS = (selectinload(User.instruments), raiseload("*"))
+
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+def get_token_subject(token: str = Depends(oauth2_scheme)) -> str:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -51,14 +136,45 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise credentials_exception
     except jwt.PyJWTError:
         raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
+    return email
+
+async def load_user(db: AsyncSession, email: str) -> Optional[User]:
+    # Les instruments sont chargés immédiatement: pas de lazy load en mode async
+    result = await db.execute(
+        select(User).options(*USER_LOAD_OPTIONS).where(User.email == email)
+    )
+    return result.scalars().first()
+
+async def get_current_user(email: str = Depends(get_token_subject), db: AsyncSession = Depends(get_async_db)):
+    """Retourne l'objet User complet (pour les endpoints qui le modifient ou le sérialisent)"""
+    user = await load_user(db, email)
     if user is None:
         raise credentials_exception
+    principal_cache.set(email, CurrentUser.from_user(user))
     return user
 
+async def get_current_principal(email: str = Depends(get_token_subject), db: AsyncSession = Depends(get_async_db)):
+    """Retourne l'utilisateur authentifié depuis le cache, sans requête dans le cas courant"""
+    principal = principal_cache.get(email)
+    if principal is None:
+        user = await load_user(db, email)
+        if user is None:
+            raise credentials_exception
+        principal = CurrentUser.from_user(user)
+        principal_cache.set(email, principal)
+    return principal
+
+async def get_optional_principal(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> Optional[CurrentUser]:
+    """Utilisateur authentifié, ou None sans token (un token invalide reste refusé)"""
+    if token is None:
+        return None
+    return await get_current_principal(get_token_subject(token), db)
+
 def require_role(required_roles: list[RoleEnum]):
-    def role_checker(current_user: User = Depends(get_current_user)):
+    def role_checker(current_user: CurrentUser = Depends(get_current_principal)):
         if current_user.role not in required_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -68,63 +184,68 @@ def require_role(required_roles: list[RoleEnum]):
     return role_checker
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Vérifier si l'email existe déjà
-    db_user = db.query(User).filter(User.email == user_data.email).first()
-    if db_user:
+    result = await db.execute(select(User).where(User.email == user_data.email))
+    if result.scalars().first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
-    
+
     # Vérifier si le username existe déjà
-    db_user = db.query(User).filter(User.username == user_data.username).first()
-    if db_user:
+    result = await db.execute(select(User).where(User.username == user_data.username))
+    if result.scalars().first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already taken"
         )
-    
+
     # Créer le nouvel utilisateur
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     db_user = User(
         email=user_data.email,
         username=user_data.username,
         hashed_password=hashed_password,
         first_name=user_data.first_name,
         last_name=user_data.last_name,
-        role=user_data.role
+        role=user_data.role,
+        instruments=[]
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
+    await db.commit()
+    await db.refresh(db_user, attribute_names=["created_at", "is_active"])
+
     return db_user
 
 @router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     # Chercher l'utilisateur par email (form_data.username contient l'email)
-    user = db.query(User).filter(User.email == form_data.username).first()
-    
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    result = await db.execute(
+        select(User).options(*USER_LOAD_OPTIONS).where(User.email == form_data.username)
+    )
+    user = result.scalars().first()
+
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user"
         )
-    
+
     # Créer le token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.email}, expires_delta=access_token_expires
     )
-    
+    principal_cache.set(user.email, CurrentUser.from_user(user))
+
     return {
         "access_token": access_token,
         "token_type": "bearer",
@@ -139,34 +260,34 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 async def add_instrument_to_user(
     instrument_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     from backend.models import Instrument
-    
-    instrument = db.query(Instrument).filter(Instrument.id == instrument_id).first()
+
+    instrument = await db.get(Instrument, instrument_id)
     if not instrument:
         raise HTTPException(status_code=404, detail="Instrument not found")
-    
+
     if instrument not in current_user.instruments:
         current_user.instruments.append(instrument)
-        db.commit()
-    
+        await db.commit()
+
     return {"message": "Instrument added successfully"}
 
 @router.delete("/me/instruments/{instrument_id}")
 async def remove_instrument_from_user(
     instrument_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     from backend.models import Instrument
-    
-    instrument = db.query(Instrument).filter(Instrument.id == instrument_id).first()
+
+    instrument = await db.get(Instrument, instrument_id)
     if not instrument:
         raise HTTPException(status_code=404, detail="Instrument not found")
-    
+
     if instrument in current_user.instruments:
         current_user.instruments.remove(instrument)
-        db.commit()
-    
+        await db.commit()
+
     return {"message": "Instrument removed successfully"}
@@ -1,99 +1,187 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-
-from backend.database import get_db
-from backend.models import Course, Lesson, Instrument, Enrollment, User
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, raiseload
+from typing import List, Optional
+
+from backend.conditional import ConditionalGetRoute
+from backend.database import get_async_db
+from backend.read_routing import get_read_db
+from backend.bulk_import import COURSE_IMPORT, LESSON_IMPORT, format_for, import_rows, parse_rows
+from backend.models import Course, Lesson, Instrument, Enrollment, User, RoleEnum
 from backend.schemas import (
     CourseResponse, CourseCreate,
     LessonResponse, LessonCreate,
     InstrumentResponse, InstrumentCreate,
-    EnrollmentResponse, EnrollmentCreate
+    EnrollmentResponse, EnrollmentCreate,
+    ImportReport, Page
+)
+from backend.routers.auth import CurrentUser, get_current_principal, require_role
+from backend.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate
+from backend.response_cache import COURSES, INSTRUMENTS, response_cache
+from backend.serialization import model_response
+
+router = APIRouter(route_class=ConditionalGetRoute)
+
+# Relations chargées pour chaque schéma de réponse, en un nombre constant de requêtes.
+# raiseload("*") transforme tout chargement implicite oublié (N+1) en erreur.
+COURSE_LOAD_OPTIONS = (joinedload(Course.instrument), raiseload("*"))
+ENROLLMENT_LOAD_OPTIONS = (
+    joinedload(Enrollment.course).joinedload(Course.instrument),
+    raiseload("*"),
 )
-from backend.routers.auth import get_current_user
-
-router = APIRouter()
 
 # ========== INSTRUMENTS ==========
 
-@router.get("/instruments", response_model=List[InstrumentResponse])
-async def get_instruments(db: Session = Depends(get_db)):
-    instruments = db.query(Instrument).all()
-    return instruments
+@router.get("/instruments", response_model=Page[InstrumentResponse])
+async def get_instruments(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    cached = await response_cache.lookup(INSTRUMENTS, request)
+    if cached.response:
+        return cached.response
+
+    page = await paginate(
+        db, select(Instrument), (Instrument.created_at, Instrument.id), limit, cursor
+    )
+    return await cached.store(Page[InstrumentResponse], page)
 
 @router.post("/instruments", response_model=InstrumentResponse, status_code=status.HTTP_201_CREATED)
 async def create_instrument(
     instrument: InstrumentCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_instrument = Instrument(**instrument.dict())
+    db_instrument = Instrument(**instrument.model_dump())
     db.add(db_instrument)
-    db.commit()
-    db.refresh(db_instrument)
+    await db.commit()
+    await response_cache.invalidate(INSTRUMENTS)
+    await db.refresh(db_instrument)
     return db_instrument
 
 # ========== COURSES ==========
 
-@router.get("/", response_model=List[CourseResponse])
-async def get_all_courses(db: Session = Depends(get_db)):
-    courses = db.query(Course).all()
-    return courses
+@router.get("/", response_model=Page[CourseResponse])
+async def get_all_courses(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    cached = await response_cache.lookup(COURSES, request)
+    if cached.response:
+        return cached.response
+
+    page = await paginate(
+        db,
+        select(Course).options(*COURSE_LOAD_OPTIONS),
+        (Course.created_at, Course.id),
+        limit,
+        cursor
+    )
+    return await cached.store(Page[CourseResponse], page)
 
 @router.get("/my-courses", response_model=List[CourseResponse])
 async def get_my_courses(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Retourne les cours selon les instruments de l'utilisateur"""
-    if not current_user.instruments:
-        return []
-    
-    instrument_ids = [inst.id for inst in current_user.instruments]
-    courses = db.query(Course).filter(Course.instrument_id.in_(instrument_ids)).all()
-    return courses
+    if not current_user.instrument_ids:
+        return model_response(List[CourseResponse], [])
+
+    result = await db.execute(
+        select(Course)
+        .options(*COURSE_LOAD_OPTIONS)
+        .where(Course.instrument_id.in_(current_user.instrument_ids))
+    )
+    return model_response(List[CourseResponse], result.scalars().all())
+
+# Déclaré avant /{course_id} pour ne pas être capturé par cette route
+@router.get("/my-enrollments", response_model=Page[EnrollmentResponse])
+async def get_my_enrollments(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Retourne les inscriptions de l'utilisateur"""
+    page = await paginate(
+        db,
+        select(Enrollment)
+        .options(*ENROLLMENT_LOAD_OPTIONS)
+        .where(Enrollment.student_id == current_user.id),
+        (Enrollment.enrolled_at, Enrollment.id),
+        limit,
+        cursor
+    )
+    return model_response(Page[EnrollmentResponse], page)
 
 @router.get("/{course_id}", response_model=CourseResponse)
-async def get_course(course_id: int, db: Session = Depends(get_db)):
-    course = db.query(Course).filter(Course.id == course_id).first()
+async def get_course(request: Request, course_id: int, db: AsyncSession = Depends(get_read_db)):
+    cached = await response_cache.lookup(COURSES, request)
+    if cached.response:
+        return cached.response
+
+    course = await db.get(Course, course_id, options=COURSE_LOAD_OPTIONS)
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
-    return course
+    return await cached.store(CourseResponse, course)
 
 @router.post("/", response_model=CourseResponse, status_code=status.HTTP_201_CREATED)
 async def create_course(
     course: CourseCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_course = Course(**course.dict())
+    db_course = Course(**course.model_dump())
     db.add(db_course)
-    db.commit()
-    db.refresh(db_course)
+    await db.commit()
+    await response_cache.invalidate(COURSES)
+    await db.refresh(db_course, attribute_names=["created_at", "instrument"])
     return db_course
 
+@router.post("/bulk", response_model=ImportReport)
+async def bulk_import_courses(
+    request: Request,
+    current_user: CurrentUser = Depends(require_role([RoleEnum.ADMIN, RoleEnum.TEACHER])),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Import en masse de cours: tableau JSON, NDJSON ou CSV selon le Content-Type"""
+    fmt = format_for(request.headers.get("content-type"))
+    report = await import_rows(db, COURSE_IMPORT, parse_rows(request.stream(), fmt))
+    if report["inserted"]:
+        await response_cache.invalidate(COURSES)
+    return report
+
 # ========== LESSONS ==========
 
 @router.get("/{course_id}/lessons", response_model=List[LessonResponse])
 async def get_course_lessons(
     course_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Retourne les leçons d'un cours (avec partitions, historique, accords, etc.)"""
-    course = db.query(Course).filter(Course.id == course_id).first()
+    course = await db.get(Course, course_id)
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
-    
-    lessons = db.query(Lesson).filter(Lesson.course_id == course_id).order_by(Lesson.order).all()
-    return lessons
+
+    result = await db.execute(
+        select(Lesson).where(Lesson.course_id == course_id).order_by(Lesson.order)
+    )
+    return model_response(List[LessonResponse], result.scalars().all())
 
 @router.get("/lessons/{lesson_id}", response_model=LessonResponse)
 async def get_lesson(
     lesson_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Retourne une leçon avec partitions, description, historique de la chanson, aide sur les accords"""
-    lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
+    lesson = await db.get(Lesson, lesson_id)
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
     return lesson
@@ -101,46 +189,64 @@ async def get_lesson(
 @router.post("/lessons", response_model=LessonResponse, status_code=status.HTTP_201_CREATED)
 async def create_lesson(
     lesson: LessonCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_lesson = Lesson(**lesson.dict())
+    db_lesson = Lesson(**lesson.model_dump())
     db.add(db_lesson)
-    db.commit()
-    db.refresh(db_lesson)
+    await db.commit()
+    await db.refresh(db_lesson)
     return db_lesson
 
+@router.post("/lessons/bulk", response_model=ImportReport)
+async def bulk_import_lessons(
+    request: Request,
+    current_user: CurrentUser = Depends(require_role([RoleEnum.ADMIN, RoleEnum.TEACHER])),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Import en masse de leçons: tableau JSON, NDJSON ou CSV selon le Content-Type
+    - Un professeur n'importe que dans ses cours (les autres course_id sont rejetés)
+    """
+    fmt = format_for(request.headers.get("content-type"))
+    owner_id = None if current_user.role == RoleEnum.ADMIN else current_user.id
+    return await import_rows(db, LESSON_IMPORT, parse_rows(request.stream(), fmt), owner_id=owner_id)
+
 # ========== ENROLLMENTS ==========
 
 @router.post("/enroll", response_model=EnrollmentResponse, status_code=status.HTTP_201_CREATED)
 async def enroll_in_course(
     enrollment: EnrollmentCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Inscription à un cours"""
     # Vérifier si déjà inscrit
-    existing = db.query(Enrollment).filter(
-        Enrollment.student_id == current_user.id,
-        Enrollment.course_id == enrollment.course_id
-    ).first()
-    
-    if existing:
+    result = await db.execute(
+        select(Enrollment).where(
+            Enrollment.student_id == current_user.id,
+            Enrollment.course_id == enrollment.course_id
+        )
+    )
+    if result.scalars().first():
         raise HTTPException(status_code=400, detail="Already enrolled in this course")
-    
+
     db_enrollment = Enrollment(
         student_id=current_user.id,
         course_id=enrollment.course_id
     )
     db.add(db_enrollment)
-    db.commit()
-    db.refresh(db_enrollment)
-    return db_enrollment
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Inscription concurrente: l'index unique (student_id, course_id) a refusé le doublon
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Already enrolled in this course")
 
-@router.get("/my-enrollments", response_model=List[EnrollmentResponse])
-async def get_my_enrollments(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Retourne les inscriptions de l'utilisateur"""
-    enrollments = db.query(Enrollment).filter(Enrollment.student_id == current_user.id).all()
-    return enrollments
+    # Recharger l'inscription avec son cours et l'instrument du cours
+    result = await db.execute(
+        select(Enrollment)
+        .options(*ENROLLMENT_LOAD_OPTIONS)
+        .where(Enrollment.id == db_enrollment.id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().one()
@@ -1,97 +1,176 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, UploadFile, File
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
 
-from backend.database import get_db
+from backend.conditional import ConditionalGetRoute
+from backend.database import get_async_db
+from backend.read_routing import get_read_db
 from backend.models import MarketplaceItem, User, RoleEnum
-from backend.schemas import MarketplaceItemResponse, MarketplaceItemCreate
-from backend.routers.auth import get_current_user, require_role
+from backend.schemas import MarketplaceItemResponse, MarketplaceItemCreate, Page
+from backend.routers.auth import CurrentUser, require_role
+from backend.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, sort_key, sort_value
+from backend.response_cache import MARKETPLACE, response_cache
+from backend.search import MARKETPLACE_ITEM, matching_ids
 
-router = APIRouter()
+router = APIRouter(route_class=ConditionalGetRoute)
 
-@router.get("/", response_model=List[MarketplaceItemResponse])
+class MarketplaceSort(str, Enum):
+    NEWEST = "newest"
+    PRICE_ASC = "price_asc"
+    PRICE_DESC = "price_desc"
+
+# Clés de tri (id en dernier pour un ordre total) et sens, servies par les index de la migration 0004
+SORT_KEYS = {
+    MarketplaceSort.NEWEST: ((MarketplaceItem.created_at, MarketplaceItem.id), True),
+    MarketplaceSort.PRICE_ASC: ((MarketplaceItem.price, MarketplaceItem.created_at, MarketplaceItem.id), False),
+    MarketplaceSort.PRICE_DESC: ((MarketplaceItem.price, MarketplaceItem.created_at, MarketplaceItem.id), True),
+}
+
+# Au-delà, le filtre texte reste une sous-requête
+FEW_MATCHES = 500
+
+@router.get("/", response_model=Page[MarketplaceItemResponse])
 async def get_marketplace_items(
+    request: Request,
     include_sold: bool = False,
-    db: Session = Depends(get_db)
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    seller_id: Optional[int] = None,
+    q: Optional[str] = Query(None, max_length=200, description="mots du titre ou de la description"),
+    created_after: Optional[datetime] = None,
+    sort: MarketplaceSort = MarketplaceSort.NEWEST,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Retourne tous les objets en vente (non vendus par défaut)"""
-    query = db.query(MarketplaceItem)
-    if not include_sold:
-        query = query.filter(MarketplaceItem.is_sold == False)
-    
-    items = query.order_by(MarketplaceItem.created_at.desc()).all()
-    return items
+    """
+    Retourne les objets en vente (non vendus par défaut), filtrés et triés (plus récents d'abord par défaut)
+    - q (recherche plein texte) ne porte que sur les objets non vendus: incompatible avec include_sold
+    """
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="min_price must not exceed max_price"
+        )
+    # Seuls les objets non vendus sont dans l'index plein texte
+    if q and include_sold:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="include_sold cannot be combined with q: sold items are not searchable"
+        )
+
+    cached = await response_cache.lookup(MARKETPLACE, request)
+    if cached.response:
+        return cached.response
+
+    query = select(MarketplaceItem)
+    if q and (ids := matching_ids(db.bind.dialect.name, q, MARKETPLACE_ITEM)) is not None:
+        # Peu de résultats: ids explicites, lus par clé primaire puis triés
+        # (sans filtre is_sold, qui orienterait SQLite vers l'index de tri);
+        # sinon la sous-requête filtre le parcours de l'index de tri.
+        found = (await db.execute(select(ids.c.ref_id).limit(FEW_MATCHES + 1))).scalars().all()
+        if len(found) <= FEW_MATCHES:
+            query = query.where(MarketplaceItem.id.in_(found))
+        else:
+            query = query.where(MarketplaceItem.is_sold == False, MarketplaceItem.id.in_(select(ids.c.ref_id)))
+    elif not include_sold:
+        query = query.where(MarketplaceItem.is_sold == False)
+    if min_price is not None:
+        query = query.where(MarketplaceItem.price >= min_price)
+    if max_price is not None:
+        query = query.where(MarketplaceItem.price <= max_price)
+    if seller_id is not None:
+        query = query.where(MarketplaceItem.seller_id == seller_id)
+    if created_after is not None:
+        query = query.where(
+            sort_key(MarketplaceItem.created_at) > sort_value(MarketplaceItem.created_at, created_after)
+        )
+
+    order_by, descending = SORT_KEYS[sort]
+    page = await paginate(db, query, order_by, limit, cursor, descending=descending)
+    return await cached.store(Page[MarketplaceItemResponse], page)
 
 @router.get("/{item_id}", response_model=MarketplaceItemResponse)
-async def get_marketplace_item(item_id: int, db: Session = Depends(get_db)):
+async def get_marketplace_item(request: Request, item_id: int, db: AsyncSession = Depends(get_read_db)):
     """Retourne un objet de la marketplace par son ID"""
-    item = db.query(MarketplaceItem).filter(MarketplaceItem.id == item_id).first()
+    cached = await response_cache.lookup(MARKETPLACE, request)
+    if cached.response:
+        return cached.response
+
+    item = await db.get(MarketplaceItem, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
-    return item
+    return await cached.store(MarketplaceItemResponse, item)
 
 @router.post("/", response_model=MarketplaceItemResponse, status_code=status.HTTP_201_CREATED)
 async def create_marketplace_item(
     item: MarketplaceItemCreate,
-    current_user: User = Depends(require_role([RoleEnum.ADMIN])),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(require_role([RoleEnum.ADMIN])),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Créer un objet à vendre (ADMIN uniquement)"""
     db_item = MarketplaceItem(
-        **item.dict(),
+        **item.model_dump(),
         seller_id=current_user.id
     )
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
+    await db.commit()
+    await response_cache.invalidate(MARKETPLACE)
+    await db.refresh(db_item)
     return db_item
 
 @router.put("/{item_id}", response_model=MarketplaceItemResponse)
 async def update_marketplace_item(
     item_id: int,
     item_update: MarketplaceItemCreate,
-    current_user: User = Depends(require_role([RoleEnum.ADMIN])),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(require_role([RoleEnum.ADMIN])),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Modifier un objet à vendre (ADMIN uniquement)"""
-    db_item = db.query(MarketplaceItem).filter(MarketplaceItem.id == item_id).first()
+    db_item = await db.get(MarketplaceItem, item_id)
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found")
-    
-    for key, value in item_update.dict().items():
+
+    for key, value in item_update.model_dump().items():
         setattr(db_item, key, value)
-    
-    db.commit()
-    db.refresh(db_item)
+
+    await db.commit()
+    await response_cache.invalidate(MARKETPLACE)
+    await db.refresh(db_item)
     return db_item
 
 @router.patch("/{item_id}/mark-sold", response_model=MarketplaceItemResponse)
 async def mark_item_as_sold(
     item_id: int,
-    current_user: User = Depends(require_role([RoleEnum.ADMIN])),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(require_role([RoleEnum.ADMIN])),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Marquer un objet comme vendu (ADMIN uniquement)"""
-    db_item = db.query(MarketplaceItem).filter(MarketplaceItem.id == item_id).first()
+    db_item = await db.get(MarketplaceItem, item_id)
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found")
-    
+
     db_item.is_sold = True
-    db.commit()
-    db.refresh(db_item)
+    await db.commit()
+    await response_cache.invalidate(MARKETPLACE)
+    await db.refresh(db_item)
     return db_item
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_marketplace_item(
     item_id: int,
-    current_user: User = Depends(require_role([RoleEnum.ADMIN])),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(require_role([RoleEnum.ADMIN])),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Supprimer un objet de la marketplace (ADMIN uniquement)"""
-    db_item = db.query(MarketplaceItem).filter(MarketplaceItem.id == item_id).first()
+    db_item = await db.get(MarketplaceItem, item_id)
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found")
-    
-    db.delete(db_item)
-    db.commit()
+
+    await db.delete(db_item)
+    await db.commit()
+    await response_cache.invalidate(MARKETPLACE)
     return None
@@ -1,153 +1,473 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime, timedelta
+import heapq
+from itertools import dropwhile, islice
 
-from backend.database import get_db
-from backend.models import ScheduleItem, User, RoleEnum
-from backend.schemas import ScheduleItemResponse, ScheduleItemCreate
-from backend.routers.auth import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional, Union
+from datetime import date, datetime, timedelta, timezone
+
+from backend.bulk_import import SCHEDULE_IMPORT, format_for, import_rows, parse_rows
+from backend.database import get_async_db
+from backend.intervals import clip, free_intervals, merge_intervals, overlap_condition
+from backend.read_routing import get_read_db
+from backend.models import ScheduleItem, ScheduleItemOverride, User, RoleEnum, Course, Enrollment, teacher_courses
+from backend.recurrence import expand, moved_interval, occurrence, series_end, series_of
+from backend.schedule_conflicts import candidate, candidate_of, find_conflicts, load_series, single_items
+from backend.schemas import (
+    FreeBusyResponse, ScheduleConflict, ScheduleConflictReport, ScheduleItemResponse, ScheduleItemCreate,
+    ScheduleOccurrenceUpdate, ImportReport, Page, TeacherStudentResponse, check_duration
+)
+from backend.routers.auth import CurrentUser, get_current_principal
+from backend.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor, paginate
+from backend.serialization import model_response
+from backend.timezones import SCHEDULE_TIMEZONE, as_utc, get_timezone, localize, week_bounds
 
 router = APIRouter()
 
-@router.get("/", response_model=List[ScheduleItemResponse])
+# Fenêtre maximale d'une demande de disponibilités (un mois et plus)
+FREE_BUSY_MAX_DAYS = 62
+
+TZ_DESCRIPTION = f"fuseau IANA des dates sans décalage et des semaines (défaut {SCHEDULE_TIMEZONE})"
+
+CONFLICT_BATCH_MAX = 500
+
+# Paramètre de fenêtre: date et heure, ou jour seul (minuit dans le fuseau `tz`)
+DateOrDatetime = Union[datetime, date]
+
+def resolve_window(start: Optional[DateOrDatetime], end: Optional[DateOrDatetime], tz: Optional[str]):
+    """Bornes `from`/`to` en UTC; une date sans décalage est lue dans le fuseau `tz`"""
+    zone = get_timezone(tz or SCHEDULE_TIMEZONE)
+    start = localize(start, zone) if start is not None else None
+    end = localize(end, zone) if end is not None else None
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must be before 'to'"
+        )
+    return start, end
+
+def occurrences(singles, series: list, start: Optional[datetime], end: Optional[datetime]):
+    """Événements simples (triés par début) et occurrences des séries, fusionnés par (début, id)"""
+    streams = [(occurrence(item, as_utc(item.start_time), as_utc(item.end_time)) for item in singles)]
+    streams += [expand(item, overrides, start, end) for item, overrides in series]
+    return heapq.merge(*streams, key=lambda value: (value["start_time"], value["id"]))
+
+def raise_on_conflict(conflicts: List[dict]):
+    if conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "Schedule conflict",
+                "conflicts": [ScheduleConflict.model_validate(value).model_dump(mode="json") for value in conflicts],
+            }
+        )
+
+@router.get("/", response_model=Page[ScheduleItemResponse])
 async def get_my_schedule(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    start: Optional[DateOrDatetime] = Query(None, alias="from", description="événements se terminant après cette date"),
+    end: Optional[DateOrDatetime] = Query(None, alias="to", description="événements commençant avant cette date"),
+    tz: Optional[str] = Query(None, description=TZ_DESCRIPTION),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Retourne le planning de l'utilisateur connecté
+    - Sans fenêtre: les événements enregistrés (une série = un événement)
+    - Avec from et/ou to: les occurrences qui chevauchent [from, to), séries développées
     - Pour un PROFESSEUR: planning complet avec tous ses cours et élèves
     - Pour un ÉLÈVE: planning personnel avec reminders des sujets à bosser
     """
-    schedule_items = db.query(ScheduleItem).filter(
-        ScheduleItem.user_id == current_user.id
-    ).order_by(ScheduleItem.start_time).all()
-    
-    return schedule_items
+    if start is None and end is None:
+        page = await paginate(
+            db,
+            select(ScheduleItem).where(ScheduleItem.user_id == current_user.id),
+            (ScheduleItem.start_time, ScheduleItem.id),
+            limit,
+            cursor
+        )
+        return model_response(Page[ScheduleItemResponse], page)
+
+    start, end = resolve_window(start, end, tz)
+    singles = single_items([current_user.id], start, end).order_by(ScheduleItem.start_time, ScheduleItem.id)
+    after = None
+    if cursor is not None:
+        after = decode_cursor(cursor)
+        if len(after) != 2 or not isinstance(after[0], datetime) or not isinstance(after[1], int):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        after = (as_utc(after[0]), after[1])
+        singles = singles.where(tuple_(ScheduleItem.start_time, ScheduleItem.id) > after)
+    singles = (await db.execute(singles.limit(limit + 1))).scalars().all()
+    # Les occurrences antérieures au curseur ne sont pas calculées
+    series = await load_series(db, [current_user.id], after[0] if after else start, end)
+
+    merged = occurrences(singles, series, after[0] if after else start, end)
+    if after is not None:
+        merged = dropwhile(lambda value: (value["start_time"], value["id"]) <= after, merged)
+    items = list(islice(merged, limit + 1))
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor([items[-1]["start_time"], items[-1]["id"]])
+    return model_response(Page[ScheduleItemResponse], {"items": items, "next_cursor": next_cursor})
 
 @router.get("/week", response_model=List[ScheduleItemResponse])
 async def get_week_schedule(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    tz: Optional[str] = Query(None, description=TZ_DESCRIPTION),
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Retourne le planning de la semaine en cours"""
-    today = datetime.now()
-    start_of_week = today - timedelta(days=today.weekday())
-    end_of_week = start_of_week + timedelta(days=7)
-    
-    schedule_items = db.query(ScheduleItem).filter(
-        ScheduleItem.user_id == current_user.id,
-        ScheduleItem.start_time >= start_of_week,
-        ScheduleItem.start_time < end_of_week
-    ).order_by(ScheduleItem.start_time).all()
-    
-    return schedule_items
+    """Retourne le planning de la semaine en cours (du lundi au dimanche dans le fuseau `tz`)"""
+    start_of_week, end_of_week = week_bounds(datetime.now(timezone.utc), get_timezone(tz or SCHEDULE_TIMEZONE))
+
+    result = await db.execute(
+        single_items([current_user.id], start_of_week, end_of_week).order_by(ScheduleItem.start_time, ScheduleItem.id)
+    )
+    series = await load_series(db, [current_user.id], start_of_week, end_of_week)
+    items = list(occurrences(result.scalars().all(), series, start_of_week, end_of_week))
+    return model_response(List[ScheduleItemResponse], items)
+
+UPCOMING_COUNT = 10
 
 @router.get("/upcoming", response_model=List[ScheduleItemResponse])
 async def get_upcoming_schedule(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Retourne les prochains événements du planning"""
-    now = datetime.now()
+    now = datetime.now(timezone.utc)
     
-    schedule_items = db.query(ScheduleItem).filter(
-        ScheduleItem.user_id == current_user.id,
-        ScheduleItem.start_time >= now
-    ).order_by(ScheduleItem.start_time).limit(10).all()
-    
-    return schedule_items
+    result = await db.execute(
+        select(ScheduleItem)
+        .where(
+            ScheduleItem.user_id == current_user.id,
+            ScheduleItem.recurrence_end.is_(None),
+            ScheduleItem.start_time >= now
+        )
+        .order_by(ScheduleItem.start_time, ScheduleItem.id)
+        .limit(UPCOMING_COUNT)
+    )
+    series = await load_series(db, [current_user.id], now, None)
+    upcoming = (value for value in occurrences(result.scalars().all(), series, now, None) if value["start_time"] >= now)
+    return model_response(List[ScheduleItemResponse], list(islice(upcoming, UPCOMING_COUNT)))
+
+@router.get("/free-busy", response_model=FreeBusyResponse)
+async def get_free_busy(
+    start: DateOrDatetime = Query(..., alias="from"),
+    end: DateOrDatetime = Query(..., alias="to"),
+    user_ids: List[int] = Query([], alias="user_id", description="défaut: l'utilisateur connecté"),
+    tz: Optional[str] = Query(None, description=TZ_DESCRIPTION),
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Plages occupées de chaque utilisateur et plages libres communes sur [from, to)
+    - Un PROFESSEUR peut interroger ses élèves (inscrits à l'un de ses cours)
+    - Événements simples lus dans l'index (user_id, start_time, end_time),
+      séries développées sur la fenêtre seulement
+    """
+    start, end = resolve_window(start, end, tz)
+    if end - start > timedelta(days=FREE_BUSY_MAX_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Free/busy window cannot exceed {FREE_BUSY_MAX_DAYS} days"
+        )
+    user_ids = list(dict.fromkeys(user_ids)) or [current_user.id]
+
+    others = set(user_ids) - {current_user.id}
+    if others:
+        allowed = set()
+        if current_user.role == RoleEnum.TEACHER:
+            allowed = set((await db.execute(
+                select(Enrollment.student_id)
+                .join(teacher_courses, teacher_courses.c.course_id == Enrollment.course_id)
+                .where(teacher_courses.c.teacher_id == current_user.id, Enrollment.student_id.in_(others))
+            )).scalars())
+        if others - allowed:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not allowed to view the schedule of users: "
+                + ", ".join(str(user_id) for user_id in sorted(others - allowed))
+            )
+
+    result = await db.execute(
+        select(ScheduleItem.user_id, ScheduleItem.start_time, ScheduleItem.end_time)
+        .where(
+            ScheduleItem.user_id.in_(user_ids),
+            ScheduleItem.recurrence_end.is_(None),
+            overlap_condition(ScheduleItem.start_time, ScheduleItem.end_time, start, end),
+        )
+    )
+    intervals = {user_id: [] for user_id in user_ids}
+    for user_id, item_start, item_end in result:
+        intervals[user_id].append((as_utc(item_start), as_utc(item_end)))
+    for item, overrides in await load_series(db, user_ids, start, end):
+        for value in expand(item, overrides, start, end):
+            intervals[item.user_id].append((value["start_time"], value["end_time"]))
+
+    busy = {user_id: merge_intervals(clip(sorted(items), start, end)) for user_id, items in intervals.items()}
+    everyone = merge_intervals(sorted(interval for items in busy.values() for interval in items))
+    return model_response(FreeBusyResponse, {
+        "start": start,
+        "end": end,
+        "users": [
+            {"user_id": user_id, "busy": [{"start": s, "end": e} for s, e in items]}
+            for user_id, items in busy.items()
+        ],
+        "free": [{"start": s, "end": e} for s, e in free_intervals(everyone, start, end)],
+    })
 
 @router.post("/", response_model=ScheduleItemResponse, status_code=status.HTTP_201_CREATED)
 async def create_schedule_item(
     schedule_item: ScheduleItemCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Créer un événement dans le planning"""
+    """
+    Créer un événement dans le planning
+    - 409 si l'utilisateur (ou le professeur du cours lié) est déjà occupé sur ce créneau
+    """
     is_teacher_view = current_user.role == RoleEnum.TEACHER
+    columns = {**schedule_item.columns(), "user_id": current_user.id}
+    (conflicts,) = await find_conflicts(db, [candidate_of(columns)], lock=True)
+    raise_on_conflict(conflicts)
     
-    db_schedule_item = ScheduleItem(
-        **schedule_item.dict(),
-        user_id=current_user.id,
-        is_teacher_view=is_teacher_view
-    )
+    db_schedule_item = ScheduleItem(**columns, is_teacher_view=is_teacher_view)
     db.add(db_schedule_item)
-    db.commit()
-    db.refresh(db_schedule_item)
+    await db.commit()
+    await db.refresh(db_schedule_item)
     return db_schedule_item
 
+@router.post("/bulk", response_model=ImportReport)
+async def bulk_import_schedule(
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Import en masse d'événements dans le planning de l'utilisateur (JSON, NDJSON ou CSV)
+    - Les lignes en conflit (planning existant ou ligne précédente) sont refusées et rapportées
+    """
+    fmt = format_for(request.headers.get("content-type"))
+    extra = {"user_id": current_user.id, "is_teacher_view": current_user.role == RoleEnum.TEACHER}
+    return await import_rows(db, SCHEDULE_IMPORT, parse_rows(request.stream(), fmt), extra)
+
+@router.post("/conflicts", response_model=ScheduleConflictReport)
+async def check_schedule_conflicts(
+    schedule_items: List[ScheduleItemCreate],
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Vérifie un emploi du temps avant import, sans rien enregistrer
+    - Conflits de chaque entrée avec le planning existant (utilisateur et professeurs
+      des cours liés) et avec les autres entrées du lot
+    """
+    if len(schedule_items) > CONFLICT_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot check more than {CONFLICT_BATCH_MAX} items at once"
+        )
+    conflicts = await find_conflicts(db, [candidate_of({**item.columns(), "user_id": current_user.id}) for item in schedule_items])
+    return model_response(ScheduleConflictReport, {
+        "checked": len(schedule_items),
+        "items": [{"index": index, "conflicts": items} for index, items in enumerate(conflicts) if items],
+    })
+
+async def get_own_item(db: AsyncSession, item_id: int, user_id: int) -> ScheduleItem:
+    result = await db.execute(
+        select(ScheduleItem).where(
+            ScheduleItem.id == item_id,
+            ScheduleItem.user_id == user_id
+        )
+    )
+    db_item = result.scalars().first()
+    
+    if not db_item:
+        raise HTTPException(status_code=404, detail="Schedule item not found")
+    return db_item
+
 @router.put("/{item_id}", response_model=ScheduleItemResponse)
 async def update_schedule_item(
     item_id: int,
     schedule_update: ScheduleItemCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Modifier un événement du planning"""
-    db_item = db.query(ScheduleItem).filter(
-        ScheduleItem.id == item_id,
-        ScheduleItem.user_id == current_user.id
-    ).first()
+    """
+    Modifier un événement du planning
+    - Sur une série: modifie toutes ses occurrences (sans `recurrence`, la règle est conservée)
+    - 409 si le nouvel horaire est en conflit (l'événement lui-même n'est pas compté)
+    """
+    db_item = await get_own_item(db, item_id, current_user.id)
     
-    if not db_item:
-        raise HTTPException(status_code=404, detail="Schedule item not found")
+    columns = schedule_update.columns()
+    fields = schedule_update.model_fields_set
+    for key, value in columns.items():
+        if key in fields or (key.startswith("recurrence_") and "recurrence" in fields):
+            setattr(db_item, key, value)
+    series = None
+    if db_item.recurrence_rule is not None:
+        series = series_of(db_item)
+        db_item.recurrence_end = series_end(db_item, await series_overrides(db, db_item.id))
     
-    for key, value in schedule_update.dict(exclude_unset=True).items():
-        setattr(db_item, key, value)
+    (conflicts,) = await find_conflicts(
+        db,
+        [candidate(current_user.id, db_item.course_id, db_item.title, db_item.start_time, db_item.end_time, series)],
+        frozenset({db_item.id}),
+        lock=True
+    )
+    raise_on_conflict(conflicts)
     
-    db.commit()
-    db.refresh(db_item)
+    await db.commit()
+    await db.refresh(db_item)
     return db_item
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_schedule_item(
     item_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Supprimer un événement du planning"""
-    db_item = db.query(ScheduleItem).filter(
-        ScheduleItem.id == item_id,
-        ScheduleItem.user_id == current_user.id
-    ).first()
+    """Supprimer un événement du planning (une série: toutes ses occurrences)"""
+    db_item = await get_own_item(db, item_id, current_user.id)
     
-    if not db_item:
+    await db.execute(delete(ScheduleItemOverride).where(ScheduleItemOverride.schedule_item_id == db_item.id))
+    await db.delete(db_item)
+    await db.commit()
+    return None
+
+async def series_overrides(db: AsyncSession, item_id: int) -> list:
+    # La session n'a pas d'autoflush: une exception tout juste ajoutée doit être comptée
+    await db.flush()
+    result = await db.execute(select(ScheduleItemOverride).where(ScheduleItemOverride.schedule_item_id == item_id))
+    return result.scalars().all()
+
+async def get_series_override(db: AsyncSession, item_id: int, user_id: int, occurrence_start: datetime):
+    """Série de l'utilisateur, occurrence vérifiée, et sa modification existante (ou None)"""
+    db_item = await get_own_item(db, item_id, user_id)
+    if db_item.recurrence_rule is None:
         raise HTTPException(status_code=404, detail="Schedule item not found")
+    series = series_of(db_item)
+    occurrence_start = as_utc(occurrence_start)
+    if not series.is_occurrence(occurrence_start):
+        raise HTTPException(status_code=404, detail="Occurrence not found")
+    result = await db.execute(
+        select(ScheduleItemOverride).where(
+            ScheduleItemOverride.schedule_item_id == db_item.id,
+            ScheduleItemOverride.occurrence_start == occurrence_start
+        )
+    )
+    override = result.scalars().first()
+    if override is None:
+        override = ScheduleItemOverride(schedule_item_id=db_item.id, occurrence_start=occurrence_start)
+        db.add(override)
+    return db_item, series, override
+
+@router.put("/{item_id}/occurrences/{occurrence_start}", response_model=ScheduleItemResponse)
+async def update_occurrence(
+    item_id: int,
+    occurrence_start: datetime,
+    occurrence_update: ScheduleOccurrenceUpdate,
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Modifier une seule occurrence d'une série (identifiée par son début prévu)
+    - Seule l'exception est enregistrée; les champs absents restent ceux de la série
+    - 409 si le nouvel horaire est en conflit
+    """
+    db_item, series, override = await get_series_override(db, item_id, current_user.id, occurrence_start)
+    occurrence_start = as_utc(occurrence_start)
+    
+    override.cancelled = False
+    for key, value in occurrence_update.model_dump(exclude_unset=True).items():
+        setattr(override, key, value)
+    start, end = moved_interval(series, occurrence_start, override)
+    try:
+        check_duration(start, end)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    (conflicts,) = await find_conflicts(
+        db,
+        [candidate(current_user.id, db_item.course_id, override.title or db_item.title, start, end)],
+        frozenset({(db_item.id, occurrence_start)}),
+        lock=True
+    )
+    raise_on_conflict(conflicts)
+    # Une occurrence déplacée au-delà de la fin de la série doit rester visible
+    db_item.recurrence_end = series_end(db_item, await series_overrides(db, db_item.id))
     
-    db.delete(db_item)
-    db.commit()
+    await db.commit()
+    return model_response(
+        ScheduleItemResponse,
+        occurrence(db_item, start, end, occurrence_start, db_item.recurrence, override)
+    )
+
+@router.delete("/{item_id}/occurrences/{occurrence_start}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_occurrence(
+    item_id: int,
+    occurrence_start: datetime,
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Annuler une seule occurrence d'une série"""
+    _, _, override = await get_series_override(db, item_id, current_user.id, occurrence_start)
+    override.cancelled = True
+    await db.commit()
     return None
 
-@router.get("/students", response_model=List[dict])
+@router.get("/students", response_model=Page[TeacherStudentResponse])
 async def get_teacher_students(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    course_id: Optional[int] = None,
+    sort: Literal["enrolled", "progress_asc", "progress_desc"] = "enrolled",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Retourne la liste des élèves d'un professeur (TEACHER uniquement)"""
+    """
+    Retourne la liste des élèves d'un professeur (TEACHER uniquement)
+    - Une seule requête: teacher_courses ⋈ enrollments ⋈ courses ⋈ users
+    - Filtrable par cours, triable par progression
+    """
     if current_user.role != RoleEnum.TEACHER:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only teachers can access student list"
         )
     
-    # Récupérer les cours enseignés par le professeur
-    from backend.models import Enrollment
+    # progress est nullable: NULL compte comme 0 (réponse et curseur de tri)
+    progress = func.coalesce(Enrollment.progress, 0)
+    query = (
+        select(
+            User.id,
+            User.username,
+            User.first_name,
+            User.last_name,
+            User.email,
+            Enrollment.id.label("enrollment_id"),
+            Course.id.label("course_id"),
+            Course.title.label("course"),
+            progress.label("progress"),
+        )
+        .select_from(teacher_courses)
+        .join(Enrollment, Enrollment.course_id == teacher_courses.c.course_id)
+        .join(Course, Course.id == Enrollment.course_id)
+        .join(User, User.id == Enrollment.student_id)
+        .where(teacher_courses.c.teacher_id == current_user.id)
+    )
+    if course_id is not None:
+        query = query.where(teacher_courses.c.course_id == course_id)
     
-    students_data = []
-    for course in current_user.taught_courses:
-        enrollments = db.query(Enrollment).filter(Enrollment.course_id == course.id).all()
-        for enrollment in enrollments:
-            student = enrollment.student
-            students_data.append({
-                "id": student.id,
-                "username": student.username,
-                "first_name": student.first_name,
-                "last_name": student.last_name,
-                "email": student.email,
-                "course": course.title,
-                "progress": enrollment.progress
-            })
+    if sort == "enrolled":
+        order_by = (Enrollment.id,)
+    else:
+        order_by = (progress, Enrollment.id)
     
-    return students_data
+    page = await paginate(
+        db, query, order_by, limit, cursor, descending=(sort == "progress_desc")
+    )
+    return model_response(Page[TeacherStudentResponse], page)
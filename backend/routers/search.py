@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from backend.conditional import ConditionalGetRoute
+from backend.read_routing import get_read_db
+from backend.routers.auth import CurrentUser, get_optional_principal
+from backend.schemas import SearchResults
+from backend.search import LESSON, SEARCH_KINDS, search
+from backend.serialization import model_response
+
+router = APIRouter(route_class=ConditionalGetRoute)
+
+MAX_SEARCH_RESULTS = 50
+
+@router.get("/", response_model=SearchResults)
+async def search_catalogue(
+    q: str = Query(..., min_length=1, max_length=200),
+    kinds: List[str] = Query([], alias="type", description=f"parmi {', '.join(SEARCH_KINDS)}"),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_RESULTS),
+    current_user: Optional[CurrentUser] = Depends(get_optional_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Cours, leçons (utilisateurs connectés) et objets en vente, les plus pertinents d'abord"""
+    unknown = set(kinds) - set(SEARCH_KINDS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown search type: {', '.join(sorted(unknown))}"
+        )
+    kinds = kinds or list(SEARCH_KINDS)
+    if current_user is None:
+        kinds = [kind for kind in kinds if kind != LESSON]
+    return model_response(SearchResults, {"items": await search(db, q, kinds, limit)})
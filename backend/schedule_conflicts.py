@@ -0,0 +1,205 @@
+"""
+Lecture du planning par fenêtre et détection des conflits
+
+Un candidat (événement à créer, modifier ou importer) est en conflit quand
+son propriétaire, ou un professeur du cours lié, a déjà un événement qui le
+chevauche. Les événements existants sont lus par l'index de chevauchement,
+les séries développées sur la fenêtre des candidats seulement, et les paires
+trouvées par balayage (backend.intervals).
+
+Vérification puis écriture: find_conflicts(lock=True) verrouille les lignes
+users des utilisateurs concernés (SELECT ... FOR UPDATE, par id croissant)
+jusqu'au commit de l'écriture, si bien que deux écritures concurrentes sur
+le planning d'un même utilisateur se succèdent. SQLite ignore FOR UPDATE:
+deux écritures simultanées peuvent encore y passer la vérification toutes
+les deux (base de développement, un seul écrivain en pratique).
+"""
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Iterable, List, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from backend.intervals import overlap_condition, overlaps_between, overlaps_within
+from backend.models import ScheduleItem, ScheduleItemOverride, User, teacher_courses
+from backend.recurrence import Rule, Series, expand, occurrence
+from backend.timezones import as_utc
+
+# Occurrences d'une série vérifiées à l'écriture (une série sans fin: sa première année)
+CONFLICT_HORIZON = timedelta(days=int(os.getenv("SCHEDULE_CONFLICT_HORIZON_DAYS", "366")))
+
+def single_items(user_ids: List[int], start: Optional[datetime], end: Optional[datetime]):
+    """Événements simples (hors séries) qui chevauchent [start, end)"""
+    return select(ScheduleItem).where(
+        ScheduleItem.user_id.in_(user_ids),
+        ScheduleItem.recurrence_end.is_(None),
+        overlap_condition(ScheduleItem.start_time, ScheduleItem.end_time, start, end),
+    )
+
+async def load_series(db: AsyncSession, user_ids: List[int], start: Optional[datetime], end: Optional[datetime]) -> list:
+    """Séries qui ont des occurrences dans [start, end) et leurs modifications, en une requête"""
+    query = (
+        select(ScheduleItem, ScheduleItemOverride)
+        .outerjoin(ScheduleItemOverride, ScheduleItemOverride.schedule_item_id == ScheduleItem.id)
+        .where(
+            ScheduleItem.user_id.in_(user_ids),
+            ScheduleItem.recurrence_end > start if start is not None else ScheduleItem.recurrence_end.is_not(None),
+        )
+    )
+    if end is not None:
+        # Série commencée avant la fin de la fenêtre, ou dont une occurrence y a été avancée
+        moved = aliased(ScheduleItemOverride)
+        moved_before = (
+            select(moved.id)
+            .where(moved.schedule_item_id == ScheduleItem.id, moved.cancelled == False, moved.start_time < end)
+            .exists()
+        )
+        query = query.where(or_(ScheduleItem.start_time < end, moved_before))
+    series = {}
+    for item, override in await db.execute(query):
+        overrides = series.setdefault(item, [])
+        if override is not None:
+            overrides.append(override)
+    return list(series.items())
+
+def candidate(user_id: int, course_id: Optional[int], title: str, start: datetime, end: datetime,
+              series: Optional[Series] = None) -> dict:
+    """Événement à vérifier: ses intervalles (occurrences sur CONFLICT_HORIZON pour une série)"""
+    start, end = as_utc(start), as_utc(end)
+    if series is None:
+        intervals = [(start, end)]
+    else:
+        horizon = min(series.end(), start + CONFLICT_HORIZON)
+        intervals = [(s, s + series.duration) for s in series.between(start, horizon)]
+    return {"user_id": user_id, "course_id": course_id, "title": title, "intervals": intervals}
+
+def candidate_of(values: dict) -> dict:
+    """Candidat à partir des colonnes d'un événement (ScheduleItemCreate.columns() + user_id)"""
+    series = None
+    if values.get("recurrence_rule") is not None:
+        series = Series(
+            Rule.parse(values["recurrence_rule"]), values["start_time"], values["end_time"], values["recurrence_timezone"]
+        )
+    return candidate(
+        values["user_id"], values.get("course_id"), values["title"], values["start_time"], values["end_time"], series
+    )
+
+async def find_conflicts(db: AsyncSession, candidates: List[dict], ignore: frozenset = frozenset(),
+                         lock: bool = False) -> List[List[dict]]:
+    """
+    Conflits de chaque candidat avec le planning existant et avec les autres candidats
+    - Concernés: le propriétaire et les professeurs du cours lié (course_id)
+    - Pour un professeur, un événement du même cours n'est pas un conflit (c'est la même séance)
+    - `ignore`: ids d'événements, ou (id, début prévu) d'occurrences, déjà en cours de modification
+    - `lock`: verrouille les utilisateurs concernés jusqu'au commit (voir lock_users)
+    - Lecture: professeurs des cours, événements simples par l'index de chevauchement,
+      séries développées sur la fenêtre; conflits trouvés par balayage
+    """
+    conflicts = [[] for _ in candidates]
+    intervals = [interval for item in candidates for interval in item["intervals"]]
+    if not intervals:
+        return conflicts
+    start = min(s for s, _ in intervals)
+    end = max(e for _, e in intervals)
+
+    teachers = defaultdict(set)
+    course_ids = {item["course_id"] for item in candidates if item["course_id"] is not None}
+    if course_ids:
+        result = await db.execute(
+            select(teacher_courses.c.course_id, teacher_courses.c.teacher_id)
+            .where(teacher_courses.c.course_id.in_(course_ids))
+        )
+        for course_id, teacher_id in result:
+            teachers[course_id].add(teacher_id)
+
+    # Intervalles à vérifier pour chaque utilisateur concerné
+    watched = defaultdict(list)
+    for index, item in enumerate(candidates):
+        for user_id in {item["user_id"]} | teachers.get(item["course_id"], set()):
+            watched[user_id] += [(s, e, (index, s, e)) for s, e in item["intervals"]]
+    if lock:
+        await lock_users(db, watched)
+
+    existing = defaultdict(list)
+    result = await db.execute(single_items(list(watched), start, end))
+    singles = [occurrence(item, as_utc(item.start_time), as_utc(item.end_time)) for item in result.scalars()]
+    series = await load_series(db, list(watched), start, end)
+    for value in chain(singles, *(expand(item, overrides, start, end) for item, overrides in series)):
+        if value["id"] in ignore or (value["id"], value["occurrence_start"]) in ignore:
+            continue
+        existing[value["user_id"]].append((value["start_time"], value["end_time"], value))
+
+    def same_session(item: dict, other_course_id: Optional[int], user_id: int) -> bool:
+        return item["user_id"] != user_id and item["course_id"] is not None and item["course_id"] == other_course_id
+
+    # Deux candidats d'un même propriétaire peuvent se croiser pour lui et pour un professeur
+    seen = set()
+    for user_id, mine in watched.items():
+        for (index, _, _), value in overlaps_between(mine, existing[user_id]):
+            item = candidates[index]
+            if not same_session(item, value["course_id"], user_id):
+                conflicts[index].append({
+                    "id": value["id"],
+                    "user_id": user_id,
+                    "title": value["title"] if user_id == item["user_id"] else None,
+                    "start_time": value["start_time"],
+                    "end_time": value["end_time"],
+                    "occurrence_start": value["occurrence_start"],
+                })
+        for (first, s1, e1), (second, s2, e2) in overlaps_within(mine):
+            pair = tuple(sorted(((first, s1), (second, s2))))
+            if first == second or pair in seen:
+                continue
+            if same_session(candidates[first], candidates[second]["course_id"], user_id):
+                continue
+            seen.add(pair)
+            for index, other, other_start, other_end in ((first, second, s2, e2), (second, first, s1, e1)):
+                conflicts[index].append({
+                    "index": other,
+                    "user_id": candidates[other]["user_id"],
+                    "title": candidates[other]["title"],
+                    "start_time": other_start,
+                    "end_time": other_end,
+                })
+
+    for items in conflicts:
+        items.sort(key=lambda value: (value["start_time"], value.get("id") or 0, value.get("index") or 0))
+    return conflicts
+
+async def lock_users(db: AsyncSession, user_ids: Iterable[int]):
+    """Verrou des plannings de `user_ids` jusqu'à la fin de la transaction (ordre fixe: pas d'interblocage)"""
+    await db.execute(select(User.id).where(User.id.in_(sorted(user_ids))).order_by(User.id).with_for_update())
+
+def conflict_messages(conflicts: List[dict]) -> List[str]:
+    """Messages d'erreur d'import, un par conflit"""
+    messages = []
+    for value in conflicts:
+        target = f"schedule item {value['id']}" if value.get("id") is not None else f"row {value['index']}"
+        messages.append(f"Conflicts with {target} ({value['start_time'].isoformat()} - {value['end_time'].isoformat()})")
+    return messages
+
+async def import_conflicts(db: AsyncSession, batch: list) -> dict:
+    """
+    Lignes d'un lot d'import (numéro, colonnes) en conflit -> messages
+    - avec le planning existant (lots précédents compris, déjà enregistrés)
+    - avec une ligne précédente du lot acceptée: la première ligne garde le créneau
+    """
+    candidates = [candidate_of(values) for _, values in batch]
+    conflicts = await find_conflicts(db, candidates, lock=True)
+    rejected = {}
+    accepted = set()
+    for index, (number, _) in enumerate(batch):
+        found = [
+            {**value, "index": batch[value["index"]][0]} if value.get("index") is not None else value
+            for value in conflicts[index]
+            if value.get("index") is None or value["index"] in accepted
+        ]
+        if found:
+            rejected[number] = conflict_messages(found)
+        else:
+            accepted.add(index)
+    return rejected
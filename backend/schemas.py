@@ -1,7 +1,18 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator, model_validator
+from typing import Generic, Literal, Optional, List, TypeVar
 from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from backend.intervals import SCHEDULE_MAX_DURATION
 from backend.models import RoleEnum
+from backend.recurrence import series_columns
+from backend.timezones import SCHEDULE_TIMEZONE, as_utc
+
+T = TypeVar("T")
+
+# Page de résultats pour la pagination par curseur
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
 
 # Instrument Schemas (défini en premier pour éviter les forward refs)
 class InstrumentBase(BaseModel):
@@ -16,8 +27,7 @@ class InstrumentResponse(InstrumentBase):
     id: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # User Schemas
 class UserBase(BaseModel):
@@ -41,8 +51,7 @@ class UserResponse(UserBase):
     created_at: datetime
     instruments: List[InstrumentResponse] = []
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class Token(BaseModel):
     access_token: str
@@ -63,10 +72,10 @@ class CourseCreate(CourseBase):
 class CourseResponse(CourseBase):
     id: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
     instrument: InstrumentResponse
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Lesson Schemas
 class LessonBase(BaseModel):
@@ -86,9 +95,9 @@ class LessonCreate(LessonBase):
 class LessonResponse(LessonBase):
     id: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Enrollment Schemas
 class EnrollmentCreate(BaseModel):
@@ -102,8 +111,7 @@ class EnrollmentResponse(BaseModel):
     progress: int
     course: CourseResponse
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Marketplace Schemas
 class MarketplaceItemBase(BaseModel):
@@ -120,11 +128,42 @@ class MarketplaceItemResponse(MarketplaceItemBase):
     seller_id: int
     is_sold: bool
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Schedule Schemas
+# Répétition d'un événement (sous-ensemble de RRULE, voir backend.recurrence)
+class RecurrenceRule(BaseModel):
+    freq: Literal["daily", "weekly"] = "weekly"
+    interval: int = Field(1, ge=1, le=52)
+    # Jours de la semaine (weekly); vide: le jour de la première occurrence
+    by_day: List[Literal["MO", "TU", "WE", "TH", "FR", "SA", "SU"]] = Field(default_factory=list)
+    # Dernier début possible (inclus); sans date: série sans fin
+    until: Optional[datetime] = None
+    # Fuseau dans lequel l'heure des occurrences est conservée
+    timezone: str = SCHEDULE_TIMEZONE
+
+    @field_validator("until")
+    @classmethod
+    def until_to_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        return as_utc(value) if value is not None else None
+
+    @field_validator("timezone")
+    @classmethod
+    def check_timezone(cls, value: str) -> str:
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown time zone: {value}")
+        return value
+
+    @model_validator(mode="after")
+    def check_by_day(self):
+        if self.by_day and self.freq != "weekly":
+            raise ValueError("by_day requires a weekly recurrence")
+        return self
+
 class ScheduleItemBase(BaseModel):
     title: str
     description: Optional[str] = None
@@ -132,15 +171,124 @@ class ScheduleItemBase(BaseModel):
     end_time: datetime
     course_id: Optional[int] = None
     reminder_text: Optional[str] = None
+    # Série: start_time/end_time sont la première occurrence
+    recurrence: Optional[RecurrenceRule] = None
+
+    # Dates en UTC, en entrée comme en sortie (backend.timezones)
+    @field_validator("start_time", "end_time")
+    @classmethod
+    def to_utc(cls, value: datetime) -> datetime:
+        return as_utc(value)
+
+def check_duration(start_time: datetime, end_time: datetime):
+    if end_time <= start_time:
+        raise ValueError("end_time must be after start_time")
+    if end_time - start_time > SCHEDULE_MAX_DURATION:
+        raise ValueError(f"A schedule item cannot last more than {SCHEDULE_MAX_DURATION.total_seconds() / 3600:g} hours")
 
 class ScheduleItemCreate(ScheduleItemBase):
-    pass
+    @model_validator(mode="after")
+    def check_interval(self):
+        check_duration(self.start_time, self.end_time)
+        if self.recurrence and self.recurrence.until and self.recurrence.until < self.start_time:
+            raise ValueError("recurrence.until must not be before start_time")
+        return self
+
+    def columns(self) -> dict:
+        """Colonnes de schedule_items (règle de récurrence sérialisée)"""
+        values = self.model_dump(exclude={"recurrence"})
+        recurrence = self.recurrence.model_dump() if self.recurrence else None
+        values.update(series_columns(recurrence, self.start_time, self.end_time))
+        return values
 
 class ScheduleItemResponse(ScheduleItemBase):
     id: int
     user_id: int
     is_teacher_view: bool
     created_at: datetime
+    # Occurrence d'une série: son début prévu (identifiant de l'occurrence)
+    occurrence_start: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+# Modification d'une occurrence d'une série (champs absents: ceux de la série)
+class ScheduleOccurrenceUpdate(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    reminder_text: Optional[str] = None
+
+    @field_validator("start_time", "end_time")
+    @classmethod
+    def to_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        return as_utc(value) if value is not None else None
+
+# Conflit de planning: événement existant (id) ou autre entrée du lot vérifié (index);
+# le titre n'est donné que pour les événements de l'utilisateur connecté
+class ScheduleConflict(BaseModel):
+    id: Optional[int] = None
+    index: Optional[int] = None
+    user_id: int
+    title: Optional[str] = None
+    start_time: datetime
+    end_time: datetime
+    occurrence_start: Optional[datetime] = None
+
+class ScheduleItemConflicts(BaseModel):
+    index: int
+    conflicts: List[ScheduleConflict]
+
+class ScheduleConflictReport(BaseModel):
+    checked: int
+    # Entrées du lot en conflit seulement
+    items: List[ScheduleItemConflicts]
+
+# Disponibilités (free/busy): plages occupées par utilisateur, plages libres communes
+class TimeInterval(BaseModel):
+    start: datetime
+    end: datetime
+
+class UserBusy(BaseModel):
+    user_id: int
+    busy: List[TimeInterval]
+
+class FreeBusyResponse(BaseModel):
+    start: datetime
+    end: datetime
+    users: List[UserBusy]
+    free: List[TimeInterval]
+
+# Élèves d'un professeur (une ligne par inscription)
+class TeacherStudentResponse(BaseModel):
+    id: int
+    username: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: EmailStr
+    enrollment_id: int
+    course_id: int
+    course: str
+    progress: int
+
+# Rapport d'import en masse
+class ImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+class ImportReport(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool
+
+# Recherche plein texte
+class SearchHit(BaseModel):
+    type: str
+    id: int
+    title: str
+    score: float
 
-    class Config:
-        from_attributes = True
+class SearchResults(BaseModel):
+    items: List[SearchHit]
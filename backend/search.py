@@ -0,0 +1,99 @@
+"""
+Recherche plein texte dans les cours, leçons et objets en vente
+
+L'index (migration 0003) est tenu à jour par des triggers à chaque écriture:
+    PostgreSQL  search_documents.document (tsvector gde_french, index GIN),
+                classement ts_rank_cd (titre pondéré A, texte B)
+    SQLite      table FTS5 search_index, classement bm25 (colonne rank)
+
+La requête est découpée en mots; chaque mot est cherché comme préfixe
+(saisie en cours: « guit » trouve « guitare ») et tous doivent être
+présents. Majuscules et accents sont ignorés des deux côtés.
+"""
+import re
+from typing import Sequence
+
+from sqlalchemy import Integer, bindparam, column, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+COURSE = "course"
+LESSON = "lesson"
+MARKETPLACE_ITEM = "marketplace_item"
+SEARCH_KINDS = (COURSE, LESSON, MARKETPLACE_ITEM)
+
+MAX_TERMS = 8
+TERM = re.compile(r"\w+")
+
+POSTGRES_SEARCH = text("""
+    SELECT kind, ref_id AS id, title, ts_rank_cd(document, query) AS score
+    FROM search_documents, to_tsquery('gde_french', :query) AS query
+    WHERE document @@ query AND kind IN :kinds
+    ORDER BY score DESC, ref_id
+    LIMIT :limit
+""").bindparams(bindparam("kinds", expanding=True))
+
+SQLITE_SEARCH = text("""
+    SELECT kind, ref_id AS id, title, -rank AS score
+    FROM search_index
+    WHERE search_index MATCH :query AND kind IN :kinds
+    ORDER BY rank
+    LIMIT :limit
+""").bindparams(bindparam("kinds", expanding=True))
+
+# Code de rowid de la table FTS5 (rowid = id * 4 + code, migration 0003)
+SQLITE_ROWID_CODES = {COURSE: 1, LESSON: 2, MARKETPLACE_ITEM: 3}
+
+POSTGRES_MATCHING_IDS = """
+    SELECT ref_id FROM search_documents
+    WHERE document @@ to_tsquery('gde_french', :query) AND kind = :kind
+"""
+
+# Le rowid évite de lire les colonnes stockées (kind, ref_id) de chaque document trouvé
+SQLITE_MATCHING_IDS = """
+    SELECT rowid / 4 AS ref_id FROM search_index
+    WHERE search_index MATCH :query AND rowid % 4 = :code
+"""
+
+def query_terms(q: str) -> list[str]:
+    """Mots de la requête (lettres et chiffres), ponctuation et opérateurs ignorés"""
+    return TERM.findall(q.lower())[:MAX_TERMS]
+
+def match_expression(dialect: str, terms: Sequence[str]) -> str:
+    if dialect == "postgresql":
+        return " & ".join(f"{term}:*" for term in terms)
+    return " ".join(f'"{term}"*' for term in terms)
+
+def matching_ids(dialect: str, q: str, kind: str):
+    """
+    Sous-requête des ids de `kind` correspondant à `q` (filtre `id IN (...)`
+    combinable avec d'autres critères), None si `q` ne contient aucun mot
+    """
+    terms = query_terms(q)
+    if not terms:
+        return None
+    if dialect == "postgresql":
+        statement = text(POSTGRES_MATCHING_IDS).bindparams(kind=kind)
+    else:
+        statement = text(SQLITE_MATCHING_IDS).bindparams(code=SQLITE_ROWID_CODES[kind])
+    return (
+        statement
+        .bindparams(query=match_expression(dialect, terms))
+        .columns(column("ref_id", Integer))
+        .subquery()
+    )
+
+async def search(db: AsyncSession, q: str, kinds: Sequence[str], limit: int) -> list[dict]:
+    terms = query_terms(q)
+    if not terms or not kinds:
+        return []
+    dialect = db.bind.dialect.name
+    statement = POSTGRES_SEARCH if dialect == "postgresql" else SQLITE_SEARCH
+    result = await db.execute(statement, {
+        "query": match_expression(dialect, terms),
+        "kinds": list(kinds),
+        "limit": limit,
+    })
+    return [
+        {"type": row.kind, "id": row.id, "title": row.title, "score": row.score}
+        for row in result
+    ]
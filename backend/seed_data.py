@@ -1,460 +1,478 @@
 """
 Script de peuplement de la base de données avec des données de test
+
+Idempotent: chaque ligne est identifiée par sa clé naturelle (email, nom,
+titre...) et seules les lignes absentes sont insérées, par lots. Relancé à
+chaque démarrage du conteneur, il ne coûte que quelques SELECT.
+
+Usage:
+    python seed_data.py                       # données de démonstration
+    python -m backend.seed_data --synthetic --users 100000 --schedule-items 1000000
 """
-from datetime import datetime, timedelta
-from backend.database import SessionLocal, engine
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from backend.database import engine
+from backend.migrate import upgrade_database
 from backend.models import (
-    Base, User, Instrument, Course, Lesson, MarketplaceItem,
-    ScheduleItem, Enrollment, RoleEnum
+    User, Instrument, Course, Lesson, MarketplaceItem,
+    ScheduleItem, Enrollment, RoleEnum, user_instruments, teacher_courses
 )
 from passlib.context import CryptContext
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Hashs bcrypt précalculés des mots de passe de test (évite ~0,3 s de CPU par compte)
+PRECOMPUTED_HASHES = {
+    "admin123": "$2b$12$Xz6JeVWkxnhTAHq8mUJf/uLtinJcVJTLyofBO8CciQm8cjiPMHRtW",
+    "prof123": "$2b$12$ltT9TuP4wzICCU2vA698zOZ1OukcResyHAsqw7oV8PnxjIAHWnH4u",
+    "eleve123": "$2b$12$0Bi1vPP6mh7iZ3kQcKlv8uOHxuuuhQ3IVBH7oX5vp.uNIXKc18PVe",
+    "loadtest123": "$2b$12$E723mJFjK5So4TdLEfwdpemqS7J1VLQbHVeer3uBHGykUXh8CC/rK",
+}
+
+@lru_cache(maxsize=None)
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return PRECOMPUTED_HASHES.get(password) or pwd_context.hash(password)
+
+# ========== DONNÉES DE DÉMONSTRATION ==========
+
+USERS = [
+    dict(email="admin@gde-musique.fr", username="admin", password="admin123",
+         first_name="Jean", last_name="Dupont", role=RoleEnum.ADMIN),
+    dict(email="prof.piano@gde-musique.fr", username="marie_leclerc", password="prof123",
+         first_name="Marie", last_name="Leclerc", role=RoleEnum.TEACHER),
+    dict(email="prof.guitare@gde-musique.fr", username="pierre_martin", password="prof123",
+         first_name="Pierre", last_name="Martin", role=RoleEnum.TEACHER),
+    dict(email="alice@example.com", username="alice_dubois", password="eleve123",
+         first_name="Alice", last_name="Dubois", role=RoleEnum.STUDENT),
+    dict(email="lucas@example.com", username="lucas_bernard", password="eleve123",
+         first_name="Lucas", last_name="Bernard", role=RoleEnum.STUDENT),
+    dict(email="emma@example.com", username="emma_rousseau", password="eleve123",
+         first_name="Emma", last_name="Rousseau", role=RoleEnum.STUDENT),
+]
+
+INSTRUMENTS = [
+    dict(name="Piano", description="Instrument à clavier, roi des instruments",
+         image_url="/static/images/instruments/piano.jpg"),
+    dict(name="Guitare", description="Instrument à cordes pincées, acoustique ou électrique",
+         image_url="/static/images/instruments/guitare.jpg"),
+    dict(name="Chant", description="Technique vocale et interprétation",
+         image_url="/static/images/instruments/chant.jpg"),
+    dict(name="Batterie", description="Percussion, rythme et coordination",
+         image_url="/static/images/instruments/batterie.jpg"),
+    dict(name="Violon", description="Instrument à cordes frottées",
+         image_url="/static/images/instruments/violon.jpg"),
+    dict(name="Solfège", description="Théorie musicale et formation de l'oreille",
+         image_url="/static/images/instruments/solfege.jpg"),
+]
+
+# (email de l'élève, instrument)
+USER_INSTRUMENTS = [
+    ("alice@example.com", "Piano"), ("alice@example.com", "Solfège"),
+    ("lucas@example.com", "Guitare"), ("lucas@example.com", "Batterie"),
+    ("emma@example.com", "Chant"), ("emma@example.com", "Piano"),
+]
+
+COURSES = [
+    dict(title="Piano Débutant", description="Découverte du piano et des bases de la musique",
+         instrument="Piano", level="Débutant", image_url="/static/images/courses/piano-debutant.jpg"),
+    dict(title="Piano Intermédiaire", description="Approfondissement de la technique et du répertoire",
+         instrument="Piano", level="Intermédiaire", image_url="/static/images/courses/piano-inter.jpg"),
+    dict(title="Guitare Débutant", description="Les bases de la guitare acoustique et électrique",
+         instrument="Guitare", level="Débutant", image_url="/static/images/courses/guitare-debutant.jpg"),
+    dict(title="Guitare Avancé", description="Techniques avancées et improvisation",
+         instrument="Guitare", level="Avancé", image_url="/static/images/courses/guitare-avance.jpg"),
+    dict(title="Technique Vocale", description="Travail de la voix et de l'interprétation",
+         instrument="Chant", level="Tous niveaux", image_url="/static/images/courses/chant.jpg"),
+]
+
+# (email du professeur, cours)
+TEACHER_COURSES = [
+    ("prof.piano@gde-musique.fr", "Piano Débutant"), ("prof.piano@gde-musique.fr", "Piano Intermédiaire"),
+    ("prof.guitare@gde-musique.fr", "Guitare Débutant"), ("prof.guitare@gde-musique.fr", "Guitare Avancé"),
+]
+
+LESSONS = [
+    dict(
+        course="Piano Débutant",
+        title="Introduction au Piano",
+        description="Découverte de l'instrument et position des mains",
+        song_name="Ode à la Joie - Beethoven",
+        song_history="L'Ode à la Joie est un hymne composé par Ludwig van Beethoven en 1824 pour sa 9ème symphonie. C'est l'une des œuvres les plus célèbres de la musique classique et est devenue l'hymne européen.",
+        chord_help="Cette mélodie simple se joue avec la main droite. Pas d'accords complexes pour commencer.\nNotes: Mi Mi Fa Sol | Sol Fa Mi Ré | Do Do Ré Mi | Mi Ré Ré",
+        sheet_music_url="/static/partitions/ode-joie.pdf",
+        video_url="https://www.youtube.com/watch?v=example1",
+        order=1
+    ),
+    dict(
+        course="Piano Débutant",
+        title="Les Accords de Base",
+        description="Apprendre les accords majeurs et mineurs",
+        song_name="Let It Be - The Beatles",
+        song_history="'Let It Be' a été écrite par Paul McCartney en 1968. Inspirée par un rêve de sa mère décédée, c'est devenue l'une des chansons les plus emblématiques des Beatles.",
+        chord_help="Accords utilisés:\n- Do Majeur (C): Do - Mi - Sol\n- Sol Majeur (G): Sol - Si - Ré\n- La mineur (Am): La - Do - Mi\n- Fa Majeur (F): Fa - La - Do\n\nProgression: C - G - Am - F",
+        sheet_music_url="/static/partitions/let-it-be.pdf",
+        video_url="https://www.youtube.com/watch?v=example2",
+        order=2
+    ),
+    dict(
+        course="Guitare Débutant",
+        title="Les Premiers Accords",
+        description="Mi mineur, La mineur, Ré majeur",
+        song_name="Knockin' on Heaven's Door - Bob Dylan",
+        song_history="Écrite par Bob Dylan en 1973 pour le film 'Pat Garrett et Billy le Kid', cette chanson est devenue un classique du folk-rock, reprise par de nombreux artistes.",
+        chord_help="Accords de base:\n- Sol Majeur (G): 320003\n- Ré Majeur (D): xx0232\n- La mineur (Am): x02210\n- Do Majeur (C): x32010\n\nGrattage: Bas Bas Haut Haut Bas Haut",
+        sheet_music_url="/static/partitions/knockin.pdf",
+        video_url="https://www.youtube.com/watch?v=example3",
+        order=1
+    ),
+    dict(
+        course="Guitare Débutant",
+        title="Le Rythme au Médiator",
+        description="Techniques de grattage et de picking",
+        song_name="Horse With No Name - America",
+        song_history="Sortie en 1971, cette chanson du groupe America raconte l'histoire d'un voyage dans le désert. Sa simplicité avec seulement 2 accords en fait un excellent morceau pour débuter.",
+        chord_help="Seulement 2 accords!\n- Em: 022000\n- D6/9: xx0200\n\nAlternez entre ces deux accords tout au long de la chanson.\nRythme: Bas Haut Bas Haut Bas Haut Bas Haut",
+        sheet_music_url="/static/partitions/horse-no-name.pdf",
+        video_url="https://www.youtube.com/watch?v=example4",
+        order=2
+    ),
+]
+
+# (email de l'élève, cours, progression)
+ENROLLMENTS = [
+    ("alice@example.com", "Piano Débutant", 45),
+    ("lucas@example.com", "Guitare Débutant", 60),
+    ("emma@example.com", "Technique Vocale", 30),
+    ("emma@example.com", "Piano Intermédiaire", 20),
+]
+
+MARKETPLACE_ITEMS = [
+    dict(title="Guitare Acoustique Yamaha F310",
+         description="Guitare acoustique en excellent état, parfaite pour débutants. Livrée avec housse de protection et médiators.",
+         price=150.00, image_url="/static/images/marketplace/guitare-yamaha.jpg", is_sold=False),
+    dict(title="Clavier Numérique Casio CT-S300",
+         description="Clavier 61 touches avec différents sons et rythmes. Idéal pour s'entraîner à la maison. Fonctionne sur secteur ou piles.",
+         price=200.00, image_url="/static/images/marketplace/clavier-casio.jpg", is_sold=False),
+    dict(title="Métronome Mécanique Wittner",
+         description="Métronome mécanique traditionnel en bois, excellent état. Sans piles, totalement mécanique.",
+         price=45.00, image_url="/static/images/marketplace/metronome.jpg", is_sold=False),
+    dict(title="Pupitre en Métal Réglable",
+         description="Pupitre robuste en métal noir, hauteur et angle réglables. Pliable pour faciliter le transport.",
+         price=25.00, image_url="/static/images/marketplace/pupitre.jpg", is_sold=False),
+    dict(title="Lot de Partitions Classiques",
+         description="Collection de 20 partitions classiques pour piano (Bach, Mozart, Chopin, etc.). Très bon état.",
+         price=35.00, image_url="/static/images/marketplace/partitions.jpg", is_sold=True),  # Déjà vendu
+    dict(title="Accordeur Chromatique Électronique",
+         description="Accordeur numérique à pince pour guitare, basse, violon. Écran LCD rétroéclairé.",
+         price=15.00, image_url="/static/images/marketplace/accordeur.jpg", is_sold=False),
+]
+
+# (email, titre, description, jour de la semaine, heure de début, cours, rappel, vue professeur)
+SCHEDULE = [
+    ("prof.piano@gde-musique.fr", "Cours Piano - Alice Dubois", "Cours particulier de piano débutant",
+     0, 14, "Piano Débutant", "Revoir: Ode à la Joie, exercices de gammes", True),
+    ("prof.piano@gde-musique.fr", "Cours Piano - Emma Rousseau", "Cours particulier de piano intermédiaire",
+     2, 16, "Piano Intermédiaire", "Travailler: Sonate au Clair de Lune (Beethoven), arpèges", True),
+    ("alice@example.com", "Cours de Piano", "Cours avec Mme Leclerc",
+     0, 14, "Piano Débutant", "À préparer: Ode à la Joie jusqu'à la mesure 16, gammes de Do majeur", False),
+    ("prof.guitare@gde-musique.fr", "Cours Guitare - Lucas Bernard", "Cours particulier de guitare débutant",
+     1, 15, "Guitare Débutant", "Revoir: Accords de base Em, Am, C, G. Changements fluides", True),
+    ("lucas@example.com", "Cours de Guitare", "Cours avec M. Martin",
+     1, 15, "Guitare Débutant", "Cette semaine: Pratiquer les transitions Em-Am-C-G (10 min/jour), apprendre 'Knockin on Heaven's Door'", False),
+]
+
+# ========== INSERTIONS IDEMPOTENTES ==========
+
+def insert_missing(connection, table, key: tuple, rows: list) -> int:
+    """
+    Insère en un seul INSERT multi-lignes les `rows` dont la clé naturelle
+    `key` n'existe pas encore (équivalent portable d'ON CONFLICT DO NOTHING,
+    y compris pour les tables sans contrainte d'unicité sur cette clé).
+    """
+    if not rows:
+        return 0
+    table = getattr(table, "__table__", table)
+    columns = [table.c[name] for name in key]
+    keys = {tuple(row[name] for name in key) for row in rows}
+    if len(columns) == 1:
+        condition = columns[0].in_([value for value, in keys])
+    else:
+        condition = tuple_(*columns).in_(keys)
+    existing = set(connection.execute(select(*columns).where(condition)).all())
+
+    missing, seen = [], set(existing)
+    for row in rows:
+        row_key = tuple(row[name] for name in key)
+        if row_key not in seen:
+            seen.add(row_key)
+            missing.append(row)
+    if missing:
+        connection.execute(insert_statement(table), missing)
+    return len(missing)
+
+def insert_statement(table):
+    """INSERT ... ON CONFLICT DO NOTHING: un seed concurrent ne fait pas échouer le démarrage"""
+    if engine.dialect.name == "postgresql":
+        return postgresql.insert(table).on_conflict_do_nothing()
+    if engine.dialect.name == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing()
+    return table.insert()
+
+def ids_by(connection, model, column: str, values) -> dict:
+    attribute = getattr(model, column)
+    rows = connection.execute(select(attribute, model.id).where(attribute.in_(list(values))))
+    return dict(rows.all())
 
 def seed_database():
-    # Créer les tables
-    Base.metadata.create_all(bind=engine)
-    
-    db = SessionLocal()
-    
-    try:
-        # Vérifier si la base est déjà peuplée
-        if db.query(User).first():
-            print("✅ La base de données contient déjà des données. Seed skippé.")
-            return
-        
-        print("🎵 Peuplement de la base de données GDE Musique...")
-        
-        # ========== UTILISATEURS ==========
-        print("  👤 Création des utilisateurs...")
-        
-        # Admin
-        admin = User(
-            email="admin@gde-musique.fr",
-            username="admin",
-            hashed_password=get_password_hash("admin123"),
-            first_name="Jean",
-            last_name="Dupont",
-            role=RoleEnum.ADMIN,
-            is_active=True
-        )
-        db.add(admin)
-        
-        # Professeurs
-        prof_piano = User(
-            email="prof.piano@gde-musique.fr",
-            username="marie_leclerc",
-            hashed_password=get_password_hash("prof123"),
-            first_name="Marie",
-            last_name="Leclerc",
-            role=RoleEnum.TEACHER,
-            is_active=True
-        )
-        db.add(prof_piano)
-        
-        prof_guitare = User(
-            email="prof.guitare@gde-musique.fr",
-            username="pierre_martin",
-            hashed_password=get_password_hash("prof123"),
-            first_name="Pierre",
-            last_name="Martin",
-            role=RoleEnum.TEACHER,
-            is_active=True
-        )
-        db.add(prof_guitare)
-        
-        # Élèves
-        eleve1 = User(
-            email="alice@example.com",
-            username="alice_dubois",
-            hashed_password=get_password_hash("eleve123"),
-            first_name="Alice",
-            last_name="Dubois",
-            role=RoleEnum.STUDENT,
-            is_active=True
-        )
-        db.add(eleve1)
-        
-        eleve2 = User(
-            email="lucas@example.com",
-            username="lucas_bernard",
-            hashed_password=get_password_hash("eleve123"),
-            first_name="Lucas",
-            last_name="Bernard",
-            role=RoleEnum.STUDENT,
-            is_active=True
-        )
-        db.add(eleve2)
-        
-        eleve3 = User(
-            email="emma@example.com",
-            username="emma_rousseau",
-            hashed_password=get_password_hash("eleve123"),
-            first_name="Emma",
-            last_name="Rousseau",
-            role=RoleEnum.STUDENT,
-            is_active=True
-        )
-        db.add(eleve3)
-        
-        db.commit()
-        
-        # ========== INSTRUMENTS ==========
-        print("  🎸 Création des instruments...")
-        
-        piano = Instrument(
-            name="Piano",
-            description="Instrument à clavier, roi des instruments",
-            image_url="/static/images/instruments/piano.jpg"
-        )
-        db.add(piano)
-        
-        guitare = Instrument(
-            name="Guitare",
-            description="Instrument à cordes pincées, acoustique ou électrique",
-            image_url="/static/images/instruments/guitare.jpg"
-        )
-        db.add(guitare)
-        
-        chant = Instrument(
-            name="Chant",
-            description="Technique vocale et interprétation",
-            image_url="/static/images/instruments/chant.jpg"
-        )
-        db.add(chant)
-        
-        batterie = Instrument(
-            name="Batterie",
-            description="Percussion, rythme et coordination",
-            image_url="/static/images/instruments/batterie.jpg"
-        )
-        db.add(batterie)
-        
-        violon = Instrument(
-            name="Violon",
-            description="Instrument à cordes frottées",
-            image_url="/static/images/instruments/violon.jpg"
-        )
-        db.add(violon)
-        
-        solfege = Instrument(
-            name="Solfège",
-            description="Théorie musicale et formation de l'oreille",
-            image_url="/static/images/instruments/solfege.jpg"
-        )
-        db.add(solfege)
-        
-        db.commit()
-        
-        # Associer les instruments aux utilisateurs
-        eleve1.instruments.extend([piano, solfege])
-        eleve2.instruments.extend([guitare, batterie])
-        eleve3.instruments.extend([chant, piano])
-        
-        db.commit()
-        
-        # ========== COURS ==========
-        print("  📚 Création des cours...")
-        
-        # Cours de Piano
-        cours_piano_debutant = Course(
-            title="Piano Débutant",
-            description="Découverte du piano et des bases de la musique",
-            instrument_id=piano.id,
-            level="Débutant",
-            image_url="/static/images/courses/piano-debutant.jpg"
-        )
-        db.add(cours_piano_debutant)
-        
-        cours_piano_inter = Course(
-            title="Piano Intermédiaire",
-            description="Approfondissement de la technique et du répertoire",
-            instrument_id=piano.id,
-            level="Intermédiaire",
-            image_url="/static/images/courses/piano-inter.jpg"
-        )
-        db.add(cours_piano_inter)
-        
-        # Cours de Guitare
-        cours_guitare_debutant = Course(
-            title="Guitare Débutant",
-            description="Les bases de la guitare acoustique et électrique",
-            instrument_id=guitare.id,
-            level="Débutant",
-            image_url="/static/images/courses/guitare-debutant.jpg"
-        )
-        db.add(cours_guitare_debutant)
-        
-        cours_guitare_avance = Course(
-            title="Guitare Avancé",
-            description="Techniques avancées et improvisation",
-            instrument_id=guitare.id,
-            level="Avancé",
-            image_url="/static/images/courses/guitare-avance.jpg"
-        )
-        db.add(cours_guitare_avance)
-        
-        # Cours de Chant
-        cours_chant = Course(
-            title="Technique Vocale",
-            description="Travail de la voix et de l'interprétation",
-            instrument_id=chant.id,
-            level="Tous niveaux",
-            image_url="/static/images/courses/chant.jpg"
-        )
-        db.add(cours_chant)
-        
-        db.commit()
-        
-        # Associer les professeurs aux cours
-        prof_piano.taught_courses.extend([cours_piano_debutant, cours_piano_inter])
-        prof_guitare.taught_courses.extend([cours_guitare_debutant, cours_guitare_avance])
-        
-        db.commit()
-        
-        # ========== LEÇONS ==========
-        print("  📖 Création des leçons avec partitions et accords...")
-        
-        # Leçons Piano Débutant
-        lesson1 = Lesson(
-            course_id=cours_piano_debutant.id,
-            title="Introduction au Piano",
-            description="Découverte de l'instrument et position des mains",
-            song_name="Ode à la Joie - Beethoven",
-            song_history="L'Ode à la Joie est un hymne composé par Ludwig van Beethoven en 1824 pour sa 9ème symphonie. C'est l'une des œuvres les plus célèbres de la musique classique et est devenue l'hymne européen.",
-            chord_help="Cette mélodie simple se joue avec la main droite. Pas d'accords complexes pour commencer.\nNotes: Mi Mi Fa Sol | Sol Fa Mi Ré | Do Do Ré Mi | Mi Ré Ré",
-            sheet_music_url="/static/partitions/ode-joie.pdf",
-            video_url="https://www.youtube.com/watch?v=example1",
-            order=1
-        )
-        db.add(lesson1)
-        
-        lesson2 = Lesson(
-            course_id=cours_piano_debutant.id,
-            title="Les Accords de Base",
-            description="Apprendre les accords majeurs et mineurs",
-            song_name="Let It Be - The Beatles",
-            song_history="'Let It Be' a été écrite par Paul McCartney en 1968. Inspirée par un rêve de sa mère décédée, c'est devenue l'une des chansons les plus emblématiques des Beatles.",
-            chord_help="Accords utilisés:\n- Do Majeur (C): Do - Mi - Sol\n- Sol Majeur (G): Sol - Si - Ré\n- La mineur (Am): La - Do - Mi\n- Fa Majeur (F): Fa - La - Do\n\nProgression: C - G - Am - F",
-            sheet_music_url="/static/partitions/let-it-be.pdf",
-            video_url="https://www.youtube.com/watch?v=example2",
-            order=2
-        )
-        db.add(lesson2)
-        
-        # Leçons Guitare Débutant
-        lesson3 = Lesson(
-            course_id=cours_guitare_debutant.id,
-            title="Les Premiers Accords",
-            description="Mi mineur, La mineur, Ré majeur",
-            song_name="Knockin' on Heaven's Door - Bob Dylan",
-            song_history="Écrite par Bob Dylan en 1973 pour le film 'Pat Garrett et Billy le Kid', cette chanson est devenue un classique du folk-rock, reprise par de nombreux artistes.",
-            chord_help="Accords de base:\n- Sol Majeur (G): 320003\n- Ré Majeur (D): xx0232\n- La mineur (Am): x02210\n- Do Majeur (C): x32010\n\nGrattage: Bas Bas Haut Haut Bas Haut",
-            sheet_music_url="/static/partitions/knockin.pdf",
-            video_url="https://www.youtube.com/watch?v=example3",
-            order=1
-        )
-        db.add(lesson3)
-        
-        lesson4 = Lesson(
-            course_id=cours_guitare_debutant.id,
-            title="Le Rythme au Médiator",
-            description="Techniques de grattage et de picking",
-            song_name="Horse With No Name - America",
-            song_history="Sortie en 1971, cette chanson du groupe America raconte l'histoire d'un voyage dans le désert. Sa simplicité avec seulement 2 accords en fait un excellent morceau pour débuter.",
-            chord_help="Seulement 2 accords!\n- Em: 022000\n- D6/9: xx0200\n\nAlternez entre ces deux accords tout au long de la chanson.\nRythme: Bas Haut Bas Haut Bas Haut Bas Haut",
-            sheet_music_url="/static/partitions/horse-no-name.pdf",
-            video_url="https://www.youtube.com/watch?v=example4",
-            order=2
-        )
-        db.add(lesson4)
-        
-        db.commit()
-        
-        # ========== INSCRIPTIONS ==========
-        print("  📝 Création des inscriptions...")
-        
-        enrollment1 = Enrollment(student_id=eleve1.id, course_id=cours_piano_debutant.id, progress=45)
-        enrollment2 = Enrollment(student_id=eleve2.id, course_id=cours_guitare_debutant.id, progress=60)
-        enrollment3 = Enrollment(student_id=eleve3.id, course_id=cours_chant.id, progress=30)
-        enrollment4 = Enrollment(student_id=eleve3.id, course_id=cours_piano_inter.id, progress=20)
-        
-        db.add_all([enrollment1, enrollment2, enrollment3, enrollment4])
-        db.commit()
-        
-        # ========== MARKETPLACE (Petites Ventes) ==========
-        print("  🛒 Création des articles de la marketplace...")
-        
-        item1 = MarketplaceItem(
-            title="Guitare Acoustique Yamaha F310",
-            description="Guitare acoustique en excellent état, parfaite pour débutants. Livrée avec housse de protection et médiators.",
-            price=150.00,
-            image_url="/static/images/marketplace/guitare-yamaha.jpg",
-            seller_id=admin.id,
-            is_sold=False
-        )
-        db.add(item1)
-        
-        item2 = MarketplaceItem(
-            title="Clavier Numérique Casio CT-S300",
-            description="Clavier 61 touches avec différents sons et rythmes. Idéal pour s'entraîner à la maison. Fonctionne sur secteur ou piles.",
-            price=200.00,
-            image_url="/static/images/marketplace/clavier-casio.jpg",
-            seller_id=admin.id,
-            is_sold=False
-        )
-        db.add(item2)
-        
-        item3 = MarketplaceItem(
-            title="Métronome Mécanique Wittner",
-            description="Métronome mécanique traditionnel en bois, excellent état. Sans piles, totalement mécanique.",
-            price=45.00,
-            image_url="/static/images/marketplace/metronome.jpg",
-            seller_id=admin.id,
-            is_sold=False
-        )
-        db.add(item3)
-        
-        item4 = MarketplaceItem(
-            title="Pupitre en Métal Réglable",
-            description="Pupitre robuste en métal noir, hauteur et angle réglables. Pliable pour faciliter le transport.",
-            price=25.00,
-            image_url="/static/images/marketplace/pupitre.jpg",
-            seller_id=admin.id,
-            is_sold=False
-        )
-        db.add(item4)
-        
-        item5 = MarketplaceItem(
-            title="Lot de Partitions Classiques",
-            description="Collection de 20 partitions classiques pour piano (Bach, Mozart, Chopin, etc.). Très bon état.",
-            price=35.00,
-            image_url="/static/images/marketplace/partitions.jpg",
-            seller_id=admin.id,
-            is_sold=True  # Déjà vendu
-        )
-        db.add(item5)
-        
-        item6 = MarketplaceItem(
-            title="Accordeur Chromatique Électronique",
-            description="Accordeur numérique à pince pour guitare, basse, violon. Écran LCD rétroéclairé.",
-            price=15.00,
-            image_url="/static/images/marketplace/accordeur.jpg",
-            seller_id=admin.id,
-            is_sold=False
-        )
-        db.add(item6)
-        
-        db.commit()
-        
-        # ========== PLANNING ==========
-        print("  📅 Création des plannings...")
-        
-        # Planning du professeur de piano
-        today = datetime.now()
-        
-        # Cours avec Alice (lundi 14h-15h)
-        schedule1 = ScheduleItem(
-            user_id=prof_piano.id,
-            title="Cours Piano - Alice Dubois",
-            description="Cours particulier de piano débutant",
-            start_time=today + timedelta(days=(7 - today.weekday() + 0) % 7, hours=14 - today.hour),
-            end_time=today + timedelta(days=(7 - today.weekday() + 0) % 7, hours=15 - today.hour),
-            course_id=cours_piano_debutant.id,
-            reminder_text="Revoir: Ode à la Joie, exercices de gammes",
-            is_teacher_view=True
-        )
-        db.add(schedule1)
-        
-        # Cours avec Emma (mercredi 16h-17h)
-        schedule2 = ScheduleItem(
-            user_id=prof_piano.id,
-            title="Cours Piano - Emma Rousseau",
-            description="Cours particulier de piano intermédiaire",
-            start_time=today + timedelta(days=(7 - today.weekday() + 2) % 7, hours=16 - today.hour),
-            end_time=today + timedelta(days=(7 - today.weekday() + 2) % 7, hours=17 - today.hour),
-            course_id=cours_piano_inter.id,
-            reminder_text="Travailler: Sonate au Clair de Lune (Beethoven), arpèges",
-            is_teacher_view=True
-        )
-        db.add(schedule2)
-        
-        # Planning de l'élève Alice
-        schedule3 = ScheduleItem(
-            user_id=eleve1.id,
-            title="Cours de Piano",
-            description="Cours avec Mme Leclerc",
-            start_time=today + timedelta(days=(7 - today.weekday() + 0) % 7, hours=14 - today.hour),
-            end_time=today + timedelta(days=(7 - today.weekday() + 0) % 7, hours=15 - today.hour),
-            course_id=cours_piano_debutant.id,
-            reminder_text="À préparer: Ode à la Joie jusqu'à la mesure 16, gammes de Do majeur",
-            is_teacher_view=False
-        )
-        db.add(schedule3)
-        
-        # Planning du professeur de guitare
-        schedule4 = ScheduleItem(
-            user_id=prof_guitare.id,
-            title="Cours Guitare - Lucas Bernard",
-            description="Cours particulier de guitare débutant",
-            start_time=today + timedelta(days=(7 - today.weekday() + 1) % 7, hours=15 - today.hour),
-            end_time=today + timedelta(days=(7 - today.weekday() + 1) % 7, hours=16 - today.hour),
-            course_id=cours_guitare_debutant.id,
-            reminder_text="Revoir: Accords de base Em, Am, C, G. Changements fluides",
-            is_teacher_view=True
-        )
-        db.add(schedule4)
-        
-        # Planning de l'élève Lucas
-        schedule5 = ScheduleItem(
-            user_id=eleve2.id,
-            title="Cours de Guitare",
-            description="Cours avec M. Martin",
-            start_time=today + timedelta(days=(7 - today.weekday() + 1) % 7, hours=15 - today.hour),
-            end_time=today + timedelta(days=(7 - today.weekday() + 1) % 7, hours=16 - today.hour),
-            course_id=cours_guitare_debutant.id,
-            reminder_text="Cette semaine: Pratiquer les transitions Em-Am-C-G (10 min/jour), apprendre 'Knockin on Heaven's Door'",
-            is_teacher_view=False
-        )
-        db.add(schedule5)
-        
-        db.commit()
-        
-        print("✅ Base de données peuplée avec succès!")
-        print("\n📊 Résumé:")
-        print(f"  - {db.query(User).count()} utilisateurs créés")
-        print(f"  - {db.query(Instrument).count()} instruments")
-        print(f"  - {db.query(Course).count()} cours")
-        print(f"  - {db.query(Lesson).count()} leçons")
-        print(f"  - {db.query(MarketplaceItem).count()} articles marketplace")
-        print(f"  - {db.query(ScheduleItem).count()} événements de planning")
-        
-        print("\n🔑 Comptes de test:")
-        print("  Admin:")
-        print("    Email: admin@gde-musique.fr")
-        print("    Password: admin123")
-        print("\n  Professeur Piano:")
-        print("    Email: prof.piano@gde-musique.fr")
-        print("    Password: prof123")
-        print("\n  Professeur Guitare:")
-        print("    Email: prof.guitare@gde-musique.fr")
-        print("    Password: prof123")
-        print("\n  Élève Alice:")
-        print("    Email: alice@example.com")
-        print("    Password: eleve123")
-        print("\n  Élève Lucas:")
-        print("    Email: lucas@example.com")
-        print("    Password: eleve123")
-        
-    except Exception as e:
-        print(f"❌ Erreur lors du peuplement: {e}")
-        db.rollback()
-        raise
-    finally:
-        db.close()
+    # Créer / mettre à jour les tables
+    upgrade_database()
 
-if __name__ == "__main__":
+    started = time.perf_counter()
+    inserted = {}
+    print("🎵 Peuplement de la base de données GDE Musique...")
+
+    with engine.begin() as connection:
+        inserted["utilisateurs"] = insert_missing(connection, User, ("email",), [
+            dict(
+                email=user["email"],
+                username=user["username"],
+                hashed_password=get_password_hash(user["password"]),
+                first_name=user["first_name"],
+                last_name=user["last_name"],
+                role=user["role"],
+                is_active=True,
+            )
+            for user in USERS
+        ])
+        users = ids_by(connection, User, "email", [user["email"] for user in USERS])
+
+        inserted["instruments"] = insert_missing(connection, Instrument, ("name",), INSTRUMENTS)
+        instruments = ids_by(connection, Instrument, "name", [instrument["name"] for instrument in INSTRUMENTS])
+
+        insert_missing(connection, user_instruments, ("user_id", "instrument_id"), [
+            dict(user_id=users[email], instrument_id=instruments[name])
+            for email, name in USER_INSTRUMENTS
+        ])
+
+        inserted["cours"] = insert_missing(connection, Course, ("title",), [
+            dict(
+                title=course["title"],
+                description=course["description"],
+                instrument_id=instruments[course["instrument"]],
+                level=course["level"],
+                image_url=course["image_url"],
+            )
+            for course in COURSES
+        ])
+        courses = ids_by(connection, Course, "title", [course["title"] for course in COURSES])
+
+        insert_missing(connection, teacher_courses, ("teacher_id", "course_id"), [
+            dict(teacher_id=users[email], course_id=courses[title])
+            for email, title in TEACHER_COURSES
+        ])
+
+        inserted["leçons"] = insert_missing(connection, Lesson, ("course_id", "order"), [
+            {**{k: v for k, v in lesson.items() if k != "course"}, "course_id": courses[lesson["course"]]}
+            for lesson in LESSONS
+        ])
+
+        inserted["inscriptions"] = insert_missing(connection, Enrollment, ("student_id", "course_id"), [
+            dict(student_id=users[email], course_id=courses[title], progress=progress)
+            for email, title, progress in ENROLLMENTS
+        ])
+
+        inserted["articles marketplace"] = insert_missing(connection, MarketplaceItem, ("title",), [
+            {**item, "seller_id": users["admin@gde-musique.fr"]}
+            for item in MARKETPLACE_ITEMS
+        ])
+
+        # Créneaux de la semaine à venir (heures UTC, comme toutes les dates du planning)
+        today = datetime.now(timezone.utc)
+        inserted["événements de planning"] = insert_missing(connection, ScheduleItem, ("user_id", "title"), [
+            dict(
+                user_id=users[email],
+                title=title,
+                description=description,
+                start_time=today + timedelta(days=(7 - today.weekday() + weekday) % 7, hours=hour - today.hour),
+                end_time=today + timedelta(days=(7 - today.weekday() + weekday) % 7, hours=hour + 1 - today.hour),
+                course_id=courses[course],
+                reminder_text=reminder,
+                is_teacher_view=teacher_view,
+            )
+            for email, title, description, weekday, hour, course, reminder, teacher_view in SCHEDULE
+        ])
+
+    if not any(inserted.values()):
+        print(f"✅ La base de données contient déjà les données de test ({time.perf_counter() - started:.2f} s).")
+        return
+
+    print(f"✅ Base de données peuplée avec succès! ({time.perf_counter() - started:.2f} s)")
+    print("\n📊 Lignes ajoutées:")
+    for name, count in inserted.items():
+        print(f"  - {count} {name}")
+
+    print("\n🔑 Comptes de test:")
+    print("  Admin:")
+    print("    Email: admin@gde-musique.fr")
+    print("    Password: admin123")
+    print("\n  Professeur Piano:")
+    print("    Email: prof.piano@gde-musique.fr")
+    print("    Password: prof123")
+    print("\n  Professeur Guitare:")
+    print("    Email: prof.guitare@gde-musique.fr")
+    print("    Password: prof123")
+    print("\n  Élève Alice:")
+    print("    Email: alice@example.com")
+    print("    Password: eleve123")
+    print("\n  Élève Lucas:")
+    print("    Email: lucas@example.com")
+    print("    Password: eleve123")
+
+# ========== DONNÉES SYNTHÉTIQUES (tests de charge) ==========
+
+SYNTHETIC_PASSWORD = "loadtest123"
+SYNTHETIC_TEACHER_EVERY = 50  # 1 professeur pour 49 élèves
+
+# Domaine valide pour EmailStr (email-validator refuse les TLD réservés comme .test)
+SYNTHETIC_DOMAIN = "load.gde-musique.fr"
+LEGACY_SYNTHETIC_DOMAIN = "gde-load.test"
+
+def synthetic_email(number: int) -> str:
+    return f"load-{number:07d}@{SYNTHETIC_DOMAIN}"
+
+def rename_legacy_synthetic_emails(connection) -> int:
+    """Comptes synthétiques créés avec l'ancien domaine: leur login échouait à la sérialisation"""
+    result = connection.execute(
+        User.__table__.update()
+        .where(User.email.like(f"load-%@{LEGACY_SYNTHETIC_DOMAIN}"))
+        .values(email=func.replace(User.email, LEGACY_SYNTHETIC_DOMAIN, SYNTHETIC_DOMAIN))
+    )
+    return result.rowcount
+
+def seed_synthetic(users: int, schedule_items: int, marketplace_items: int, batch_size: int, seed: int):
+    """
+    Ajoute `users` comptes synthétiques (mot de passe: loadtest123), leurs
+    instruments et inscriptions, `schedule_items` événements répartis sur un an
+    et `marketplace_items` articles. Relancé avec les mêmes paramètres, il
+    n'insère rien: seuls les comptes absents (et leurs données) sont créés.
+    """
     seed_database()
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    password_hash = get_password_hash(SYNTHETIC_PASSWORD)
+    per_user, remainder = divmod(schedule_items, max(users, 1))
+    monday = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    window_start = monday - timedelta(days=monday.weekday() + 26 * 7)
+    totals = dict(users=0, schedule_items=0, enrollments=0, marketplace_items=0)
+
+    with engine.begin() as connection:
+        renamed = rename_legacy_synthetic_emails(connection)
+        if renamed:
+            print(f"  … {renamed} comptes synthétiques renommés en @{SYNTHETIC_DOMAIN}")
+        instrument_ids = list(connection.execute(select(Instrument.id)).scalars())
+        course_ids = list(connection.execute(select(Course.id)).scalars())
+
+    for first in range(1, users + 1, batch_size):
+        numbers = range(first, min(first + batch_size, users + 1))
+        with engine.begin() as connection:
+            rows = [
+                dict(
+                    email=synthetic_email(number),
+                    username=f"load_{number:07d}",
+                    hashed_password=password_hash,
+                    first_name="Load",
+                    last_name=f"User {number}",
+                    role=RoleEnum.TEACHER if number % SYNTHETIC_TEACHER_EVERY == 0 else RoleEnum.STUDENT,
+                    is_active=True,
+                )
+                for number in numbers
+            ]
+            emails = [row["email"] for row in rows]
+            existing = set(connection.execute(select(User.email).where(User.email.in_(emails))).scalars())
+            rows = [row for row in rows if row["email"] not in existing]
+            if not rows:
+                continue
+            connection.execute(insert_statement(User.__table__), rows)
+            new_ids = ids_by(connection, User, "email", [row["email"] for row in rows])
+
+            instrument_rows, enrollment_rows, schedule_rows = [], [], []
+            for row in rows:
+                user_id = new_ids[row["email"]]
+                number = int(row["username"].rsplit("_", 1)[1])
+                for instrument_id in rng.sample(instrument_ids, k=min(2, len(instrument_ids))):
+                    instrument_rows.append(dict(user_id=user_id, instrument_id=instrument_id))
+                if row["role"] == RoleEnum.STUDENT:
+                    for course_id in rng.sample(course_ids, k=min(rng.randint(1, 3), len(course_ids))):
+                        enrollment_rows.append(dict(student_id=user_id, course_id=course_id, progress=rng.randint(0, 100)))
+                for index in range(per_user + (1 if number <= remainder else 0)):
+                    start = window_start + timedelta(days=rng.randrange(364), hours=rng.randint(8, 20), minutes=rng.choice((0, 15, 30, 45)))
+                    schedule_rows.append(dict(
+                        user_id=user_id,
+                        title=f"Séance {index + 1}",
+                        description="Travail personnel",
+                        start_time=start,
+                        end_time=start + timedelta(minutes=rng.choice((30, 45, 60, 90))),
+                        course_id=rng.choice(course_ids),
+                        reminder_text="Gammes et morceau de la semaine",
+                        is_teacher_view=row["role"] == RoleEnum.TEACHER,
+                    ))
+
+            if instrument_rows:
+                connection.execute(user_instruments.insert(), instrument_rows)
+            if enrollment_rows:
+                connection.execute(Enrollment.__table__.insert(), enrollment_rows)
+            if schedule_rows:
+                connection.execute(ScheduleItem.__table__.insert(), schedule_rows)
+        totals["users"] += len(rows)
+        totals["enrollments"] += len(enrollment_rows)
+        totals["schedule_items"] += len(schedule_rows)
+        print(f"  … {numbers[-1]}/{users} comptes ({time.perf_counter() - started:.1f} s)")
+
+    with engine.begin() as connection:
+        existing_items = connection.execute(
+            select(func.count()).select_from(MarketplaceItem).where(MarketplaceItem.title.like("Article test %"))
+        ).scalar_one()
+        sellers = list(connection.execute(
+            select(User.id).where(User.role.in_([RoleEnum.ADMIN, RoleEnum.TEACHER]))
+        ).scalars())
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        for first in range(existing_items + 1, marketplace_items + 1, batch_size):
+            rows = [
+                dict(
+                    title=f"Article test {number}",
+                    description="Article généré pour les tests de charge",
+                    price=round(rng.uniform(5, 2000), 2),
+                    seller_id=rng.choice(sellers),
+                    is_sold=rng.random() < 0.2,
+                    # Mises en vente réparties sur un an (tris et filtres par date)
+                    created_at=now - timedelta(seconds=rng.randrange(365 * 24 * 3600)),
+                )
+                for number in range(first, min(first + batch_size, marketplace_items + 1))
+            ]
+            connection.execute(MarketplaceItem.__table__.insert(), rows)
+            totals["marketplace_items"] += len(rows)
+
+    print(f"✅ Données synthétiques ajoutées en {time.perf_counter() - started:.1f} s: {totals}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Peuplement de la base GDE")
+    parser.add_argument("--synthetic", action="store_true", help="ajoute un jeu de données volumineux pour les tests de charge")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--schedule-items", type=int, default=1_000_000)
+    parser.add_argument("--marketplace-items", type=int, default=10_000)
+    parser.add_argument("--batch-size", type=int, default=5_000, help="comptes insérés par transaction")
+    parser.add_argument("--seed", type=int, default=42, help="graine du générateur aléatoire")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        seed_synthetic(args.users, args.schedule_items, args.marketplace_items, args.batch_size, args.seed)
+    else:
+        seed_database()
+
+if __name__ == "__main__":
+    main()
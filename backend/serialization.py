@@ -0,0 +1,36 @@
+"""
+Sérialisation JSON rapide des réponses
+
+Avec un `response_model`, FastAPI valide les objets ORM, les convertit en
+dictionnaires JSON-compatibles puis les encode avec json.dumps. Ici la
+validation (from_attributes) et l'encodage en octets sont faits en une passe
+par pydantic-core (TypeAdapter.dump_json), sans dictionnaire intermédiaire.
+
+Les handlers de liste renvoient `model_response(Schema, data)`; le
+`response_model` de la route reste déclaré pour la documentation OpenAPI.
+"""
+import time
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from backend.instrumentation import add_serialize_time
+
+JSON_MEDIA_TYPE = "application/json"
+
+@lru_cache(maxsize=None)
+def type_adapter(schema: Any) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+def dump_json(schema: Any, data: Any) -> bytes:
+    """Valide `data` (objets ORM, dictionnaires...) selon `schema` et l'encode en JSON"""
+    started = time.perf_counter()
+    adapter = type_adapter(schema)
+    body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    add_serialize_time(time.perf_counter() - started)
+    return body
+
+def model_response(schema: Any, data: Any, status_code: int = 200) -> Response:
+    return Response(content=dump_json(schema, data), status_code=status_code, media_type=JSON_MEDIA_TYPE)
@@ -0,0 +1,172 @@
+"""
+Lancement en production: plusieurs workers uvicorn, sans rechargement
+
+Usage:
+    python -m backend.serve [--migrate] [--workers N] [--port 8000]
+
+- workers: WEB_CONCURRENCY, sinon un par CPU disponible (affinité et quota
+  cgroup du conteneur); le pool bcrypt de chaque worker se partage les CPU
+- les migrations (--migrate) tournent une seule fois dans le processus
+  parent, avant la création des workers
+- chaque worker se préchauffe avant d'accepter du trafic (backend.worker)
+- SIGTERM: chaque worker passe /readiness à 503 pendant DRAIN_SECONDS, puis
+  arrête d'accepter des connexions et termine les requêtes en cours (au plus
+  GRACEFUL_TIMEOUT secondes); un second signal arrête immédiatement
+- un worker qui meurt est relancé; les métriques Prometheus sont agrégées
+  entre workers (PROMETHEUS_MULTIPROC_DIR) et /metrics/summary donne l'état
+  du worker qui répond
+
+La supervision (relance, arrêt en parallèle) s'appuie sur des internes
+d'uvicorn (uvicorn._subprocess, Multiprocess): elle n'est utilisée qu'avec
+la version testée (TESTED_UVICORN, épinglée dans requirements.txt); avec une
+autre version, les workers sont lancés par le chemin public d'uvicorn
+(uvicorn.run(workers=N)), sans vidage coordonné.
+
+Le délai d'arrêt du conteneur doit couvrir DRAIN_SECONDS + GRACEFUL_TIMEOUT
+(stop_grace_period des fichiers docker-compose).
+
+run.py reste le lancement de développement (un processus, rechargement).
+"""
+import argparse
+import logging
+import math
+import os
+import shutil
+import tempfile
+import threading
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+# Version d'uvicorn dont les internes utilisés par Supervisor ont été vérifiés
+TESTED_UVICORN = "0.24."
+SUPERVISED = uvicorn.__version__.startswith(TESTED_UVICORN)
+
+DRAIN_SECONDS = float(os.getenv("DRAIN_SECONDS", "5"))
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "20"))
+
+logger = logging.getLogger("uvicorn.error")
+
+def available_cpus() -> int:
+    """CPU utilisables par le processus, quota du conteneur compris"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    for path in ("/sys/fs/cgroup/cpu.max", "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"):
+        try:
+            with open(path) as file:
+                values = file.read().split()
+            if path.endswith("cpu.max"):
+                quota, period = values
+            else:
+                quota = values[0]
+                with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as file:
+                    period = file.read().strip()
+            if quota not in ("max", "-1"):
+                cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+            break
+        except (OSError, ValueError):
+            continue
+    return cpus
+
+class DrainingServer(uvicorn.Server):
+    """Au premier SIGTERM/SIGINT, le worker se vide avant de s'arrêter"""
+
+    def handle_exit(self, sig, frame):
+        from backend.worker import worker_state
+
+        if DRAIN_SECONDS > 0 and not worker_state.draining:
+            worker_state.start_draining()
+            timer = threading.Timer(DRAIN_SECONDS, super().handle_exit, (sig, frame))
+            timer.daemon = True
+            timer.start()
+            return
+        super().handle_exit(sig, frame)
+
+class Supervisor(Multiprocess):
+    """Relance les workers morts; à l'arrêt, tous les workers se vident en parallèle"""
+
+    def run(self):
+        self.startup()
+        while not self.should_exit.wait(1):
+            for index, process in enumerate(self.processes):
+                if not process.is_alive():
+                    logger.warning("Worker %s exited with code %s, restarting", process.pid, process.exitcode)
+                    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+                        from prometheus_client import multiprocess
+                        multiprocess.mark_process_dead(process.pid)
+                    from uvicorn._subprocess import get_subprocess
+                    process = get_subprocess(config=self.config, target=self.target, sockets=self.sockets)
+                    process.start()
+                    self.processes[index] = process
+        self.shutdown()
+
+    def shutdown(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join()
+        logger.info("Stopping parent process [%s]", self.pid)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur de production GDE")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "0")), help="0: un par CPU")
+    parser.add_argument("--migrate", action="store_true", help="appliquer les migrations avant de démarrer")
+    args = parser.parse_args()
+
+    cpus = available_cpus()
+    workers = args.workers or cpus
+    # Variables lues par les workers à l'import de backend.*
+    os.environ.setdefault("BCRYPT_POOL_SIZE", str(max(1, cpus // workers)))
+    multiproc_dir = None
+    if workers > 1 and not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiproc_dir = tempfile.mkdtemp(prefix="gde-prometheus-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = multiproc_dir
+
+    if workers > 1 and os.getenv("RESPONSE_CACHE_URL", "memory://").startswith("memory"):
+        logger.warning(
+            "RESPONSE_CACHE_URL=memory:// with %s workers: a write only invalidates the worker that handled it, "
+            "others may serve stale catalogue responses for up to RESPONSE_CACHE_TTL seconds (use Redis)",
+            workers,
+        )
+
+    if args.migrate:
+        from backend.migrate import upgrade_database
+        upgrade_database()
+
+    config = uvicorn.Config(
+        "backend.main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        log_level=os.getenv("LOG_LEVEL", "info"),
+        # Derrière le proxy de la plateforme (Railway, Render)
+        proxy_headers=True,
+        forwarded_allow_ips="*",
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+    )
+    server = DrainingServer(config)
+    logger.info(
+        "Starting %s worker(s) on %s CPU(s), bcrypt pool %s per worker",
+        workers, cpus, os.environ["BCRYPT_POOL_SIZE"],
+    )
+    try:
+        if workers > 1 and not SUPERVISED:
+            logger.warning(
+                "uvicorn %s is not the tested %sx: using uvicorn's own worker supervisor (no coordinated drain)",
+                uvicorn.__version__, TESTED_UVICORN,
+            )
+            Multiprocess(config, target=server.run, sockets=[config.bind_socket()]).run()
+        elif workers > 1:
+            Supervisor(config, target=server.run, sockets=[config.bind_socket()]).run()
+        else:
+            server.run()
+    finally:
+        if multiproc_dir:
+            shutil.rmtree(multiproc_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Fuseaux horaires du planning
+
+Les dates sont stockées et renvoyées en UTC: SQLite enregistre une date
+avec fuseau sans son décalage, une date reçue est donc convertie en UTC
+avant d'être écrite ou comparée (une date sans fuseau est supposée UTC).
+Les bornes calendaires (semaine, journée) se calculent dans le fuseau de
+l'utilisateur (paramètre `tz`, SCHEDULE_TIMEZONE par défaut) puis sont
+converties en UTC.
+"""
+import os
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from fastapi import HTTPException, status
+
+SCHEDULE_TIMEZONE = os.getenv("SCHEDULE_TIMEZONE", "Europe/Paris")
+
+def as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+@lru_cache(maxsize=64)
+def get_timezone(name: str) -> tzinfo:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown time zone: {name}"
+        )
+
+def localize(value: Union[datetime, date], zone: tzinfo) -> datetime:
+    """
+    Date UTC d'un paramètre de requête: une date sans décalage est lue dans
+    `zone`, un jour seul désigne minuit dans `zone`
+    """
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time())
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=zone)
+    return value.astimezone(timezone.utc)
+
+def week_bounds(now: datetime, zone: tzinfo) -> tuple[datetime, datetime]:
+    """Du lundi 00:00 au lundi suivant dans `zone` (semaine de `now`), en UTC"""
+    monday = now.astimezone(zone).date()
+    monday -= timedelta(days=monday.weekday())
+    # Minuit local de chaque lundi: le décalage change au passage à l'heure d'été
+    return (
+        datetime.combine(monday, time(), zone).astimezone(timezone.utc),
+        datetime.combine(monday + timedelta(days=7), time(), zone).astimezone(timezone.utc),
+    )
@@ -0,0 +1,106 @@
+"""
+État du worker (processus uvicorn) et préchauffage au démarrage
+
+`worker_state` compte les requêtes servies et en cours, et passe en mode
+`draining` quand le worker reçoit SIGTERM (python -m backend.serve): /readiness
+répond alors 503 pour que le répartiteur cesse d'envoyer du trafic pendant
+que les requêtes en cours se terminent.
+
+`warm_up` est appelé par le lifespan avant la première requête: connexions
+du pool ouvertes, contexte bcrypt et threads de hachage prêts, réponses du
+catalogue calculées (cache de réponses, sérialiseurs, requêtes compilées).
+"""
+import asyncio
+import logging
+import os
+import time
+
+from backend.database import DB_POOL_SIZE, async_engine, env_bool
+from backend.hashing import password_hasher
+
+WARM_UP_ON_STARTUP = env_bool("WARM_UP_ON_STARTUP", True)
+# Connexions ouvertes d'avance par worker (0 pour désactiver)
+DB_POOL_PREWARM = int(os.getenv("DB_POOL_PREWARM", str(min(DB_POOL_SIZE, 4))))
+# Réponses publiques calculées au démarrage
+WARM_UP_PATHS = ("/api/courses/instruments", "/api/courses/", "/api/marketplace/")
+
+logger = logging.getLogger(__name__)
+
+class WorkerState:
+    def __init__(self):
+        self.pid = os.getpid()
+        self.started_at = time.time()
+        self.requests = 0
+        self.in_flight = 0
+        self.draining = False
+        self.warm_up_seconds = None
+
+    def start_draining(self):
+        self.draining = True
+        logger.info("Worker %s draining: readiness now failing", self.pid)
+
+    def stats(self) -> dict:
+        return {
+            "pid": self.pid,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "draining": self.draining,
+            "warm_up_seconds": self.warm_up_seconds,
+        }
+
+worker_state = WorkerState()
+
+async def open_pool_connections(count: int):
+    connections = await asyncio.gather(*(async_engine.connect() for _ in range(count)))
+    try:
+        for connection in connections:
+            await connection.exec_driver_sql("SELECT 1")
+    finally:
+        # Rendues au pool, qui les garde ouvertes
+        for connection in connections:
+            await connection.close()
+
+async def asgi_get(app, path: str) -> int:
+    """Appel GET en process à travers toute la pile ASGI (middlewares compris)"""
+    status_code = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+
+    await app({
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"warm-up")],
+        "client": None,
+        "server": None,
+    }, receive, send)
+    return status_code
+
+async def warm_up(app):
+    """Préchauffe le worker; une dépendance indisponible est journalisée sans bloquer le démarrage"""
+    started = time.perf_counter()
+    try:
+        if DB_POOL_PREWARM:
+            await open_pool_connections(DB_POOL_PREWARM)
+        # Import de passlib, chargement de bcrypt et création des threads du pool
+        await password_hasher.hash("warm-up")
+        for path in WARM_UP_PATHS:
+            status_code = await asgi_get(app, path)
+            if status_code != 200:
+                logger.warning("Warm-up GET %s returned %s", path, status_code)
+    except Exception as exc:
+        logger.warning("Worker warm-up incomplete: %s", exc)
+    worker_state.warm_up_seconds = round(time.perf_counter() - started, 3)
@@ -3,10 +3,12 @@
 
 echo "🎵 Starting GDE Backend..."
 
-# Exécuter le seed
-echo "📦 Running database seed..."
-python3 seed_data.py
+# Exécuter le seed (idempotent: n'insère que les données manquantes)
+if [ "${SEED_DATABASE:-true}" = "true" ]; then
+    echo "📦 Running database seed..."
+    python3 seed_data.py
+fi
 
-# Démarrer uvicorn
+# Migrations une seule fois, puis les workers uvicorn (WEB_CONCURRENCY)
 echo "🚀 Starting uvicorn on port ${PORT:-8000}..."
-exec uvicorn backend.main:app --host 0.0.0.0 --port ${PORT:-8000}
+exec python3 -m backend.serve --migrate --port ${PORT:-8000}
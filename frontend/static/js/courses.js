@@ -170,8 +170,8 @@ async function viewLessonDetails(lessonId) {
 
 async function loadInstruments() {
     try {
-        const response = await fetch(`${API_URL}/courses/instruments`);
-        const instruments = await response.json();
+        const response = await fetch(`${API_URL}/courses/instruments?limit=200`);
+        const { items: instruments } = await response.json();
         return instruments;
     } catch (error) {
         console.error('Error loading instruments:', error);
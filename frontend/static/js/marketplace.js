@@ -3,7 +3,7 @@
 async function loadMarketplaceItems() {
     try {
         const response = await fetch(`${API_URL}/marketplace/`);
-        const items = await response.json();
+        const { items } = await response.json();
         
         const container = document.getElementById('marketplaceItems');
         if (!container) return;
@@ -211,10 +211,10 @@ async function loadStudentsList() {
     if (!authService.hasRole('teacher')) return;
     
     try {
-        const response = await fetch(`${API_URL}/schedule/students`, {
+        const response = await fetch(`${API_URL}/schedule/students?limit=200`, {
             headers: authService.getHeaders()
         });
-        const students = await response.json();
+        const { items: students } = await response.json();
         
         const container = document.getElementById('studentsListContainer');
         if (!container) return;
@@ -1,9 +1,15 @@
 """
-Script de lancement du serveur GDE Music Platform
+Script de lancement du serveur GDE Music Platform (développement)
+
+Rechargement automatique et migrations au démarrage; en production,
+utiliser python -m backend.serve.
 """
+import os
+
 import uvicorn
 
 if __name__ == "__main__":
+    os.environ.setdefault("MIGRATE_ON_STARTUP", "true")
     uvicorn.run(
         "backend.main:app",
         host="0.0.0.0",